@@ -0,0 +1,11 @@
+"""Нагрузочные замеры Blogicum.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks seed --scale 1k
+    python -m benchmarks run --scale 1k --output results/1k.json
+    python -m benchmarks compare results/base.json results/1k.json
+
+Для каждого масштаба создаётся отдельная база в benchmarks/data/, рабочая
+база проекта не затрагивается.
+"""
@@ -0,0 +1,317 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from benchmarks.django_setup import database_path, setup
+from benchmarks.seed import SCALES
+
+
+def _seed(args):
+    if args.drop:
+        database_path(args.scale).unlink(missing_ok=True)
+    setup(args.scale)
+    from benchmarks.seed import seed
+
+    posts, comments = seed(args.scale)
+    print(f"Создано постов: {posts}, комментариев: {comments}")
+
+
+def _run(args):
+    setup(args.scale)
+    from benchmarks.routes import SCENARIOS, uncovered_url_names
+    from benchmarks.runner import run
+
+    missing = uncovered_url_names()
+    if missing:
+        print(f"Нет сценариев для маршрутов: {sorted(missing)}")
+    scenarios = [
+        scenario for scenario in SCENARIOS
+        if not args.scenario or scenario.name in args.scenario
+    ]
+
+    def progress(name, result):
+        print(
+            f"{name:<24} p50 {result['p50_ms']:>9.2f}  "
+            f"p95 {result['p95_ms']:>9.2f}  p99 {result['p99_ms']:>9.2f} мс  "
+            f"запросов {result['queries']:>5}  "
+            f"память {result['peak_alloc_kib']} КиБ"
+        )
+
+    report = run(
+        scenarios, args.scale, args.iterations, args.warmup,
+        args.alloc_iterations, args.cold_cache, progress,
+    )
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"Результаты записаны в {output}")
+
+
+def _search(args):
+    setup(args.scale)
+    from django.core.management import call_command
+
+    from benchmarks.search import compare_search, sample_terms
+
+    # В базах, заполненных до появления индекса, его создаёт миграция.
+    call_command("migrate", verbosity=0)
+    report = compare_search(sample_terms(args.terms), args.iterations)
+    for engine in ("fts5", "like"):
+        result = report[engine]
+        print(
+            f"{engine:<6} p50 {result['p50_ms']:>9.2f}  "
+            f"p95 {result['p95_ms']:>9.2f}  p99 {result['p99_ms']:>9.2f} мс  "
+            f"найдено в среднем {result['mean_hits']}"
+        )
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+def _api(args):
+    setup(args.scale)
+    from benchmarks.api import compare_api
+
+    report = compare_api(args.scale, args.iterations, args.warmup)
+    for api, pair in report["pairs"].items():
+        print(
+            f"{pair['html']:<16} {pair['html_rps']:>8} зап/с  "
+            f"{api:<20} {pair['api_rps']:>8} зап/с  x{pair['speedup']}"
+        )
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+def _concurrency(args):
+    from benchmarks.concurrency import (
+        LEVELS,
+        SCENARIOS,
+        compare_concurrency,
+        measure_mode
+    )
+
+    scenarios = args.scenario or SCENARIOS
+    levels = args.level or LEVELS
+    if args.mode:
+        # Один режим в этом процессе: так его запускает сравнение.
+        setup(args.scale)
+        report = measure_mode(
+            args.mode, scenarios, levels, args.requests, args.warmup
+        )
+    else:
+        def progress(mode, results):
+            for name, by_level in results.items():
+                for clients, result in by_level.items():
+                    print(
+                        f"{mode:<5} {name:<16} {clients:>4} клиентов  "
+                        f"{result['rps']:>8} зап/с  "
+                        f"p50 {result['p50_ms']:>9.2f}  "
+                        f"p99 {result['p99_ms']:>9.2f} мс  "
+                        f"ошибок {result['errors']}"
+                    )
+
+        report = compare_concurrency(
+            args.scale, scenarios, levels, args.requests, args.warmup,
+            progress,
+        )
+    if args.output == "-":
+        print(json.dumps(report, ensure_ascii=False))
+    elif args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+def _sqlite(args):
+    from benchmarks.sqlite_stress import CONFIGS, compare_sqlite, stress
+
+    if args.config:
+        # Одна конфигурация в этом процессе: так её запускает сравнение.
+        overrides = dict(CONFIGS[args.config])
+        database = {"NAME": args.database, **overrides.pop("database", {})}
+        setup(args.scale, database, **overrides)
+        report = stress(args.seconds, args.writers, args.readers)
+    else:
+        def progress(config, result):
+            for kind, stats in result.items():
+                print(
+                    f"{config:<9} {kind:<7} {stats['per_second']:>8} в с  "
+                    f"p50 {stats['p50_ms']:>9}  p99 {stats['p99_ms']:>9} мс"
+                    f"  ошибок {stats['errors']}"
+                )
+
+        report = compare_sqlite(
+            args.scale, args.seconds, args.writers, args.readers, progress
+        )
+    if args.output == "-":
+        print(json.dumps(report, ensure_ascii=False))
+    elif args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+def _comments(args):
+    from benchmarks.comment_databases import (
+        COMMENTS_DATABASE,
+        compare_comment_databases,
+        contend,
+        prepare
+    )
+
+    if args.config:
+        # Одна конфигурация в этом процессе: так её запускает сравнение.
+        databases = {}
+        if args.comments_database:
+            databases[COMMENTS_DATABASE] = {"NAME": args.comments_database}
+        setup(args.scale, {"NAME": args.database}, databases)
+        prepare(args.config, args.database, args.comments_database)
+        report = contend(args.seconds, args.commenters, args.editors)
+    else:
+        def progress(config, result):
+            for kind, stats in result.items():
+                print(
+                    f"{config:<6} {kind:<8} {stats['per_second']:>8} в с  "
+                    f"p50 {stats['p50_ms']!s:>9}  "
+                    f"p99 {stats['p99_ms']!s:>9} мс"
+                    f"  ошибок {stats['errors']}"
+                )
+
+        report = compare_comment_databases(
+            args.scale, args.seconds, args.commenters, args.editors,
+            progress,
+        )
+    if args.output == "-":
+        print(json.dumps(report, ensure_ascii=False))
+    elif args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+def _compare(args):
+    from benchmarks.runner import compare
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    current = json.loads(Path(args.current).read_text())
+    regressions = compare(baseline, current, args.threshold)
+    for line in regressions:
+        print(f"РЕГРЕССИЯ {line}")
+    if regressions:
+        sys.exit(1)
+    print("Регрессий нет.")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="заполнить базу масштаба")
+    seed.add_argument("--scale", choices=SCALES, default="1k")
+    seed.add_argument(
+        "--drop", action="store_true", help="пересоздать базу масштаба"
+    )
+    seed.set_defaults(handler=_seed)
+
+    run = commands.add_parser("run", help="прогнать сценарии")
+    run.add_argument("--scale", choices=SCALES, default="1k")
+    run.add_argument("--iterations", type=int, default=50)
+    run.add_argument("--warmup", type=int, default=5)
+    run.add_argument("--alloc-iterations", type=int, default=5)
+    run.add_argument(
+        "--cold-cache", action="store_true",
+        help="очищать кэш перед каждым запросом",
+    )
+    run.add_argument(
+        "--scenario", action="append", help="запустить только эти сценарии"
+    )
+    run.add_argument("--output", default="benchmarks/results/latest.json")
+    run.set_defaults(handler=_run)
+
+    search = commands.add_parser(
+        "search", help="сравнить поиск FTS5 и LIKE"
+    )
+    search.add_argument("--scale", choices=SCALES, default="1m")
+    search.add_argument("--terms", type=int, default=20)
+    search.add_argument("--iterations", type=int, default=3)
+    search.add_argument("--output")
+    search.set_defaults(handler=_search)
+
+    api = commands.add_parser(
+        "api", help="сравнить пропускную способность API и HTML"
+    )
+    api.add_argument("--scale", choices=SCALES, default="1k")
+    api.add_argument("--iterations", type=int, default=50)
+    api.add_argument("--warmup", type=int, default=5)
+    api.add_argument("--output")
+    api.set_defaults(handler=_api)
+
+    concurrency = commands.add_parser(
+        "concurrency", help="сравнить WSGI и ASGI под конкурентной нагрузкой"
+    )
+    concurrency.add_argument("--scale", choices=SCALES, default="1k")
+    concurrency.add_argument(
+        "--mode", choices=("wsgi", "asgi"),
+        help="замерить один режим в этом процессе",
+    )
+    concurrency.add_argument(
+        "--scenario", action="append", help="замерить только эти сценарии"
+    )
+    concurrency.add_argument(
+        "--level", type=int, action="append",
+        help="число одновременных клиентов (можно несколько раз)",
+    )
+    concurrency.add_argument("--requests", type=int, default=500)
+    concurrency.add_argument("--warmup", type=int, default=20)
+    concurrency.add_argument("--output")
+    concurrency.set_defaults(handler=_concurrency)
+
+    sqlite = commands.add_parser(
+        "sqlite", help="конкурентные чтения и записи до и после настройки"
+    )
+    sqlite.add_argument("--scale", choices=SCALES, default="1k")
+    sqlite.add_argument(
+        "--config", choices=("baseline", "tuned"),
+        help="замерить одну конфигурацию в этом процессе",
+    )
+    sqlite.add_argument("--database", help="копия базы для --config")
+    sqlite.add_argument("--seconds", type=int, default=10)
+    sqlite.add_argument("--writers", type=int, default=4)
+    sqlite.add_argument("--readers", type=int, default=8)
+    sqlite.add_argument("--output")
+    sqlite.set_defaults(handler=_sqlite)
+
+    comments = commands.add_parser(
+        "comments", help="конкурентные комментарии в общей и отдельной базе"
+    )
+    comments.add_argument("--scale", choices=SCALES, default="1k")
+    comments.add_argument(
+        "--config", choices=("single", "split"),
+        help="замерить одну конфигурацию в этом процессе",
+    )
+    comments.add_argument("--database", help="копия основной базы")
+    comments.add_argument(
+        "--comments-database", help="файл базы комментариев для split"
+    )
+    comments.add_argument("--seconds", type=int, default=10)
+    comments.add_argument("--commenters", type=int, default=8)
+    comments.add_argument("--editors", type=int, default=2)
+    comments.add_argument("--output")
+    comments.set_defaults(handler=_comments)
+
+    compare = commands.add_parser("compare", help="сравнить два прогона")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.1)
+    compare.set_defaults(handler=_compare)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# HTML-страница и отвечающий ей запрос к API.
+PAIRS = (
+    ("index", "api_posts"),
+    ("category", "api_category_posts"),
+    ("profile_visitor", "api_author_posts"),
+    ("post_detail", "api_post_detail"),
+    ("post_comments", "api_post_comments"),
+)
+
+
+def _throughput(result):
+    return round(1000 / result["mean_ms"], 1) if result["mean_ms"] else None
+
+
+def compare_api(scale, iterations=50, warmup=5):
+    """Пропускная способность HTML-страниц и API в одном потоке.
+
+    Запросы идут от авторизованного читателя, поэтому кэш страниц не
+    участвует и сравнивается именно стоимость ответа.
+    """
+    from benchmarks.routes import SCENARIOS
+    from benchmarks.runner import run
+
+    scenarios = {scenario.name: scenario for scenario in SCENARIOS}
+    report = run(
+        [scenarios[name] for pair in PAIRS for name in pair],
+        scale, iterations, warmup, alloc_iterations=1,
+    )
+    results = report["results"]
+    report["pairs"] = {}
+    for html, api in PAIRS:
+        html_rps = _throughput(results[html])
+        api_rps = _throughput(results[api])
+        report["pairs"][api] = {
+            "html": html,
+            "html_rps": html_rps,
+            "api_rps": api_rps,
+            "speedup": (
+                round(api_rps / html_rps, 2)
+                if html_rps and api_rps else None
+            ),
+        }
+    return report
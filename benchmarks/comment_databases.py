@@ -0,0 +1,110 @@
+"""Конкурентные комментарии в общей и в отдельной базе SQLite.
+
+Авторы комментариев отправляют CommentCreateView, а в это же время
+редакторы сохраняют свой профиль — обычную запись в основную базу. В
+конфигурации split комментарии живут в своём файле
+(BLOG_SPLIT_COMMENTS=1) и их вставки не ждут блокировку основной базы;
+счётчик comment_count поста по-прежнему обновляется в основной.
+Каждая конфигурация работает со своими копиями баз в отдельном
+подпроцессе, потому что набор баз задаётся при импорте настроек.
+"""
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.django_setup import database_path
+from benchmarks.sqlite_stress import copy_database, run_workloads
+
+CONFIGS = ("single", "split")
+COMMENTS_DATABASE = "comments"
+
+
+def move_comments(primary, comments):
+    """Переносит таблицу комментариев из основной базы в базу comments.
+
+    Схему в базе комментариев заранее создаёт migrate --database.
+    """
+    db = sqlite3.connect(comments)
+    try:
+        db.execute("ATTACH DATABASE ? AS main_db", (str(primary),))
+        with db:
+            db.execute(
+                "INSERT INTO blog_comment SELECT * FROM main_db.blog_comment"
+            )
+            db.execute("DELETE FROM main_db.blog_comment")
+    finally:
+        db.close()
+
+
+def prepare(config, database, comments_database=None):
+    """Доводит копии баз до текущих миграций."""
+    from django.core.management import call_command
+    from django.db import connections
+
+    call_command("migrate", verbosity=0)
+    if config == "split":
+        call_command("migrate", database=COMMENTS_DATABASE, verbosity=0)
+        connections.close_all()
+        move_comments(database, comments_database)
+
+
+def contend(seconds, commenters, editors):
+    """Гоняет авторов комментариев и редакторов профиля seconds секунд."""
+    from benchmarks.routes import find_targets
+
+    targets = find_targets()
+    visitor = targets.visitor
+    comment = f"/posts/{targets.post.pk}/comment/"
+    profile = {
+        "first_name": "Нагрузка", "last_name": visitor.last_name,
+        "username": visitor.username, "email": visitor.email,
+    }
+    return run_workloads(seconds, visitor, (
+        ("comments", commenters, lambda client: client.post(
+            comment, {"text": "Комментарий для нагрузки."}
+        )),
+        ("profile", editors, lambda client: client.post(
+            "/edit_profile/", profile
+        )),
+    ))
+
+
+def compare_comment_databases(
+        scale, seconds=10, commenters=8, editors=2, progress=None):
+    """Запускает contend() для общей и раздельных баз на копиях."""
+    report = {
+        "meta": {
+            "scale": scale, "seconds": seconds,
+            "commenters": commenters, "editors": editors,
+        },
+        "configs": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for config in CONFIGS:
+            database = Path(directory) / f"{config}.sqlite3"
+            copy_database(database_path(scale), database)
+            command = [
+                sys.executable, "-m", "benchmarks", "comments",
+                "--scale", scale, "--config", config,
+                "--database", str(database),
+                "--seconds", str(seconds),
+                "--commenters", str(commenters), "--editors", str(editors),
+                "--output", "-",
+            ]
+            environ = dict(os.environ, BLOG_SPLIT_COMMENTS="0")
+            if config == "split":
+                comments = Path(directory) / f"{config}.comments.sqlite3"
+                command += ["--comments-database", str(comments)]
+                environ["BLOG_SPLIT_COMMENTS"] = "1"
+            completed = subprocess.run(
+                command, capture_output=True, text=True, check=True,
+                env=environ,
+            )
+            report["configs"][config] = json.loads(completed.stdout)
+            if progress:
+                progress(config, report["configs"][config])
+    return report
@@ -0,0 +1,205 @@
+"""Пропускная способность и хвост задержек WSGI и ASGI под нагрузкой.
+
+Приложение вызывается в процессе, без сокетов и сервера: WSGI — из пула
+по потоку на клиента, как у потокового сервера, ASGI — корутинами в
+одном цикле событий, как у uvicorn. Каждый режим запускается в своём
+подпроцессе, потому что набор представлений выбирается при загрузке
+URL-конфигурации (BLOG_ASYNC_VIEWS).
+"""
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks.runner import percentile
+
+MODES = ("wsgi", "asgi")
+LEVELS = (1, 10, 50, 100, 250, 500)
+# Сценарии страниц, у которых есть асинхронные варианты.
+SCENARIOS = ("index", "category", "profile_visitor", "post_detail")
+HOST = "127.0.0.1"
+
+
+def _split(path):
+    path, _, query = path.partition("?")
+    return path, query
+
+
+def _wsgi_request(app, path, cookie):
+    path, query = _split(path)
+    environ = {
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "HTTP_COOKIE": cookie,
+        "SERVER_NAME": HOST,
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    body = app(environ, start_response)
+    try:
+        for _ in body:
+            pass
+    finally:
+        body.close()
+    return statuses[0]
+
+
+async def _asgi_request(app, path, cookie):
+    path, query = _split(path)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", HOST.encode()), (b"cookie", cookie.encode())],
+        "client": (HOST, 0),
+        "server": (HOST, 80),
+    }
+    statuses = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await app(scope, receive, send)
+    return statuses[0]
+
+
+def _summary(latencies, elapsed, errors):
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+
+def load_wsgi(app, path, cookie, clients, requests):
+    """Отправляет requests запросов из clients потоков по одному."""
+    tickets = itertools.count()
+    lock = threading.Lock()
+    latencies, errors = [], []
+
+    def client():
+        while next(tickets) < requests:
+            start = time.perf_counter()
+            status = _wsgi_request(app, path, cookie)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if status != 200:
+                    errors.append(status)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        for future in [executor.submit(client) for _ in range(clients)]:
+            future.result()
+    return _summary(latencies, time.perf_counter() - start, len(errors))
+
+
+def load_asgi(app, path, cookie, clients, requests):
+    """То же для ASGI: clients корутин в одном цикле событий."""
+    tickets = itertools.count()
+    latencies, errors = [], []
+
+    async def client():
+        while next(tickets) < requests:
+            start = time.perf_counter()
+            status = await _asgi_request(app, path, cookie)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                errors.append(status)
+
+    async def main():
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(main())
+    return _summary(latencies, elapsed, len(errors))
+
+
+def measure_mode(mode, scenarios, levels, requests, warmup):
+    """Замер в текущем процессе; Django уже настроен на нужный режим."""
+    from django.test import Client
+
+    from benchmarks.routes import SCENARIOS as ALL_SCENARIOS, find_targets
+
+    if mode == "asgi":
+        from django.core.asgi import get_asgi_application
+        app, load = get_asgi_application(), load_asgi
+    else:
+        from django.core.wsgi import get_wsgi_application
+        app, load = get_wsgi_application(), load_wsgi
+    targets = find_targets()
+    # Авторизованный читатель обходит кэш страниц.
+    client = Client()
+    client.force_login(targets.visitor)
+    cookie = "; ".join(
+        f"{morsel.key}={morsel.coded_value}"
+        for morsel in client.cookies.values()
+    )
+    by_name = {scenario.name: scenario for scenario in ALL_SCENARIOS}
+    results = {}
+    for name in scenarios:
+        path = by_name[name].path(targets)
+        load(app, path, cookie, 1, warmup)
+        results[name] = {
+            str(clients): load(
+                app, path, cookie, clients, max(requests, clients)
+            )
+            for clients in levels
+        }
+    return results
+
+
+def compare_concurrency(scale, scenarios=SCENARIOS, levels=LEVELS,
+                        requests=500, warmup=20, progress=None):
+    """Запускает оба режима в подпроцессах и сводит результаты."""
+    report = {
+        "meta": {"scale": scale, "requests": requests, "levels": levels},
+        "modes": {},
+    }
+    for mode in MODES:
+        command = [
+            sys.executable, "-m", "benchmarks", "concurrency",
+            "--scale", scale, "--mode", mode,
+            "--requests", str(requests), "--warmup", str(warmup),
+            "--output", "-",
+            *itertools.chain.from_iterable(
+                ("--scenario", name) for name in scenarios
+            ),
+            *itertools.chain.from_iterable(
+                ("--level", str(level)) for level in levels
+            ),
+        ]
+        env = {**os.environ, "BLOG_ASYNC_VIEWS": "1" if mode == "asgi" else ""}
+        completed = subprocess.run(
+            command, env=env, capture_output=True, text=True, check=True
+        )
+        report["modes"][mode] = json.loads(completed.stdout)
+        if progress:
+            progress(mode, report["modes"][mode])
+    return report
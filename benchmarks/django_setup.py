@@ -0,0 +1,38 @@
+import os
+import sys
+from pathlib import Path
+
+import django
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PROJECT_DIR = ROOT_DIR / "blogicum"
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+
+def database_path(scale):
+    return DATA_DIR / f"blog-{scale}.sqlite3"
+
+
+def setup(scale, database=None, databases=None, **overrides):
+    """Настраивает Django на базу выбранного масштаба.
+
+    Настройки правятся до django.setup(), пока соединения ещё не созданы:
+    database дополняет DATABASES["default"], databases — другие базы по
+    псевдониму, остальные аргументы заменяют одноимённые настройки.
+    """
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "blogicum.settings")
+    from django.conf import settings
+
+    DATA_DIR.mkdir(exist_ok=True)
+    settings.DATABASES["default"]["NAME"] = database_path(scale)
+    # DEBUG копит все SQL-запросы в памяти и искажает замеры.
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+    settings.BLOG_QUERY_BUDGET_SAMPLE_RATE = 0
+    settings.DATABASES["default"].update(database or {})
+    for alias, updates in (databases or {}).items():
+        settings.DATABASES[alias].update(updates)
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
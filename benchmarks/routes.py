@@ -0,0 +1,264 @@
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from django.utils import timezone
+
+ANONYMOUS, VISITOR, OWNER = "anonymous", "visitor", "owner"
+
+
+@dataclass
+class Scenario:
+    name: str
+    url_name: str
+    path: Callable[["Targets"], str]
+    role: str = VISITOR
+    method: str = "get"
+    data: Optional[Callable[["Targets"], dict]] = None
+    # Пишущие сценарии выполняются в откатываемой транзакции.
+    writes: bool = False
+    expected_status: tuple = (200,)
+    tags: tuple = field(default_factory=tuple)
+
+
+@dataclass
+class Targets:
+    """Объекты базы, к которым обращаются сценарии."""
+
+    post: object
+    category: object
+    owner: object
+    visitor: object
+    comment: object
+    location: object
+    deep_page: int
+    deep_cursor: str
+    deep_comment_cursor: str
+    search_term: str
+
+
+def _deep_feed_page():
+    """Середина главной ленты: номер страницы и равноценный ему курсор."""
+    from blog.constants import PAGINATE
+    from blog.models import Post
+    from blog.pagination import FORWARD, encode_cursor
+
+    feed = Post.objects.published().order_by("-pub_date", "-id")
+    page = max(feed.count() // PAGINATE // 2, 1)
+    if page == 1:
+        return page, ""
+    last = feed[(page - 1) * PAGINATE - 1]
+    return page, encode_cursor(FORWARD, last.pub_date, last.pk)
+
+
+def _deep_comment_cursor(post):
+    """Курсор на середину комментариев самого обсуждаемого поста."""
+    from blog.pagination import FORWARD, encode_cursor
+
+    middle = post.comments.order_by("created_at", "id")[
+        post.comment_count // 2:
+    ].first()
+    if middle is None:
+        return ""
+    return encode_cursor(FORWARD, middle.created_at, middle.pk)
+
+
+def find_targets():
+    from blog.models import Category, Location, Post
+
+    post = (
+        Post.objects.published()
+        .filter(comment_count__gt=0, category__isnull=False)
+        .order_by("-comment_count", "pk")
+        .select_related("author", "category")
+        .first()
+    )
+    if post is None:
+        raise SystemExit("В базе нет опубликованных постов с комментариями.")
+    comment = post.comments.with_author().first()
+    deep_page, deep_cursor = _deep_feed_page()
+    return Targets(
+        post=post,
+        category=Category.objects.get(pk=post.category_id),
+        owner=post.author,
+        visitor=comment.author,
+        comment=comment,
+        location=Location.objects.filter(is_published=True).first(),
+        deep_page=deep_page,
+        deep_cursor=deep_cursor,
+        deep_comment_cursor=_deep_comment_cursor(post),
+        search_term=max(post.title.split(), key=len).strip("."),
+    )
+
+
+def _post_form(targets):
+    return {
+        "title": "Замер производительности",
+        "text": "Текст публикации для замера.",
+        "pub_date": timezone.now().strftime("%Y-%m-%dT%H:%M"),
+        "category": targets.category.pk,
+        "location": targets.location.pk if targets.location else "",
+        "is_published": "on",
+    }
+
+
+def _comment_path(name):
+    def path(targets):
+        return f"/posts/{targets.post.pk}/{name}/{targets.comment.pk}/"
+    return path
+
+
+SCENARIOS = [
+    Scenario("index", "blog:index", lambda t: "/"),
+    Scenario("index_anonymous", "blog:index", lambda t: "/", role=ANONYMOUS),
+    Scenario(
+        "index_deep_page", "blog:index", lambda t: f"/?page={t.deep_page}"
+    ),
+    Scenario(
+        "index_deep_cursor", "blog:index",
+        lambda t: f"/?cursor={t.deep_cursor}",
+    ),
+    Scenario(
+        "category", "blog:category_posts",
+        lambda t: f"/category/{t.category.slug}/",
+    ),
+    Scenario(
+        "profile_owner", "blog:profile",
+        lambda t: f"/profile/{t.owner.username}/", role=OWNER,
+    ),
+    Scenario(
+        "profile_visitor", "blog:profile",
+        lambda t: f"/profile/{t.owner.username}/",
+    ),
+    Scenario(
+        "post_detail", "blog:post_detail", lambda t: f"/posts/{t.post.pk}/"
+    ),
+    Scenario(
+        "post_detail_anonymous", "blog:post_detail",
+        lambda t: f"/posts/{t.post.pk}/", role=ANONYMOUS,
+    ),
+    Scenario(
+        "search", "blog:search", lambda t: f"/search/?q={t.search_term}"
+    ),
+    Scenario("feed_atom", "blog:feed", lambda t: "/feeds/atom/"),
+    Scenario("feed_rss", "blog:feed", lambda t: "/feeds/rss/"),
+    Scenario(
+        "category_feed", "blog:category_feed",
+        lambda t: f"/category/{t.category.slug}/feeds/atom/",
+    ),
+    Scenario(
+        "author_feed", "blog:author_feed",
+        lambda t: f"/profile/{t.owner.username}/feeds/rss/",
+    ),
+    Scenario(
+        "post_comments", "blog:post_comments",
+        lambda t: f"/posts/{t.post.pk}/comments/",
+    ),
+    Scenario(
+        "post_comments_deep", "blog:post_comments",
+        lambda t: (
+            f"/posts/{t.post.pk}/comments/?cursor={t.deep_comment_cursor}"
+        ),
+    ),
+    Scenario(
+        "create_post_form", "blog:create_post", lambda t: "/posts/create/"
+    ),
+    Scenario(
+        "create_post", "blog:create_post", lambda t: "/posts/create/",
+        method="post", data=_post_form, writes=True,
+        expected_status=(302,),
+    ),
+    Scenario(
+        "edit_post_form", "blog:edit_post",
+        lambda t: f"/posts/{t.post.pk}/edit/", role=OWNER,
+    ),
+    Scenario(
+        "edit_post", "blog:edit_post",
+        lambda t: f"/posts/{t.post.pk}/edit/", role=OWNER,
+        method="post", data=_post_form, writes=True,
+        expected_status=(302,),
+    ),
+    Scenario(
+        "delete_post_form", "blog:delete_post",
+        lambda t: f"/posts/{t.post.pk}/delete/", role=OWNER,
+    ),
+    Scenario(
+        "delete_post", "blog:delete_post",
+        lambda t: f"/posts/{t.post.pk}/delete/", role=OWNER,
+        method="post", writes=True, expected_status=(302,),
+    ),
+    Scenario(
+        "edit_profile_form", "blog:edit_profile", lambda t: "/edit_profile/"
+    ),
+    Scenario(
+        "add_comment", "blog:add_comment",
+        lambda t: f"/posts/{t.post.pk}/comment/",
+        method="post", data=lambda t: {"text": "Комментарий для замера."},
+        writes=True, expected_status=(302,),
+    ),
+    Scenario(
+        "edit_comment_form", "blog:edit_comment",
+        _comment_path("edit_comment"),
+    ),
+    Scenario(
+        "edit_comment", "blog:edit_comment", _comment_path("edit_comment"),
+        method="post", data=lambda t: {"text": "Исправленный комментарий."},
+        writes=True, expected_status=(302,),
+    ),
+    Scenario(
+        "delete_comment_form", "blog:delete_comment",
+        _comment_path("delete_comment"),
+    ),
+    Scenario(
+        "delete_comment", "blog:delete_comment",
+        _comment_path("delete_comment"), method="post", writes=True,
+        expected_status=(302,),
+    ),
+    Scenario("sitemap", "blog:sitemap", lambda t: "/sitemap.xml"),
+    Scenario(
+        "sitemap_posts", "blog:sitemap_chunk",
+        lambda t: "/sitemap-posts-1.xml",
+    ),
+    Scenario("api_posts", "blog:api_posts", lambda t: "/api/posts/"),
+    Scenario(
+        "api_posts_sparse", "blog:api_posts",
+        lambda t: "/api/posts/?fields=id,title,pub_date",
+    ),
+    Scenario(
+        "api_posts_deep_cursor", "blog:api_posts",
+        lambda t: f"/api/posts/?cursor={t.deep_cursor}",
+    ),
+    Scenario(
+        "api_post_detail", "blog:api_post",
+        lambda t: f"/api/posts/{t.post.pk}/",
+    ),
+    Scenario(
+        "api_post_comments", "blog:api_post_comments",
+        lambda t: f"/api/posts/{t.post.pk}/comments/",
+    ),
+    Scenario(
+        "api_category_posts", "blog:api_category_posts",
+        lambda t: f"/api/categories/{t.category.slug}/posts/",
+    ),
+    Scenario(
+        "api_author_posts", "blog:api_author_posts",
+        lambda t: f"/api/authors/{t.owner.username}/posts/",
+    ),
+    Scenario(
+        "api_categories", "blog:api_categories", lambda t: "/api/categories/"
+    ),
+    Scenario(
+        "api_locations", "blog:api_locations", lambda t: "/api/locations/"
+    ),
+    Scenario("about", "pages:about", lambda t: "/pages/about/"),
+    Scenario("rules", "pages:rules", lambda t: "/pages/rules/"),
+]
+
+
+def uncovered_url_names():
+    """Маршруты blog и pages, для которых не задан ни один сценарий."""
+    from blog.urls import app_name as blog_app, urlpatterns as blog_urls
+    from pages.urls import app_name as pages_app, urlpatterns as pages_urls
+
+    names = {f"{blog_app}:{url.name}" for url in blog_urls}
+    names |= {f"{pages_app}:{url.name}" for url in pages_urls}
+    return names - {scenario.url_name for scenario in SCENARIOS}
@@ -0,0 +1,184 @@
+import math
+import platform
+import sqlite3
+import subprocess
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import Client
+
+from benchmarks.django_setup import ROOT_DIR
+from benchmarks.routes import ANONYMOUS, OWNER, VISITOR, find_targets
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def rolled_back(enabled):
+    if not enabled:
+        yield
+        return
+    # Комментарии могут писаться в свою базу: откатываются обе.
+    aliases = {DEFAULT_DB_ALIAS, settings.BLOG_COMMENTS_DATABASE}
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(transaction.atomic(using=alias))
+        yield
+        for alias in aliases:
+            transaction.set_rollback(True, using=alias)
+
+
+def percentile(sorted_values, fraction):
+    """Перцентиль методом ближайшего ранга."""
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _clients(targets):
+    clients = {ANONYMOUS: Client()}
+    for role, user in ((VISITOR, targets.visitor), (OWNER, targets.owner)):
+        clients[role] = Client()
+        clients[role].force_login(user)
+    return clients
+
+
+def _request(client, scenario, targets, path):
+    data = scenario.data(targets) if scenario.data else {}
+    with rolled_back(scenario.writes):
+        response = getattr(client, scenario.method)(path, data)
+        if response.streaming:
+            # Потоковый ответ формируется только при чтении тела.
+            b"".join(response.streaming_content)
+    if response.status_code not in scenario.expected_status:
+        raise RuntimeError(
+            f"{scenario.name}: {path} вернул {response.status_code}"
+        )
+    return response
+
+
+def measure(scenario, client, targets, iterations, warmup, alloc_iterations,
+            cold_cache=False):
+    path = scenario.path(targets)
+    counter = QueryCounter()
+    latencies, queries = [], []
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(counter))
+        for iteration in range(warmup + iterations):
+            if cold_cache:
+                cache.clear()
+            counter.count = 0
+            start = time.perf_counter()
+            _request(client, scenario, targets, path)
+            elapsed = time.perf_counter() - start
+            if iteration >= warmup:
+                latencies.append(elapsed * 1000)
+                queries.append(counter.count)
+
+    # tracemalloc замедляет код, поэтому память меряется отдельным проходом.
+    allocations = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            if cold_cache:
+                cache.clear()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            _request(client, scenario, targets, path)
+            _, peak = tracemalloc.get_traced_memory()
+            allocations.append((peak - before) / 1024)
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "path": path,
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "queries": round(sum(queries) / len(queries), 2),
+        "peak_alloc_kib": (
+            round(sum(allocations) / len(allocations), 1)
+            if allocations else None
+        ),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scenarios, scale, iterations=50, warmup=5, alloc_iterations=5,
+        cold_cache=False, progress=None):
+    from blog.models import Comment, Post
+
+    targets = find_targets()
+    clients = _clients(targets)
+    results = {}
+    for scenario in scenarios:
+        results[scenario.name] = measure(
+            scenario, clients[scenario.role], targets, iterations, warmup,
+            alloc_iterations, cold_cache,
+        )
+        if progress:
+            progress(scenario.name, results[scenario.name])
+    return {
+        "meta": {
+            "scale": scale,
+            "posts": Post.objects.count(),
+            "comments": Comment.objects.count(),
+            "iterations": iterations,
+            "warmup": warmup,
+            "cold_cache": cold_cache,
+            "revision": _git_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """Сравнивает два прогона и возвращает список регрессий.
+
+    Регрессией считается рост p95 больше чем на threshold или рост
+    числа запросов к БД.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {base['p95_ms']} -> {result['p95_ms']} мс"
+            )
+        if result["queries"] > base["queries"]:
+            regressions.append(
+                f"{name}: запросов {base['queries']} -> {result['queries']}"
+            )
+    return regressions
@@ -0,0 +1,79 @@
+import random
+import time
+
+from django.db import connection
+from django.db.models import Q
+
+from benchmarks.runner import percentile
+
+PAGE_SIZE = 10
+
+
+def sample_terms(count, seed_value=0):
+    """Слова из заголовков случайных постов: от частых до редких."""
+    from blog.models import Post
+    from blog.search import search_terms
+
+    rng = random.Random(seed_value)
+    last = Post.objects.order_by("-pk").values_list("pk", flat=True).first()
+    terms = []
+    while last and len(terms) < count:
+        title = (
+            Post.objects.filter(pk__gte=rng.randint(1, last))
+            .values_list("title", flat=True).first()
+        )
+        words = [word for word in search_terms(title or "") if len(word) > 3]
+        if words:
+            terms.append(rng.choice(words))
+    return terms
+
+
+def _fts_page(term):
+    from blog.models import Post
+    from blog.search import search_posts
+
+    found = search_posts(Post.objects.published(), term)
+    return found.count(), list(found[:PAGE_SIZE])
+
+
+def _like_page(term):
+    from blog.models import Post
+
+    found = Post.objects.published().filter(
+        Q(title__icontains=term) | Q(text__icontains=term)
+    ).order_by("-pub_date", "-id")
+    return found.count(), list(found[:PAGE_SIZE])
+
+
+def _timings(function, terms, iterations):
+    latencies, totals = [], []
+    for _ in range(iterations):
+        for term in terms:
+            start = time.perf_counter()
+            total, _ = function(term)
+            latencies.append((time.perf_counter() - start) * 1000)
+            totals.append(total)
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_hits": round(sum(totals) / len(totals), 1),
+    }
+
+
+def compare_search(terms, iterations=3):
+    """Замеряет первую страницу поиска по FTS5 и по LIKE.
+
+    Оба варианта считают число результатов и выбирают страницу, как
+    это делает PostSearchView с Paginator. LIKE ищет подстроку, а FTS5 —
+    префиксы слов, поэтому число найденного немного расходится.
+    """
+    from blog.search import ensure_search_index
+
+    ensure_search_index(connection.alias)
+    return {
+        "terms": terms,
+        "fts5": _timings(_fts_page, terms, iterations),
+        "like": _timings(_like_page, terms, iterations),
+    }
@@ -0,0 +1,24 @@
+from django.core.management import call_command
+
+SCALES = {
+    "1k": 1_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+
+def seed(scale, seed_value=0):
+    """Заполняет пустую базу масштаба scale командой generate_blog_data.
+
+    Фиксированное зерно даёт одинаковые данные при каждом пересоздании
+    базы, поэтому замеры разных ревизий сравнимы.
+    """
+    from blog.models import Comment, Post
+
+    call_command("migrate", verbosity=0)
+    if Post.objects.exists():
+        raise SystemExit(f"База масштаба {scale} уже заполнена.")
+    call_command(
+        "generate_blog_data", posts=SCALES[scale], seed=seed_value
+    )
+    return Post.objects.count(), Comment.objects.count()
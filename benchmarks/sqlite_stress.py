@@ -0,0 +1,140 @@
+"""Конкурентные чтения и записи до и после настройки SQLite.
+
+Писатели отправляют комментарии через CommentCreateView, читатели
+открывают страницу того же поста, поэтому они борются за одни и те же
+строки. Каждая конфигурация работает со своей копией базы в отдельном
+подпроцессе: PRAGMA применяются при открытии соединений, а journal_mode
+сохраняется в самом файле.
+"""
+import json
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.django_setup import database_path
+from benchmarks.runner import percentile
+
+# Прежнее поведение: журнал отката, соединение на запрос, без повторов.
+CONFIGS = {
+    "baseline": {
+        "database": {"CONN_MAX_AGE": 0},
+        "BLOG_SQLITE_PRAGMAS": {"journal_mode": "DELETE"},
+        "BLOG_SQLITE_LOCK_RETRIES": 0,
+    },
+    "tuned": {},
+}
+
+
+def _summary(latencies, errors, seconds):
+    latencies.sort()
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "per_second": round(len(latencies) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99), 2) if latencies else None,
+    }
+
+
+def _worker(deadline, client, request, latencies, errors, lock):
+    from django.db import OperationalError, connections
+
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            ok = request(client).status_code in (200, 302)
+        except OperationalError:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            (latencies if ok else errors).append(elapsed)
+    connections.close_all()
+
+
+def run_workloads(seconds, user, workloads):
+    """Гоняет нагрузки seconds секунд в потоках текущего процесса.
+
+    workloads — кортежи (вид, число потоков, запрос); каждый поток
+    работает своим клиентом, вошедшим как user.
+    """
+    from django.test import Client
+
+    deadline = time.perf_counter() + seconds
+    lock = threading.Lock()
+    stats = {kind: ([], []) for kind, _, _ in workloads}
+    threads = []
+    for kind, count, request in workloads:
+        for _ in range(count):
+            client = Client()
+            client.force_login(user)
+            threads.append(threading.Thread(
+                target=_worker,
+                args=(deadline, client, request, *stats[kind], lock),
+            ))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        kind: _summary(latencies, len(errors), seconds)
+        for kind, (latencies, errors) in stats.items()
+    }
+
+
+def stress(seconds, writers, readers):
+    """Гоняет писателей и читателей seconds секунд в текущем процессе."""
+    from benchmarks.routes import find_targets
+
+    targets = find_targets()
+    detail = f"/posts/{targets.post.pk}/"
+    comment = f"/posts/{targets.post.pk}/comment/"
+    return run_workloads(seconds, targets.visitor, (
+        ("writes", writers, lambda client: client.post(
+            comment, {"text": "Комментарий для нагрузки."}
+        )),
+        ("reads", readers, lambda client: client.get(detail)),
+    ))
+
+
+def copy_database(source, target):
+    # Резервная копия через backup API согласована и при открытом WAL.
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def compare_sqlite(scale, seconds=10, writers=4, readers=8, progress=None):
+    """Запускает stress() для каждой конфигурации на копии базы."""
+    report = {
+        "meta": {
+            "scale": scale, "seconds": seconds,
+            "writers": writers, "readers": readers,
+        },
+        "configs": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for config in CONFIGS:
+            database = Path(directory) / f"{config}.sqlite3"
+            copy_database(database_path(scale), database)
+            completed = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks", "sqlite",
+                    "--scale", scale, "--config", config,
+                    "--database", str(database),
+                    "--seconds", str(seconds),
+                    "--writers", str(writers), "--readers", str(readers),
+                    "--output", "-",
+                ],
+                capture_output=True, text=True, check=True,
+            )
+            report["configs"][config] = json.loads(completed.stdout)
+            if progress:
+                progress(config, report["configs"][config])
+    return report
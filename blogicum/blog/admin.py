@@ -1,6 +1,12 @@
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.urls import path
 
-from .models import Category, Comment, Location, Post
+from .dumps import export_stream, parse_bound
+from .models import Category, Comment, Location, Post, comments_apart
+from .search import search_posts
 
 
 admin.site.empty_value_display = "Не задано"
@@ -25,12 +31,65 @@ class PostAdmin(admin.ModelAdmin):
     date_hierarchy = "pub_date"
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        # Заголовок и текст ищутся по индексу FTS5, а не сканированием.
+        if not search_term:
+            return queryset, False
+        found = search_posts(Post.objects.all(), search_term)
+        return queryset.filter(
+            Q(pk__in=found.values("pk"))
+            | Q(author__username=search_term.strip())
+        ), False
+
     def get_actions(self, request):
         actions = super().get_actions(request)
         if "delete_selected" in actions:
             del actions["delete_selected"]
         return actions
 
+    def get_urls(self):
+        return [
+            path(
+                "export/",
+                self.admin_site.admin_view(self.export_view),
+                name="blog_post_export",
+            ),
+        ] + super().get_urls()
+
+    def export_view(self, request):
+        """Выгрузка данных блога потоком, как export_blog_data.
+
+        Параметры: format (ndjson или csv), model (можно несколько),
+        since, until, category и gzip.
+        """
+        # В выгрузке есть почта пользователей.
+        if not request.user.is_superuser:
+            raise PermissionDenied
+        params = request.GET
+        export_format = params.get("format", "ndjson")
+        compress = bool(params.get("gzip"))
+        try:
+            chunks = export_stream(
+                export_format,
+                labels=params.getlist("model"),
+                since=parse_bound(params.get("since")),
+                until=parse_bound(params.get("until")),
+                category=params.get("category") or None,
+                compress=compress,
+            )
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+        filename = f"blog.{export_format}" + (".gz" if compress else "")
+        content_type = {
+            "ndjson": "application/x-ndjson",
+            "csv": "text/csv; charset=utf-8",
+        }[export_format]
+        if compress:
+            content_type = "application/gzip"
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
 
 class CommentInline(admin.TabularInline):
     model = Post
@@ -43,6 +102,17 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ("text", "author__username")
     date_hierarchy = "created_at"
     empty_value_display = "-пусто-"
+    # Авторов подтягивает with_author(): из отдельной базы комментариев
+    # JOIN с пользователями невозможен.
+    list_select_related = ()
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_author()
+
+    def get_search_fields(self, request):
+        if comments_apart():
+            return ("text",)
+        return super().get_search_fields(request)
 
 
 class LocationAdmin(admin.ModelAdmin):
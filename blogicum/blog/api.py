@@ -0,0 +1,302 @@
+from urllib.parse import urlencode
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import InvalidPage
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views import View
+
+from blog.constants import (
+    API_MAX_PAGINATE,
+    API_PAGINATE,
+    CURSOR_PARAM,
+    FIELDS_PARAM,
+    LIMIT_PARAM
+)
+from blog.mixins import PostCommentsMixin
+from blog.models import Category, Location, Post, User, comments_apart
+from blog.pagination import CursorPaginator
+
+
+class ApiError(Exception):
+
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+class ApiField:
+    """Поле ответа: столбцы values() и функция, собирающая из них значение."""
+
+    def __init__(self, *lookups, convert=None):
+        self.lookups = lookups
+        self.convert = convert
+
+    def __call__(self, row):
+        values = [row[lookup] for lookup in self.lookups]
+        if self.convert is None:
+            return values[0]
+        return self.convert(*values)
+
+
+def _image_url(name):
+    if not name:
+        return None
+    return Post._meta.get_field("image").storage.url(name)
+
+
+def _location_name(name, is_published):
+    return name if is_published else None
+
+
+POST_FIELDS = {
+    "id": ApiField("id"),
+    "title": ApiField("title"),
+    "text": ApiField("text"),
+    "pub_date": ApiField("pub_date"),
+    "author": ApiField("author__username"),
+    "category": ApiField("category__slug"),
+    "location": ApiField(
+        "location__name", "location__is_published", convert=_location_name
+    ),
+    "image": ApiField("image", convert=_image_url),
+    "comment_count": ApiField("comment_count"),
+}
+
+AUTHOR_LOOKUP = "author__username"
+
+COMMENT_FIELDS = {
+    "id": ApiField("id"),
+    "text": ApiField("text"),
+    "created_at": ApiField("created_at"),
+    "author": ApiField(AUTHOR_LOOKUP),
+}
+
+CATEGORY_FIELDS = {
+    "id": ApiField("id"),
+    "slug": ApiField("slug"),
+    "title": ApiField("title"),
+    "description": ApiField("description"),
+}
+
+LOCATION_FIELDS = {
+    "id": ApiField("id"),
+    "name": ApiField("name"),
+}
+
+
+class ApiView(View):
+    """JSON API только для чтения.
+
+    Строки выбираются через values() и сериализуются без создания
+    моделей. Параметр fields ограничивает и набор полей ответа, и
+    столбцы запроса.
+    """
+
+    fields = {}
+    query_budget = 4
+    db_time_budget = 50
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except Http404 as error:
+            return self.error_response(str(error) or "Не найдено.", 404)
+        except ApiError as error:
+            return self.error_response(error.detail, error.status)
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        raise ApiError("API доступно только для чтения.", 405)
+
+    def error_response(self, detail, status):
+        return self.json_response({"detail": detail}, status=status)
+
+    def json_response(self, data, status=200):
+        return JsonResponse(
+            data, status=status, json_dumps_params={"ensure_ascii": False}
+        )
+
+    def get_field_names(self):
+        requested = self.request.GET.get(FIELDS_PARAM)
+        if not requested:
+            return list(self.fields)
+        names = [
+            name for name in map(str.strip, requested.split(",")) if name
+        ]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(f"Неизвестные поля: {', '.join(unknown)}.")
+        return list(dict.fromkeys(names))
+
+    def get_lookups(self, names, *extra):
+        lookups = {"id", *extra}
+        for name in names:
+            lookups.update(self.fields[name].lookups)
+        # Стабильный порядок столбцов — одинаковый текст SQL.
+        return sorted(lookups)
+
+    def serialize(self, row, names):
+        return {name: self.fields[name](row) for name in names}
+
+
+class ApiListView(ApiView):
+    """Список с keyset-пагинацией по (date_field, id).
+
+    Строки берутся из queryset или из переопределённого get_queryset().
+    """
+
+    queryset = None
+    date_field = "pub_date"
+    descending = True
+
+    def get_queryset(self):
+        if self.queryset is None:
+            raise ImproperlyConfigured(
+                f"{type(self).__name__}: задайте queryset или "
+                "переопределите get_queryset()."
+            )
+        return self.queryset.all()
+
+    def resolve_rows(self, rows):
+        """Дополняет строки страницы значениями, которых нет в values()."""
+        return rows
+
+    def get_limit(self):
+        limit = self.request.GET.get(LIMIT_PARAM)
+        if limit is None:
+            return API_PAGINATE
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ApiError("limit должен быть целым числом.")
+        return min(max(limit, 1), API_MAX_PAGINATE)
+
+    def page_url(self, cursor):
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params[CURSOR_PARAM] = cursor
+        return self.request.build_absolute_uri(
+            f"{self.request.path}?{urlencode(list(params.items()))}"
+        )
+
+    def get(self, request, *args, **kwargs):
+        names = self.get_field_names()
+        paginator = CursorPaginator(
+            self.get_queryset().values(
+                *self.get_lookups(names, self.date_field)
+            ),
+            self.get_limit(),
+            date_field=self.date_field,
+            descending=self.descending,
+        )
+        try:
+            page = paginator.page(request.GET.get(CURSOR_PARAM))
+        except InvalidPage as error:
+            raise ApiError(str(error))
+        return self.json_response({
+            "results": [
+                self.serialize(row, names) for row in self.resolve_rows(page)
+            ],
+            "next": self.page_url(page.next_cursor),
+            "previous": self.page_url(page.previous_cursor),
+        })
+
+
+class PostListApiView(ApiListView):
+    fields = POST_FIELDS
+
+    def get_queryset(self):
+        return Post.objects.published()
+
+
+class CategoryPostListApiView(PostListApiView):
+
+    def get_queryset(self):
+        category = get_object_or_404(
+            Category.objects.only("id"),
+            slug=self.kwargs["category_slug"],
+            is_published=True,
+        )
+        return super().get_queryset().filter(category=category)
+
+
+class AuthorPostListApiView(PostListApiView):
+
+    def get_queryset(self):
+        author = get_object_or_404(
+            User.objects.only("id"), username=self.kwargs["username"]
+        )
+        # Как и в профиле, автор видит свои посты до публикации.
+        queryset = Post.objects.filter(author=author)
+        if author.id != self.request.user.id:
+            queryset = queryset.published()
+        return queryset
+
+
+class PostApiView(PostCommentsMixin, ApiView):
+    fields = POST_FIELDS
+
+    def get(self, request, *args, **kwargs):
+        names = self.get_field_names()
+        row = (
+            self.get_post_queryset()
+            .filter(id=self.kwargs["pk"])
+            .values(*self.get_lookups(names))
+            .first()
+        )
+        if row is None:
+            raise Http404("Публикация не найдена.")
+        return self.json_response(self.serialize(row, names))
+
+
+class PostCommentListApiView(PostCommentsMixin, ApiListView):
+    """Комментарии поста.
+
+    Если комментарии в отдельной базе, имена авторов выбираются вторым
+    запросом к основной базе по author_id страницы.
+    """
+
+    fields = COMMENT_FIELDS
+    date_field = "created_at"
+    descending = False
+
+    def get_lookups(self, names, *extra):
+        lookups = super().get_lookups(names, *extra)
+        if comments_apart() and AUTHOR_LOOKUP in lookups:
+            lookups.remove(AUTHOR_LOOKUP)
+            lookups = sorted({*lookups, "author_id"})
+        return lookups
+
+    def resolve_rows(self, rows):
+        rows = list(rows)
+        if comments_apart() and rows and "author_id" in rows[0]:
+            usernames = dict(
+                User.objects.filter(
+                    pk__in={row["author_id"] for row in rows}
+                ).values_list("pk", "username")
+            )
+            for row in rows:
+                row[AUTHOR_LOOKUP] = usernames.get(row["author_id"])
+        return rows
+
+    def get_queryset(self):
+        post = get_object_or_404(
+            self.get_post_queryset().only("id"), id=self.kwargs["pk"]
+        )
+        return post.comments.all()
+
+
+class CategoryListApiView(ApiListView):
+    queryset = Category.objects.filter(is_published=True)
+    fields = CATEGORY_FIELDS
+    date_field = "created_at"
+    descending = False
+
+
+class LocationListApiView(ApiListView):
+    queryset = Location.objects.filter(is_published=True)
+    fields = LOCATION_FIELDS
+    date_field = "created_at"
+    descending = False
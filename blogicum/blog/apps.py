@@ -5,3 +5,14 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+
+        from blog import signals, sqlite
+
+        post_migrate.connect(
+            signals.ensure_search_index_after_migrate, sender=self
+        )
+        connection_created.connect(sqlite.configure_connection)
@@ -0,0 +1,175 @@
+"""Асинхронные варианты страниц для чтения.
+
+Подключаются в blog.urls вместо синхронных, когда BLOG_ASYNC_VIEWS
+включён (так делает blogicum.asgi). Работа с ORM и рендеринг идут в
+пуле потоков run_db, а независимые запросы выполняются одновременно.
+"""
+import asyncio
+import time
+from functools import update_wrapper
+
+from django.utils.cache import get_conditional_response
+
+from blog import views
+from blog.mixins import is_conditional
+from blog.models import Post
+from blog.utils import run_db
+
+
+class AsyncReadMixin:
+    """Асинхронный GET поверх синхронного представления с валидаторами.
+
+    Ответ собирается в три шага, каждый шаг — группа задач run_db,
+    выполняемых одновременно:
+
+    1. get_lookups() — объекты страницы (категория, автор) вместе с
+       выборкой постов, если запрос не условный, или с узкой выборкой
+       валидаторов get_page_validator_rows(), если условный;
+    2. get_fetches() — выборка страницы, если её ещё не было;
+    3. render() — контекст и шаблон, чтобы ленивые обращения к ORM из
+       шаблона тоже шли в пуле.
+
+    Django 3.2 не умеет асинхронные методы классов-представлений, поэтому
+    as_view() возвращает корутинную функцию.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Проверка initkwargs такая же, как у View.as_view().
+        super().as_view(**initkwargs)
+
+        async def view(request, *args, **kwargs):
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            return await self.adispatch(request, *args, **kwargs)
+
+        view.view_class = cls
+        view.view_initkwargs = initkwargs
+        update_wrapper(view, cls, updated=())
+        update_wrapper(view, cls.dispatch, assigned=())
+        return view
+
+    async def adispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return self.http_method_not_allowed(request, *args, **kwargs)
+        # Ленивый request.user читает сессию из БД, а нужен он и
+        # валидаторам, и выборкам черновиков автора.
+        await self.db(lambda: request.user.is_authenticated)
+        conditional = is_conditional(request)
+        fetches = self.get_fetches()
+        if conditional:
+            rows, *_ = await self.gather(
+                self.get_page_validator_rows, *self.get_lookups()
+            )
+        else:
+            await self.gather(*self.get_lookups(), *fetches)
+            rows = self.get_fetched_validator_rows()
+        etag, last_modified = self.get_validators(
+            rows + self.get_extra_validator_rows()
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            if conditional:
+                await self.gather(*fetches)
+            response = await self.db(self.render)
+        return self.set_validators(response, etag, last_modified)
+
+    def db(self, func):
+        return run_db(self.request, func)
+
+    async def gather(self, *funcs):
+        return await asyncio.gather(*(self.db(func) for func in funcs))
+
+    def get_lookups(self):
+        return []
+
+    def get_fetches(self):
+        """Выборки страницы; по умолчанию — объект DetailView."""
+        return [self.fetch_object]
+
+    def fetch_object(self):
+        self.object = self.get_object()
+
+    def render(self):
+        start = time.perf_counter()
+        response = self.render_to_response(self.get_context_data()).render()
+        self.request.template_render_time = time.perf_counter() - start
+        return response
+
+
+class AsyncListingMixin(AsyncReadMixin):
+    """Лента постов: страница выбирается один раз и отдаётся контексту."""
+
+    def get_fetches(self):
+        return [self.fetch_page]
+
+    def fetch_page(self):
+        self.object_list = queryset = self.get_queryset()
+        self.paginate_queryset(queryset, self.get_paginate_by(queryset))
+
+
+class PostListView(AsyncListingMixin, views.PostListView):
+    pass
+
+
+class CategoryListView(AsyncListingMixin, views.CategoryListView):
+
+    def get_lookups(self):
+        return [self.get_category]
+
+    def get_queryset(self):
+        # Фильтр по slug через JOIN не ждёт поиска самой категории.
+        return (
+            super(views.CategoryListView, self).get_queryset()
+            .select_related("category", "author", "location")
+            .filter(
+                category__slug=self.kwargs["category_slug"],
+                category__is_published=True,
+            )
+            .published()
+        )
+
+
+class UserProfileView(AsyncListingMixin, views.UserProfileView):
+
+    def get_lookups(self):
+        return [self.get_author]
+
+    def get_queryset(self):
+        username = self.kwargs["username"]
+        queryset = super(views.UserProfileView, self).get_queryset().filter(
+            author__username=username
+        ).select_related("author", "category", "location")
+        if username != self.request.user.get_username():
+            queryset = queryset.published()
+        return queryset
+
+
+class PostDetailView(AsyncReadMixin, views.PostDetailView):
+    """Пост и первая страница его комментариев выбираются одновременно."""
+
+    def get_fetches(self):
+        return [*super().get_fetches(), self.fetch_comments]
+
+    def fetch_comments(self):
+        # Видимость поста проверяет fetch_object, а для выборки
+        # комментариев хватает его id.
+        self.comments = self.get_comments_page(Post(pk=self.kwargs["pk"]))
+
+    def get_queryset(self):
+        # Шаблон выводит автора, категорию и место: без select_related это
+        # были бы ленивые запросы уже во время рендеринга. Узкая выборка
+        # валидаторов сбрасывает select_related сама.
+        return super().get_queryset().select_related(
+            "author", "category", "location"
+        )
+
+    def get_page_validator_rows(self):
+        return self.get_validator_rows()
+
+    def get_comments_page(self, post, cursor=None):
+        if cursor is None and getattr(self, "comments", None) is not None:
+            return self.comments
+        return super().get_comments_page(post, cursor)
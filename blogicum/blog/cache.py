@@ -0,0 +1,217 @@
+import math
+from hashlib import md5
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.translation import get_language
+
+from blog.constants import CURSOR_PARAM, PAGE_PARAM
+from blog.models import (
+    Category,
+    Comment,
+    Location,
+    Post,
+    User,
+    visibility_cutoff,
+    visibility_moment
+)
+
+POST_CARD_TEMPLATE = "includes/post_card.html"
+
+PAGE_CACHE_HEADER = "X-Page-Cache"
+HIT, MISS, BYPASS = "HIT", "MISS", "BYPASS"
+
+# Общая область: её сброс инвалидирует все закэшированные страницы.
+ALL_SCOPE = "all"
+INDEX_SCOPE = "index"
+# Общие области страниц одного вида: правка категории, местоположения
+# или пользователя сбрасывает их целиком, не перебирая посты.
+CATEGORIES_SCOPE = "categories"
+PROFILES_SCOPE = "profiles"
+POST_DETAILS_SCOPE = "post_details"
+
+
+def post_card_version(post):
+    """Версия карточки по отметкам изменения всего, что она выводит.
+
+    Правка поста, числа комментариев и копий картинки меняет updated_at
+    поста, правка категории или местоположения — их updated_at, а
+    переименование автора отмечает изменёнными его посты. Поэтому
+    инвалидировать ничего не нужно, а текст поста не хэшируется.
+    """
+    parts = [post.updated_at.timestamp(), post.author_id]
+    for related in (post.category, post.location):
+        parts.append(
+            related and f"{related.pk}-{related.updated_at.timestamp()}"
+        )
+    return ":".join(map(str, parts))
+
+
+def post_card_key(post):
+    return (
+        f"post_card:{post.pk}:{get_language()}:{post_card_version(post)}"
+    )
+
+
+def render_post_cards(posts):
+    """Возвращает HTML карточек, читая кэш одним get_many на страницу."""
+    keys = [post_card_key(post) for post in posts]
+    cached = cache.get_many(keys)
+    missing = {}
+    cards = []
+    for key, post in zip(keys, posts):
+        card = cached.get(key)
+        if card is None:
+            card = render_to_string(POST_CARD_TEMPLATE, {"post": post})
+            missing[key] = card
+        cards.append(card)
+    if missing:
+        cache.set_many(missing, settings.BLOG_POST_CARD_CACHE_TIMEOUT)
+    return cards
+
+
+def category_scopes(slug):
+    return (ALL_SCOPE, CATEGORIES_SCOPE, f"category:{slug}")
+
+
+def profile_scopes(username):
+    return (ALL_SCOPE, PROFILES_SCOPE, f"profile:{username}")
+
+
+def page_scopes(view_name, kwargs):
+    """Области инвалидации, от которых зависит страница."""
+    if view_name == "blog:index":
+        return (ALL_SCOPE, INDEX_SCOPE)
+    if view_name == "blog:category_posts":
+        return category_scopes(kwargs["category_slug"])
+    if view_name in ("blog:post_detail", "blog:post_comments"):
+        return (ALL_SCOPE, POST_DETAILS_SCOPE, f"post:{kwargs['pk']}")
+    if view_name == "blog:profile":
+        return profile_scopes(kwargs["username"])
+    return (ALL_SCOPE, f"view:{view_name}")
+
+
+def _scope_key(scope):
+    return f"page_scope:{scope}"
+
+
+def scope_versions(scopes):
+    """Версии областей кэша страниц; сброс области меняет её версию."""
+    keys = [_scope_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Вытесненную версию нельзя считать нулевой: иначе снова
+            # станут доступны страницы, сохранённые до сброса.
+            cache.add(key, uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def page_cache_key(request):
+    match = request.resolver_match
+    scopes = page_scopes(match.view_name, match.kwargs)
+    versions = ".".join(scope_versions(scopes))
+    # Остальные параметры запроса представления не читают.
+    params = urlencode([
+        (name, request.GET[name])
+        for name in (PAGE_PARAM, CURSOR_PARAM)
+        if name in request.GET
+    ])
+    url = md5(f"{request.path}?{params}".encode()).hexdigest()
+    return f"page:{get_language()}:{url}:{md5(versions.encode()).hexdigest()}"
+
+
+def page_cache_timeout():
+    """TTL страницы, не переживающий ближайшую отложенную публикацию.
+
+    Если запущен run_publication_scheduler, он сам сбрасывает страницы в
+    момент публикации и искать её на каждый промах кэша не нужно.
+    """
+    timeout = settings.BLOG_PAGE_CACHE_TIMEOUT
+    if settings.BLOG_PUBLICATION_SCHEDULER:
+        return timeout
+    upcoming = (
+        Post.objects.visible()
+        .filter(pub_date__gt=visibility_cutoff())
+        .order_by("pub_date")
+        .values_list("pub_date", flat=True)
+        .first()
+    )
+    if upcoming is not None:
+        until_shown = visibility_moment(upcoming) - timezone.now()
+        timeout = min(
+            timeout, max(math.ceil(until_shown.total_seconds()), 1)
+        )
+    return timeout
+
+
+def _bump_scopes(scopes):
+    cache.set_many(
+        {_scope_key(scope): uuid4().hex for scope in scopes}, None
+    )
+
+
+def invalidate_page_cache(*scopes):
+    """Сбрасывает страницы указанных областей; ALL_SCOPE сбрасывает все.
+
+    Сброс повторяется после коммита, чтобы запрос, успевший прочитать
+    старые данные до коммита, не оставил их в кэше.
+    """
+    scopes = set(scopes)
+    if not scopes:
+        return
+    _bump_scopes(scopes)
+    transaction.on_commit(lambda: _bump_scopes(scopes))
+
+
+def post_page_scopes(posts):
+    scopes = set()
+    rows = posts.values_list("pk", "category__slug", "author__username")
+    for pk, category_slug, username in rows:
+        scopes.add(INDEX_SCOPE)
+        scopes.add(f"post:{pk}")
+        scopes.add(f"profile:{username}")
+        if category_slug:
+            scopes.add(f"category:{category_slug}")
+    return scopes
+
+
+def instance_page_scopes(instance):
+    """Страницы, на которых выводятся данные объекта в текущем состоянии БД.
+
+    Категория, местоположение и пользователь выводятся в карточках и на
+    страницах множества постов, поэтому для них сбрасываются общие
+    области страниц, а не область каждого поста.
+    """
+    if isinstance(instance, Post):
+        return post_page_scopes(Post.objects.filter(pk=instance.pk))
+    if isinstance(instance, Comment):
+        return post_page_scopes(Post.objects.filter(pk=instance.post_id))
+    if isinstance(instance, Category):
+        return {
+            f"category:{instance.slug}",
+            INDEX_SCOPE,
+            PROFILES_SCOPE,
+            POST_DETAILS_SCOPE,
+        }
+    if isinstance(instance, Location):
+        return {
+            INDEX_SCOPE,
+            CATEGORIES_SCOPE,
+            PROFILES_SCOPE,
+            POST_DETAILS_SCOPE,
+        }
+    if isinstance(instance, User):
+        return {
+            f"profile:{instance.username}",
+            INDEX_SCOPE,
+            CATEGORIES_SCOPE,
+            POST_DETAILS_SCOPE,
+        }
+    return set()
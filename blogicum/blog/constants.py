@@ -10,3 +10,16 @@ INDEX = reverse_lazy(INDEX_URL)
 
 RESTRICTION = 30
 PAGINATE = 10
+COMMENTS_PAGINATE = 20
+API_PAGINATE = 20
+API_MAX_PAGINATE = 100
+
+# Порция id в списке IN: их число ограничено лимитом переменных SQLite.
+ID_BATCH_SIZE = 500
+
+# Параметры пагинации в строке запроса
+PAGE_PARAM = "page"
+CURSOR_PARAM = "cursor"
+SEARCH_PARAM = "q"
+LIMIT_PARAM = "limit"
+FIELDS_PARAM = "fields"
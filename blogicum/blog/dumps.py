@@ -0,0 +1,300 @@
+import csv
+import gzip
+import json
+import zlib
+from datetime import datetime, time
+from io import StringIO
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from blog.models import (
+    Category,
+    Comment,
+    Location,
+    Post,
+    User,
+    comments_apart,
+    existing_ids,
+    iter_batches
+)
+
+READ_SIZE = 64 * 1024
+# Между объектами верхнего уровня: пробелы, переводы строк NDJSON и
+# скобки с запятыми JSON-массива.
+SEPARATORS = frozenset(" \t\r\n,[]")
+
+
+def open_dump(path, mode="rt"):
+    """Открывает дамп как текст; файлы .gz распаковываются на лету."""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def iter_records(file, read_size=READ_SIZE):
+    """Объекты дампа по одному, из JSON-массива или из NDJSON.
+
+    Файл читается кусками по read_size символов, а в памяти держится
+    только ещё не разобранный хвост, поэтому размер дампа не важен.
+    Разделители между объектами проверяются нестрого.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    while True:
+        while pos < len(buffer) and buffer[pos] in SEPARATORS:
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                return
+            buffer, pos = file.read(read_size), 0
+            eof = not buffer
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Объект не поместился в буфер целиком.
+            chunk = file.read(read_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield record
+        pos = end
+
+
+# Поля выгрузки по моделям в порядке зависимостей, в котором их читает
+# import_blog_data. Пароли и права пользователей не выгружаются.
+EXPORT_FIELDS = {
+    "auth.user": (
+        "username", "first_name", "last_name", "email", "is_active",
+        "date_joined",
+    ),
+    "blog.category": (
+        "title", "description", "slug", "is_published", "created_at",
+    ),
+    "blog.location": ("name", "is_published", "created_at"),
+    "blog.post": (
+        "title", "text", "pub_date", "author", "category", "location",
+        "image", "image_info", "is_published", "created_at",
+    ),
+    "blog.comment": ("text", "post", "author", "is_published", "created_at"),
+}
+EXPORT_FORMATS = ("ndjson", "csv")
+CHUNK_SIZE = 2_000
+WRITE_SIZE = 64 * 1024
+
+
+class CrossDatabaseRows:
+    """Выборка, строки которой отбираются по ссылкам в другую базу.
+
+    JOIN и подзапросы между базами невозможны, поэтому строки читаются
+    порциями по pk, а keep(rows) оставляет из порции нужные, проверяя
+    её ссылки отдельным запросом.
+    """
+
+    def __init__(self, queryset, keep):
+        self.queryset = queryset
+        self.keep = keep
+
+
+def _split_querysets(posts, filtered):
+    # Комментарии в отдельной базе: их ссылки на посты и авторов
+    # проверяются порциями, без длинных списков id в IN.
+    post_column = 1 + EXPORT_FIELDS["blog.comment"].index("post")
+
+    def keep_comments(rows, column=post_column):
+        if not filtered:
+            return rows
+        selected = existing_ids(posts, {row[column] for row in rows})
+        return [row for row in rows if row[column] in selected]
+
+    comment_authors = None
+
+    def keep_users(rows):
+        nonlocal comment_authors
+        if comment_authors is None:
+            # Только id авторов, поэтому множество не больше числа
+            # пользователей.
+            links = iter_batches(Comment.objects.all(), ("post", "author"))
+            comment_authors = {
+                author
+                for batch in links
+                for _, _, author in keep_comments(batch, column=1)
+            }
+        post_authors = set(
+            posts.filter(author__in=[row[0] for row in rows])
+            .values_list("author", flat=True)
+        )
+        return [
+            row for row in rows
+            if row[0] in post_authors or row[0] in comment_authors
+        ]
+
+    return (
+        CrossDatabaseRows(User.objects.all(), keep_users),
+        CrossDatabaseRows(Comment.objects.all(), keep_comments),
+    )
+
+
+def export_querysets(since=None, until=None, category=None):
+    """Выборки для выгрузки.
+
+    Посты отбираются по pub_date и slug категории, остальные модели —
+    по ссылкам из них: комментарии к этим постам, их авторы, категории
+    и местоположения.
+    """
+    posts = Post.objects.all()
+    if since is not None:
+        posts = posts.filter(pub_date__gte=since)
+    if until is not None:
+        posts = posts.filter(pub_date__lt=until)
+    if category is not None:
+        posts = posts.filter(category__slug=category)
+    if comments_apart():
+        filtered = any(
+            bound is not None for bound in (since, until, category)
+        )
+        users, comments = _split_querysets(posts, filtered)
+    else:
+        comments = Comment.objects.filter(post__in=posts.values("pk"))
+        users = User.objects.filter(
+            Q(pk__in=posts.values("author"))
+            | Q(pk__in=comments.values("author"))
+        )
+    return {
+        "auth.user": users,
+        "blog.category": Category.objects.filter(
+            pk__in=posts.values("category")
+        ),
+        "blog.location": Location.objects.filter(
+            pk__in=posts.values("location")
+        ),
+        "blog.post": posts,
+        "blog.comment": comments,
+    }
+
+
+def iter_rows(label, queryset, chunk_size=CHUNK_SIZE):
+    """Кортежи (pk, поля) кусками по chunk_size строк, без моделей."""
+    keep = None
+    if isinstance(queryset, CrossDatabaseRows):
+        queryset, keep = queryset.queryset, queryset.keep
+    opts = queryset.model._meta
+    columns = [opts.get_field(name).attname for name in EXPORT_FIELDS[label]]
+    if keep is not None:
+        return (
+            row
+            for rows in iter_batches(queryset, columns)
+            for row in keep(rows)
+        )
+    return (
+        queryset.order_by("pk")
+        .values_list("pk", *columns)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def ndjson_lines(querysets, chunk_size=CHUNK_SIZE):
+    """Строки NDJSON с записями в формате dumpdata."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for label, queryset in querysets.items():
+        names = EXPORT_FIELDS[label]
+        for pk, *values in iter_rows(label, queryset, chunk_size):
+            yield encoder.encode({
+                "model": label, "pk": pk, "fields": dict(zip(names, values))
+            }) + "\n"
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def csv_lines(label, queryset, chunk_size=CHUNK_SIZE):
+    """Строки CSV одной модели, первая — заголовок."""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(("id", *EXPORT_FIELDS[label]))
+    for row in iter_rows(label, queryset, chunk_size):
+        writer.writerow([_csv_value(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def encode_chunks(lines, compress=False, write_size=WRITE_SIZE):
+    """Байты для записи: строки склеиваются в куски по write_size.
+
+    При compress куски сжимаются в gzip на лету.
+    """
+    compressor = None
+    if compress:
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    pending, size = [], 0
+    for line in lines:
+        data = line.encode("utf-8")
+        pending.append(data)
+        size += len(data)
+        if size < write_size:
+            continue
+        chunk = b"".join(pending)
+        pending, size = [], 0
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    chunk = b"".join(pending)
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def parse_bound(value):
+    """Граница диапазона: дата или дата и время в ISO 8601."""
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Некорректная дата: {value}")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def export_stream(export_format, labels=None, since=None, until=None,
+                  category=None, compress=False, chunk_size=CHUNK_SIZE):
+    """Генератор байтов выгрузки.
+
+    NDJSON выгружает модели labels (по умолчанию все) в порядке
+    зависимостей, CSV — ровно одну модель.
+    """
+    querysets = export_querysets(since, until, category)
+    labels = labels or list(EXPORT_FIELDS)
+    unknown = set(labels) - set(EXPORT_FIELDS)
+    if unknown:
+        raise ValueError(f"Неизвестные модели: {', '.join(sorted(unknown))}")
+    if export_format == "csv":
+        if len(labels) != 1:
+            raise ValueError("В CSV выгружается ровно одна модель.")
+        lines = csv_lines(labels[0], querysets[labels[0]], chunk_size)
+    elif export_format == "ndjson":
+        lines = ndjson_lines(
+            {label: querysets[label] for label in EXPORT_FIELDS
+             if label in labels},
+            chunk_size,
+        )
+    else:
+        raise ValueError(f"Неизвестный формат: {export_format}")
+    return encode_chunks(lines, compress)
@@ -0,0 +1,297 @@
+import time
+from hashlib import md5
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.db.models.functions import Greatest
+from django.http import (
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse
+)
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date, quote_etag
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+from django.views import View
+
+from blog.cache import (
+    ALL_SCOPE,
+    INDEX_SCOPE,
+    category_scopes,
+    profile_scopes,
+    scope_versions
+)
+from blog.models import Category, Post, User
+
+# Только то, что выводит лента: ни модели, ни связанные объекты
+# целиком не загружаются.
+FEED_FIELDS = (
+    "id",
+    "title",
+    "text",
+    "pub_date",
+    "updated_at",
+    "author__username",
+    "category__title",
+)
+DESCRIPTION_WORDS = 50
+
+
+class StreamingFeedMixin:
+    """Генератор ленты, отдающий XML по частям: шапку, затем по записи.
+
+    Дата обновления ленты передаётся заранее, потому что записи читаются
+    из итератора уже во время отправки ответа.
+    """
+
+    def __init__(self, *args, latest=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latest = latest
+
+    def latest_post_date(self):
+        return self.latest or super().latest_post_date()
+
+    def build_item(self, **kwargs):
+        # add_item() приводит значения к виду, который ждут
+        # add_item_elements(); сам список записей не нужен.
+        self.add_item(**kwargs)
+        return self.items.pop()
+
+    def stream(self, items):
+        buffer = StringIO()
+        handler = SimplerXMLGenerator(buffer, settings.DEFAULT_CHARSET)
+
+        def flush():
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        handler.startDocument()
+        self.start_root(handler)
+        self.add_root_elements(handler)
+        yield flush()
+        for item in items:
+            handler.startElement(self.item_tag, self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_tag)
+            yield flush()
+        self.end_root(handler)
+        yield flush()
+
+
+class StreamingRssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    item_tag = "item"
+
+    def start_root(self, handler):
+        handler.startElement("rss", self.rss_attributes())
+        handler.startElement("channel", self.root_attributes())
+
+    def end_root(self, handler):
+        handler.endElement("channel")
+        handler.endElement("rss")
+
+
+class StreamingAtomFeed(StreamingFeedMixin, Atom1Feed):
+    item_tag = "entry"
+
+    def start_root(self, handler):
+        handler.startElement("feed", self.root_attributes())
+
+    def end_root(self, handler):
+        handler.endElement("feed")
+
+
+FEED_FORMATS = {
+    "rss": StreamingRssFeed,
+    "atom": StreamingAtomFeed,
+}
+
+
+class PostFeedView(View):
+    """RSS- и Atom-лента опубликованных постов.
+
+    Ответ кэшируется целиком по ключу из самой поздней даты публикации
+    или правки среди записей ленты и версий областей кэша страниц:
+    запланированный пост или правка меняют первую, правка категории или
+    автора — вторые. По тому же ключу считается ETag, так что 304
+    обходится одним запросом к базе.
+    """
+
+    title = "Блогикум"
+    description = "Новые публикации"
+    query_budget = 4
+    db_time_budget = 50
+
+    def get_object(self):
+        return None
+
+    def get_queryset(self):
+        return Post.objects.published()
+
+    def get_scopes(self):
+        return (ALL_SCOPE, INDEX_SCOPE)
+
+    def get_link(self):
+        return reverse("blog:index")
+
+    def get_title(self):
+        return self.title
+
+    def get(self, request, *args, feed_format, **kwargs):
+        feed_class = FEED_FORMATS.get(feed_format)
+        if feed_class is None:
+            raise Http404("Неизвестный формат ленты.")
+        self.object = self.get_object()
+        queryset = self.get_queryset().order_by("-pub_date", "-id")
+        latest = queryset[:settings.BLOG_FEED_SIZE].aggregate(
+            latest=Max(Greatest("pub_date", "updated_at"))
+        )["latest"]
+        key = self.cache_key(feed_format, latest)
+        etag = quote_etag(md5(key.encode()).hexdigest())
+        last_modified = self.last_modified(key, latest)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            content = cache.get(key)
+            if content is not None:
+                response = HttpResponse(
+                    content, content_type=feed_class.content_type
+                )
+            else:
+                feed = self.get_feed(feed_class, latest)
+                rows = queryset.values(*FEED_FIELDS)[:settings.BLOG_FEED_SIZE]
+                response = StreamingHttpResponse(
+                    self.stream_and_cache(
+                        feed, (self.get_item(feed, row) for row in rows), key
+                    ),
+                    content_type=feed_class.content_type,
+                )
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def last_modified(self, key, latest):
+        """Last-Modified версии ленты key, не отстающий от выданных раньше.
+
+        Снятие поста с публикации или правка категории меняют ETag, но
+        не даты оставшихся записей. Тогда версия датируется моментом,
+        когда сервер впервые её увидел, иначе клиент с одним
+        If-Modified-Since получил бы 304 на устаревшую ленту.
+        """
+        if latest is None:
+            return None
+        stamp_key = f"{key}:modified"
+        stamp = cache.get(stamp_key)
+        if stamp is None:
+            issued_key = "feed_modified:" + md5(
+                f"{self.request.get_host()}{self.request.path}".encode()
+            ).hexdigest()
+            issued = cache.get(issued_key, 0)
+            stamp = int(latest.timestamp())
+            if stamp <= issued:
+                stamp = max(int(time.time()), issued + 1)
+            cache.set(issued_key, max(stamp, issued), None)
+            cache.add(stamp_key, stamp, None)
+            stamp = cache.get(stamp_key, stamp)
+        return stamp
+
+    def cache_key(self, feed_format, latest):
+        versions = ".".join(scope_versions(self.get_scopes()))
+        parts = (
+            self.request.get_host(),
+            self.request.path,
+            latest and latest.isoformat(),
+            versions,
+        )
+        digest = md5(repr(parts).encode()).hexdigest()
+        return f"feed:{feed_format}:{digest}"
+
+    def stream_and_cache(self, feed, items, key):
+        chunks = []
+        for chunk in feed.stream(items):
+            chunks.append(chunk)
+            yield chunk
+        cache.set(key, "".join(chunks), settings.BLOG_FEED_CACHE_TIMEOUT)
+
+    def get_feed(self, feed_class, latest):
+        link = self.request.build_absolute_uri(self.get_link())
+        return feed_class(
+            title=self.get_title(),
+            link=link,
+            description=self.description,
+            language="ru",
+            feed_url=self.request.build_absolute_uri(),
+            feed_guid=link,
+            latest=latest,
+        )
+
+    def get_item(self, feed, row):
+        link = self.request.build_absolute_uri(
+            reverse("blog:post_detail", args=[row["id"]])
+        )
+        category = row["category__title"]
+        return feed.build_item(
+            title=row["title"],
+            link=link,
+            description=Truncator(row["text"]).words(DESCRIPTION_WORDS),
+            author_name=row["author__username"],
+            author_link=self.request.build_absolute_uri(
+                reverse("blog:profile", args=[row["author__username"]])
+            ),
+            pubdate=row["pub_date"],
+            updateddate=row["updated_at"],
+            unique_id=link,
+            categories=[category] if category else None,
+        )
+
+
+class CategoryFeedView(PostFeedView):
+
+    def get_object(self):
+        return get_object_or_404(
+            Category.objects.only("id", "slug", "title"),
+            slug=self.kwargs["category_slug"],
+            is_published=True,
+        )
+
+    def get_queryset(self):
+        return super().get_queryset().filter(category=self.object)
+
+    def get_scopes(self):
+        return category_scopes(self.object.slug)
+
+    def get_link(self):
+        return reverse("blog:category_posts", args=[self.object.slug])
+
+    def get_title(self):
+        return f"{self.title}: {self.object.title}"
+
+
+class AuthorFeedView(PostFeedView):
+
+    def get_object(self):
+        return get_object_or_404(
+            User.objects.only("id", "username"),
+            username=self.kwargs["username"],
+        )
+
+    def get_queryset(self):
+        return super().get_queryset().filter(author=self.object)
+
+    def get_scopes(self):
+        return profile_scopes(self.object.username)
+
+    def get_link(self):
+        return reverse("blog:profile", args=[self.object.username])
+
+    def get_title(self):
+        return f"{self.title}: {self.object.username}"
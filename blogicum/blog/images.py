@@ -0,0 +1,158 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from blog.cache import invalidate_page_cache, post_page_scopes
+from blog.models import Post, StoredFile
+
+logger = logging.getLogger("blog.images")
+
+VARIANTS_DIR = "variants"
+JPEG_QUALITY = 85
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BLOG_IMAGE_WORKERS,
+            thread_name_prefix="image-variants",
+        )
+    return _executor
+
+
+def variant_name(image_name, width, extension):
+    stem = PurePosixPath(image_name).stem
+    return f"{VARIANTS_DIR}/{stem}_{width}w.{extension}"
+
+
+def _has_alpha(image):
+    return "A" in image.getbands() or "transparency" in image.info
+
+
+def render_variants(file):
+    """Возвращает размеры оригинала и уменьшенные копии картинки.
+
+    Копии строятся только для ширин из BLOG_IMAGE_VARIANT_WIDTHS, которые
+    меньше оригинала: (ширина, высота, содержимое, расширение).
+    """
+    with Image.open(file) as image:
+        # Размеры берутся с учётом EXIF-поворота, как их покажет браузер.
+        transposed = image.getexif().get(0x0112, 1) in (5, 6, 7, 8)
+        width, height = image.size
+        if transposed:
+            width, height = height, width
+        widths = sorted(
+            w for w in settings.BLOG_IMAGE_VARIANT_WIDTHS if w < width
+        )
+        if not widths:
+            return width, height, []
+        # JPEG декодируется сразу в уменьшенном виде, если это возможно.
+        draft_size = (widths[-1], round(height * widths[-1] / width))
+        image.draft("RGB", draft_size[::-1] if transposed else draft_size)
+        image = ImageOps.exif_transpose(image)
+        if _has_alpha(image):
+            image, fmt, extension = image.convert("RGBA"), "PNG", "png"
+            options = {"optimize": True}
+        else:
+            image, fmt, extension = image.convert("RGB"), "JPEG", "jpg"
+            options = {"quality": JPEG_QUALITY, "optimize": True}
+        variants = []
+        for target in widths:
+            copy = image.resize(
+                (target, max(round(height * target / width), 1)),
+                Image.Resampling.LANCZOS,
+            )
+            buffer = BytesIO()
+            copy.save(buffer, fmt, **options)
+            variants.append(
+                (copy.width, copy.height, buffer.getvalue(), extension)
+            )
+    return width, height, variants
+
+
+def build_image_variants(post_id):
+    """Строит копии картинки поста и сохраняет их в модели.
+
+    Если картинку успели заменить, пока строились копии, результат
+    отбрасывается. Возвращает True, если модель обновлена.
+    """
+    post = (
+        Post.objects.filter(pk=post_id).only("id", "image", "image_info")
+        .first()
+    )
+    if post is None or not post.image:
+        return False
+    name = post.image.name
+    storage = post.image.storage
+    with storage.open(name) as file:
+        width, height, variants = render_variants(file)
+    stored = []
+    for v_width, v_height, content, extension in variants:
+        target = variant_name(name, v_width, extension)
+        if storage.exists(target):
+            storage.delete(target)
+        stored.append({
+            "name": storage.save(target, ContentFile(content)),
+            "width": v_width,
+            "height": v_height,
+        })
+    updated = Post.objects.filter(pk=post_id, image=name).update(
+        image_info={"width": width, "height": height, "variants": stored},
+        updated_at=timezone.now(),
+    )
+    names = [variant["name"] for variant in stored]
+    if not updated:
+        # Снимаются и заявки этой загрузки: копии никому не нужны, если на
+        # то же содержимое нет других ссылок.
+        StoredFile.objects.acquire(names)
+        StoredFile.objects.release(names, storage)
+        return False
+    StoredFile.objects.acquire(names)
+    StoredFile.objects.release(
+        [variant["name"] for variant in post.image_variants], storage
+    )
+    # Карточки сменят версию сами, а страницы нужно сбросить.
+    invalidate_page_cache(*post_page_scopes(Post.objects.filter(pk=post_id)))
+    return True
+
+
+def build_image_variants_logged(post_id):
+    """Вариант build_image_variants, который пишет ошибку в лог."""
+    try:
+        return build_image_variants(post_id)
+    except Exception:
+        logger.exception("Не удалось построить копии картинки поста %s",
+                         post_id)
+        return False
+
+
+def build_image_variants_in_thread(post_id):
+    try:
+        return build_image_variants_logged(post_id)
+    finally:
+        # У каждого рабочего потока своё соединение, и его никто не закроет.
+        connections.close_all()
+
+
+def schedule_image_variants(post):
+    """Ставит построение копий в очередь после коммита транзакции.
+
+    При BLOG_IMAGE_VARIANTS_IN_BACKGROUND = False копии строятся сразу.
+    """
+    if not settings.BLOG_IMAGE_VARIANTS_IN_BACKGROUND:
+        build_image_variants(post.pk)
+        return
+    post_id = post.pk
+    transaction.on_commit(
+        lambda: get_executor().submit(build_image_variants_in_thread, post_id)
+    )
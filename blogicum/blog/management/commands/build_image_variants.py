@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.images import (
+    build_image_variants_in_thread,
+    build_image_variants_logged
+)
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит уменьшенные копии картинок публикаций, у которых их ещё '
+        'нет, например для картинок, загруженных до появления копий.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить копии для всех публикаций с картинкой.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.BLOG_IMAGE_WORKERS,
+            help='Число потоков; при 1 копии строятся в текущем потоке.',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.exclude(image='')
+        if not options['all']:
+            queryset = queryset.filter(image_info__width__isnull=True)
+        post_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+        if options['workers'] <= 1:
+            built = sum(map(build_image_variants_logged, post_ids))
+        else:
+            with ThreadPoolExecutor(options['workers']) as executor:
+                built = sum(
+                    executor.map(build_image_variants_in_thread, post_ids)
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {built} из {len(post_ids)}'
+        ))
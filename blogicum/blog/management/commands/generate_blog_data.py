@@ -0,0 +1,288 @@
+import random
+import time
+from datetime import timedelta
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from blog.models import (
+    Category,
+    Comment,
+    Location,
+    Post,
+    StoredFile,
+    User,
+    visibility_horizon
+)
+from blog.utils import bulk_insert, next_id
+
+SENTENCE_POOL = 5_000
+IMAGE_SIZE = (1280, 960)
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует пользователей, категории, местоположения, посты и '
+        'комментарии пакетными bulk_create для нагрузочных замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument(
+            '--users', type=int,
+            help='По умолчанию один пользователь на 50 постов.',
+        )
+        parser.add_argument(
+            '--categories', type=int,
+            help='По умолчанию одна категория на 2000 постов.',
+        )
+        parser.add_argument('--locations', type=int, default=50)
+        parser.add_argument(
+            '--comments-per-post', type=float, default=5.0,
+            help='Среднее число комментариев на пост.',
+        )
+        parser.add_argument(
+            '--comment-tail', type=float, default=1.5,
+            help=(
+                'Параметр формы распределения Парето для числа '
+                'комментариев, больше 1: чем ближе к 1, тем тяжелее '
+                'хвост. 0 — равномерное распределение.'
+            ),
+        )
+        parser.add_argument(
+            '--max-comments-per-post', type=int, default=10_000
+        )
+        parser.add_argument('--unpublished-share', type=float, default=0.03)
+        parser.add_argument('--future-share', type=float, default=0.02)
+        parser.add_argument(
+            '--unpublished-category-share', type=float, default=0.1
+        )
+        parser.add_argument(
+            '--days', type=int, default=3 * 365,
+            help='Глубина разброса pub_date в прошлое, дней.',
+        )
+        parser.add_argument(
+            '--image-share', type=float, default=0.0,
+            help='Доля постов с картинкой.',
+        )
+        parser.add_argument(
+            '--image-pool', type=int, default=20,
+            help='Сколько разных картинок сгенерировать для постов.',
+        )
+        parser.add_argument(
+            '--password',
+            help='Пароль для всех пользователей; без него вход невозможен.',
+        )
+        parser.add_argument('--locale', default='ru_RU')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        posts_total = options['posts']
+        if posts_total < 1:
+            raise CommandError('Нужен хотя бы один пост.')
+        if options['comment_tail'] != 0 and options['comment_tail'] <= 1:
+            # При tail <= 1 у Парето нет среднего, и --comments-per-post
+            # было бы не соблюсти.
+            raise CommandError(
+                '--comment-tail должен быть больше 1 или равен 0.'
+            )
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.faker = Faker(options['locale'])
+        self.faker.seed_instance(options['seed'])
+        self.sentences = [
+            self.faker.sentence() for _ in range(SENTENCE_POOL)
+        ]
+        self.now = timezone.now()
+        self.horizon = visibility_horizon(self.now)
+        self.started = time.monotonic()
+
+        users = self.create_users(
+            options['users'] or max(posts_total // 50, 10)
+        )
+        categories = self.create_categories(
+            options['categories'] or max(posts_total // 2_000, 5)
+        )
+        locations = self.create_locations(options['locations'])
+        images = self.create_images()
+        posts, comments = self.create_posts(
+            posts_total, users, categories, locations, images
+        )
+        self.report('Готово', posts + comments)
+
+    def report(self, stage, rows):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        self.stdout.write(
+            f'{stage}: {rows} строк за {elapsed:.1f} с '
+            f'({rows / elapsed:,.0f} строк/с)'
+        )
+
+    def texts(self, low, high):
+        return ' '.join(
+            self.rng.choices(self.sentences, k=self.rng.randint(low, high))
+        )
+
+    def bulk_create(self, model, objects):
+        with transaction.atomic():
+            model.objects.bulk_create(
+                objects, batch_size=self.options['batch_size']
+            )
+
+    def create_users(self, count):
+        first_id = next_id(User)
+        password = make_password(self.options['password'])
+        users = [
+            User(
+                id=user_id,
+                username=f'{self.faker.user_name()}{user_id}'[:150],
+                first_name=self.faker.first_name(),
+                last_name=self.faker.last_name(),
+                email=self.faker.email(),
+                password=password,
+            )
+            for user_id in range(first_id, first_id + count)
+        ]
+        self.bulk_create(User, users)
+        self.report('Пользователи', count)
+        return [user.pk for user in users]
+
+    def create_categories(self, count):
+        first_id = next_id(Category)
+        share = self.options['unpublished_category_share']
+        categories = [
+            Category(
+                id=category_id,
+                title=self.faker.sentence(nb_words=3)[:256],
+                description=self.texts(1, 3),
+                slug=f'category-{category_id}',
+                is_published=self.rng.random() >= share,
+            )
+            for category_id in range(first_id, first_id + count)
+        ]
+        self.bulk_create(Category, categories)
+        self.report('Категории', count)
+        return [
+            (category.pk, category.is_published) for category in categories
+        ]
+
+    def create_locations(self, count):
+        first_id = next_id(Location)
+        locations = [
+            Location(
+                id=location_id,
+                name=self.faker.city(),
+                is_published=self.rng.random() >= 0.1,
+            )
+            for location_id in range(first_id, first_id + count)
+        ]
+        self.bulk_create(Location, locations)
+        return [location.pk for location in locations]
+
+    def create_images(self):
+        if not self.options['image_share']:
+            return []
+        field = Post._meta.get_field('image')
+        names = []
+        for number in range(self.options['image_pool']):
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            buffer = BytesIO()
+            Image.new('RGB', IMAGE_SIZE, color).save(buffer, format='JPEG')
+            names.append(field.storage.save(
+                field.generate_filename(None, f'generated_{number}.jpg'),
+                ContentFile(buffer.getvalue())
+            ))
+        self.report('Картинки', len(names))
+        return names
+
+    def comment_count(self):
+        mean = self.options['comments_per_post']
+        tail = self.options['comment_tail']
+        if not tail:
+            count = self.rng.randint(0, round(2 * mean))
+        else:
+            # Среднее (X - 1) для Парето с xm = 1 равно 1 / (tail - 1).
+            count = round(
+                (self.rng.paretovariate(tail) - 1) * mean * (tail - 1)
+            )
+        return min(count, self.options['max_comments_per_post'])
+
+    def pub_date(self):
+        if self.rng.random() < self.options['future_share']:
+            return self.now + timedelta(
+                seconds=self.rng.randrange(1, 30 * 24 * 60 * 60)
+            )
+        # Свежих постов больше, чем старых.
+        age = self.options['days'] * 24 * 60 * 60 * self.rng.random() ** 2
+        return self.now - timedelta(seconds=age)
+
+    def create_posts(self, total, users, categories, locations, images):
+        post_id = next_id(Post)
+        comment_id = next_id(Comment)
+        unpublished_share = self.options['unpublished_share']
+        image_share = self.options['image_share']
+        batch_size = self.options['batch_size']
+        created_posts = created_comments = 0
+        while created_posts < total:
+            posts, comments = [], []
+            for _ in range(min(batch_size, total - created_posts)):
+                category_id, category_published = self.rng.choice(categories)
+                pub_date = self.pub_date()
+                is_published = self.rng.random() >= unpublished_share
+                comment_count = self.comment_count()
+                posts.append(Post(
+                    id=post_id,
+                    title=self.faker.sentence(nb_words=6)[:256],
+                    text=self.texts(2, 25),
+                    pub_date=pub_date,
+                    created_at=min(pub_date, self.now),
+                    author_id=self.rng.choice(users),
+                    category_id=category_id,
+                    location_id=(
+                        self.rng.choice(locations)
+                        if locations and self.rng.random() < 0.7 else None
+                    ),
+                    image=(
+                        self.rng.choice(images)
+                        if images and self.rng.random() < image_share
+                        else ''
+                    ),
+                    is_published=is_published,
+                    is_visible=(
+                        is_published and category_published
+                        and pub_date <= self.horizon
+                    ),
+                    comment_count=comment_count,
+                ))
+                start = min(pub_date, self.now)
+                span = max((self.now - start).total_seconds(), 1)
+                for _ in range(comment_count):
+                    comments.append(Comment(
+                        id=comment_id,
+                        post_id=post_id,
+                        author_id=self.rng.choice(users),
+                        text=self.texts(1, 4),
+                        created_at=start + timedelta(
+                            seconds=span * self.rng.random() ** 3
+                        ),
+                    ))
+                    comment_id += 1
+                post_id += 1
+            with transaction.atomic():
+                bulk_insert(Post, posts, batch_size)
+                bulk_insert(Comment, comments, batch_size)
+                StoredFile.objects.acquire(post.image.name for post in posts)
+            created_posts += len(posts)
+            created_comments += len(comments)
+            self.report(
+                f'Посты {created_posts}/{total}, '
+                f'комментарии {created_comments}',
+                created_posts + created_comments,
+            )
+        return created_posts, created_comments
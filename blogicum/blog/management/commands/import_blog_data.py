@@ -0,0 +1,237 @@
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.python import Deserializer
+from django.db import connection, router, transaction
+from django.utils import timezone
+from django.utils.text import capfirst
+
+from blog.cache import ALL_SCOPE, invalidate_page_cache
+from blog.constants import ID_BATCH_SIZE
+from blog.dumps import iter_records, open_dump
+from blog.models import (
+    Category,
+    Comment,
+    Location,
+    Post,
+    StoredFile,
+    User,
+    existing_ids
+)
+from blog.utils import bulk_insert, next_id
+
+# Проходы по файлу в порядке зависимостей: каждый следующий ссылается
+# только на уже загруженные модели.
+PASSES = (
+    (User,),
+    (Category, Location),
+    (Post,),
+    (Comment,),
+)
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает дамп в формате dumpdata (JSON или NDJSON, можно .gz) '
+        'пакетными вставками без сигналов. Файл читается потоком по '
+        'разу на каждый уровень зависимостей, первичные ключи выдаются '
+        'заново.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл дампа.')
+        parser.add_argument('--batch-size', type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        self.path = options['path']
+        self.batch_size = options['batch_size']
+        # Пользователей и категории сопоставляем по username и slug, а
+        # посты и комментарии сдвигаем на постоянную величину, чтобы не
+        # хранить соответствие ключей для миллионов строк.
+        self.users = {}
+        self.categories = {}
+        self.locations = {}
+        self.post_offset = next_id(Post) - 1
+        self.comment_offset = next_id(Comment) - 1
+        self.imported = defaultdict(int)
+        self.skipped = defaultdict(int)
+        self.started = time.monotonic()
+        self.now = timezone.now()
+        importers = {
+            User: self.import_users,
+            Category: self.import_categories,
+            Location: self.import_locations,
+            Post: self.import_posts,
+            Comment: self.import_comments,
+        }
+        try:
+            for models in PASSES:
+                for model, records in self.batches(models):
+                    # Комментарии могут жить в своей базе.
+                    using = router.db_for_write(model)
+                    with transaction.atomic(using=using):
+                        importers[model](records)
+                    self.report(model)
+        except (OSError, ValueError, DeserializationError) as error:
+            raise CommandError(f'Не удалось прочитать дамп: {error}')
+        self.finish()
+        total = sum(self.imported.values())
+        skipped = sum(self.skipped.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {total}, пропущено: {skipped}, '
+            f'{self.rate(total)}'
+        ))
+
+    def batches(self, models):
+        labels = {_label(model): model for model in models}
+        pending = defaultdict(list)
+        with open_dump(self.path) as file:
+            for record in iter_records(file):
+                model = labels.get(record.get('model'))
+                if model is None:
+                    continue
+                pending[model].append(record)
+                if len(pending[model]) >= self.batch_size:
+                    yield model, pending.pop(model)
+        yield from pending.items()
+
+    def rate(self, rows):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return f'{elapsed:.1f} с, {rows / elapsed:,.0f} строк/с'
+
+    def report(self, model):
+        total = sum(self.imported.values())
+        self.stdout.write(
+            f'{capfirst(model._meta.verbose_name_plural)}: '
+            f'{self.imported[model]} строк, всего {total}, {self.rate(total)}'
+        )
+
+    def deserialize(self, records):
+        for deserialized in Deserializer(records, ignorenonexistent=True):
+            obj = deserialized.object
+            # Даты создания вставляются как есть, а в дампе их может не
+            # быть.
+            if getattr(obj, 'created_at', False) is None:
+                obj.created_at = self.now
+            yield obj
+
+    def remap(self, mapping, record, field):
+        """Новый id для внешнего ключа из дампа.
+
+        Естественные ключи Deserializer уже нашёл в базе сам.
+        """
+        value = record['fields'].get(field)
+        if value is None or isinstance(value, list):
+            return None, value is not None
+        return mapping.get(value), True
+
+    def import_by_key(self, model, records, key, mapping):
+        objects = list(self.deserialize(records))
+        keys = [getattr(obj, key) for obj in objects]
+        existing = {}
+        # Пакет дампа больше лимита переменных SQLite в одном IN.
+        for start in range(0, len(keys), ID_BATCH_SIZE):
+            existing.update(
+                model.objects.filter(
+                    **{f'{key}__in': keys[start:start + ID_BATCH_SIZE]}
+                ).values_list(key, 'pk')
+            )
+        first_id = next_id(model)
+        new = []
+        for obj in objects:
+            pk = existing.get(getattr(obj, key))
+            if pk is None:
+                pk = existing[getattr(obj, key)] = first_id + len(new)
+                new.append(obj)
+            mapping[obj.pk] = pk
+        for obj in new:
+            obj.pk = mapping[obj.pk]
+        bulk_insert(model, new)
+        self.imported[model] += len(new)
+        self.skipped[model] += len(objects) - len(new)
+
+    def import_users(self, records):
+        self.import_by_key(User, records, 'username', self.users)
+
+    def import_categories(self, records):
+        self.import_by_key(Category, records, 'slug', self.categories)
+
+    def import_locations(self, records):
+        objects = list(self.deserialize(records))
+        first_id = next_id(Location)
+        for number, obj in enumerate(objects):
+            self.locations[obj.pk] = obj.pk = first_id + number
+        bulk_insert(Location, objects)
+        self.imported[Location] += len(objects)
+
+    def import_posts(self, records):
+        posts = []
+        for record, post in zip(records, self.deserialize(records)):
+            author_id, remapped = self.remap(self.users, record, 'author')
+            if remapped:
+                post.author_id = author_id
+            if post.author_id is None:
+                self.skipped[Post] += 1
+                continue
+            category_id, remapped = self.remap(
+                self.categories, record, 'category'
+            )
+            if remapped:
+                post.category_id = category_id
+            location_id, remapped = self.remap(
+                self.locations, record, 'location'
+            )
+            if remapped:
+                post.location_id = location_id
+            post.pk += self.post_offset
+            # Оба поля пересчитываются в finish().
+            post.is_visible = False
+            post.comment_count = 0
+            posts.append(post)
+        bulk_insert(Post, posts)
+        StoredFile.objects.acquire(
+            name for post in posts for name in post.stored_files()
+        )
+        self.imported[Post] += len(posts)
+
+    def import_comments(self, records):
+        comments = []
+        for record, comment in zip(records, self.deserialize(records)):
+            author_id, remapped = self.remap(self.users, record, 'author')
+            if remapped:
+                comment.author_id = author_id
+            if record['fields'].get('post') is not None:
+                comment.post_id += self.post_offset
+            comment.pk += self.comment_offset
+            comments.append(comment)
+        # Пост мог быть пропущен или отсутствовать в дампе.
+        posts = existing_ids(
+            Post.objects.all(), {comment.post_id for comment in comments}
+        )
+        loaded = [
+            comment for comment in comments
+            if comment.author_id is not None and comment.post_id in posts
+        ]
+        bulk_insert(Comment, loaded)
+        self.imported[Comment] += len(loaded)
+        self.skipped[Comment] += len(comments) - len(loaded)
+
+    def finish(self):
+        posts = Post.objects.filter(pk__gt=self.post_offset)
+        with transaction.atomic():
+            posts.recount_comments()
+            posts.refresh_visibility()
+        models = [User, Category, Location, Post, Comment]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+        invalidate_page_cache(ALL_SCOPE)
@@ -0,0 +1,103 @@
+from collections import Counter
+from pathlib import PurePosixPath
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from blog.cache import ALL_SCOPE, invalidate_page_cache
+from blog.models import Post, StoredFile
+from blog.storage import ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки публикаций и их копии в хранилище по хэшу '
+        'содержимого и пересчитывает ссылки на файлы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-originals',
+            action='store_true',
+            help='Не удалять файлы со старыми именами после переноса.',
+        )
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        if not isinstance(field.storage, ContentAddressedStorage):
+            raise CommandError(
+                'BLOG_IMAGE_STORAGE не хранит файлы по хэшу содержимого.'
+            )
+        self.storage = field.storage
+        self.field = field
+        # Старые файлы лежат в том же каталоге, но под обычными именами.
+        self.legacy = FileSystemStorage(
+            location=self.storage.location, base_url=self.storage.base_url
+        )
+        self.renamed = {}
+        self.missing = 0
+        migrated = 0
+        for post in self.posts():
+            image = self.move(post.image.name, image=True)
+            info = dict(post.image_info)
+            if post.image_variants:
+                info['variants'] = [
+                    {**variant, 'name': self.move(variant['name'])}
+                    for variant in post.image_variants
+                ]
+            if image != post.image.name or info != post.image_info:
+                Post.objects.filter(pk=post.pk).update(
+                    image=image, image_info=info, updated_at=timezone.now()
+                )
+                migrated += 1
+        self.rebuild_ref_counts()
+        invalidate_page_cache(ALL_SCOPE)
+        moved = [old for old, new in self.renamed.items() if old != new]
+        if not options['keep_originals']:
+            for name in moved:
+                self.legacy.delete(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено публикаций: {migrated}, файлов: {len(moved)}, '
+            f'не найдено файлов: {self.missing}'
+        ))
+
+    def posts(self):
+        return (
+            Post.objects.exclude(image='')
+            .only('id', 'image', 'image_info')
+            .iterator()
+        )
+
+    def move(self, name, image=False):
+        if name in self.renamed:
+            return self.renamed[name]
+        new = name
+        if not self.storage.is_hashed(name):
+            if self.legacy.exists(name):
+                target = name
+                if image:
+                    target = self.field.generate_filename(
+                        None, PurePosixPath(name).name
+                    )
+                with self.legacy.open(name) as file:
+                    new = self.storage.save(target, file)
+            else:
+                self.missing += 1
+        self.renamed[name] = new
+        return new
+
+    def rebuild_ref_counts(self):
+        counts = Counter()
+        for post in self.posts():
+            counts.update(post.stored_files())
+        with transaction.atomic():
+            StoredFile.objects.all().delete()
+            StoredFile.objects.bulk_create(
+                [
+                    StoredFile(name=name, ref_count=count)
+                    for name, count in counts.items()
+                ],
+                batch_size=1000
+            )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.cache import ALL_SCOPE, invalidate_page_cache, post_page_scopes
+from blog.models import Post, visibility_horizon
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее открывает отложенные публикации, чья дата наступит '
+        'в пределах BLOG_VISIBILITY_LOOKAHEAD. Запускается по расписанию '
+        'чаще, чем длится упреждение, например раз в минуту из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать флаг видимости для всех публикаций.',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        if options['full']:
+            shown, hidden = Post.objects.refresh_visibility(now)
+            invalidate_page_cache(ALL_SCOPE)
+        else:
+            queryset = Post.objects.filter(
+                is_visible=False,
+                is_published=True,
+                category__is_published=True,
+                pub_date__lte=visibility_horizon(now)
+            )
+            # Страницы, сохранённые до открытия флага, не знают об этих
+            # постах и могли получить TTL дольше их даты публикации.
+            scopes = post_page_scopes(queryset)
+            shown, hidden = queryset.refresh_visibility(now)
+            invalidate_page_cache(*scopes)
+        self.stdout.write(
+            self.style.SUCCESS(f'Открыто: {shown}, скрыто: {hidden}')
+        )
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import (
+    Comment,
+    Post,
+    User,
+    comments_apart,
+    existing_ids,
+    iter_batches
+)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает Post.comment_count по таблице комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--purge-orphans', action='store_true',
+            help=(
+                'Сначала удалить комментарии к удалённым постам и от '
+                'удалённых пользователей (нужно при отдельной базе '
+                'комментариев).'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options['purge_orphans']:
+            self.purge_orphans()
+        updated = Post.objects.recount_comments()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано публикаций: {updated}')
+        )
+
+    def purge_orphans(self):
+        if comments_apart():
+            deleted = self.purge_orphans_apart()
+        else:
+            deleted, _ = Comment.objects.exclude(
+                post__in=Post.objects.values('pk'),
+                author__in=User.objects.values('pk'),
+            ).delete()
+        self.stdout.write(f'Удалено осиротевших комментариев: {deleted}')
+
+    def purge_orphans_apart(self):
+        # Подзапросы в другую базу невозможны: ссылки комментариев
+        # проверяются в основной базе порциями.
+        deleted = 0
+        for rows in iter_batches(Comment.objects.all(), ('post', 'author')):
+            posts = existing_ids(Post.objects.all(), {row[1] for row in rows})
+            users = existing_ids(User.objects.all(), {row[2] for row in rows})
+            orphans = [
+                pk for pk, post, author in rows
+                if post not in posts or author not in users
+            ]
+            if orphans:
+                deleted += Comment.objects.filter(pk__in=orphans).delete()[0]
+        return deleted
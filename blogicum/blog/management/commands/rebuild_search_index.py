@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from blog.search import (
+    ensure_search_index,
+    optimize_search_index,
+    rebuild_search_index,
+    uses_fts
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Восстанавливает таблицу и триггеры полнотекстового индекса '
+        'постов и перестраивает его по blog_post.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--optimize',
+            action='store_true',
+            help='После перестройки слить сегменты индекса в один.',
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not uses_fts(using):
+            raise CommandError('Полнотекстовый индекс есть только в SQLite.')
+        # Пропавшие триггеры восстанавливаются вместе с перестройкой.
+        if not ensure_search_index(using):
+            rebuild_search_index(using)
+        if options['optimize']:
+            optimize_search_index(using)
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен.'))
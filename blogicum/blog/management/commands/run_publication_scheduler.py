@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.scheduler import PublicationScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        'Воркер отложенных публикаций: держит очередь ближайших pub_date '
+        'и в момент публикации открывает пост, сбрасывает и заново '
+        'прогревает кэш его лент. Кэш должен быть общим с веб-процессами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window', type=int,
+            help='На сколько секунд вперёд читать очередь.',
+        )
+        parser.add_argument(
+            '--poll', type=int,
+            help='Как часто перечитывать очередь из базы (секунды).',
+        )
+        parser.add_argument(
+            '--warm-host',
+            help='Host, с которым прогреваются страницы лент.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать наступившие публикации и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        scheduler = PublicationScheduler(
+            window=options['window'],
+            poll=options['poll'],
+            warm_host=options['warm_host'],
+        )
+        if options['once']:
+            self.report(scheduler.run_once())
+            return
+        try:
+            while True:
+                published = scheduler.run_once()
+                if published:
+                    self.report(published)
+                time.sleep(scheduler.seconds_until_next(timezone.now()))
+        except KeyboardInterrupt:
+            pass
+
+    def report(self, published):
+        self.stdout.write(self.style.SUCCESS(
+            f'{timezone.localtime():%H:%M:%S} опубликовано: {published}'
+        ))
@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.replicas import replica_lag, sync_replica
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет реплики для чтения снимками основной базы через '
+        'SQLite backup API и печатает их отставание.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Пауза между снимками (секунды).',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Снять реплики один раз и выйти.',
+        )
+        parser.add_argument(
+            '--status', action='store_true',
+            help='Только показать отставание реплик.',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.BLOG_READ_REPLICAS:
+            raise CommandError('Реплики не настроены: BLOG_READ_REPLICAS.')
+        if options['status']:
+            self.report()
+            return
+        interval = options['interval'] or settings.BLOG_REPLICA_SYNC_INTERVAL
+        try:
+            while True:
+                for alias in settings.BLOG_READ_REPLICAS:
+                    start = time.perf_counter()
+                    sync_replica(alias)
+                    self.stdout.write(
+                        f'{alias}: снимок за '
+                        f'{time.perf_counter() - start:.3f} с'
+                    )
+                if options['once']:
+                    return
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+    def report(self):
+        for alias in settings.BLOG_READ_REPLICAS:
+            lag = replica_lag(alias)
+            if lag is None:
+                self.stdout.write(f'{alias}: не синхронизирована')
+            else:
+                self.stdout.write(f'{alias}: отставание {lag:.1f} с')
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import logging
+import threading
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.cache import get_conditional_response
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import parse_http_date_safe
+
+from blog.cache import (
+    BYPASS,
+    HIT,
+    MISS,
+    PAGE_CACHE_HEADER,
+    page_cache_key,
+    page_cache_timeout
+)
+from blog.replicas import choose_replica, current_route, route
+from blog.utils import run_db
+
+logger = logging.getLogger("blog.query_budget")
+
+
+class AnonymousPageCacheMiddleware(MiddlewareMixin):
+    """Кэширует целые страницы для GET-запросов анонимных читателей.
+
+    Кэшируются только представления из BLOG_PAGE_CACHE_VIEWS. Ключ
+    строится по пути, параметрам page/cursor и версиям областей, которые
+    сбрасываются сигналами моделей (см. blog.signals).
+
+    Работает и под ASGI: синхронный middleware заставил бы Django
+    выполнять всю цепочку под ним в одном потоке.
+    """
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.store(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if getattr(request, "page_cache_status", None) == MISS:
+            # page_cache_timeout() обращается к БД.
+            return await run_db(request, self.store, request, response)
+        return self.store(request, response)
+
+    def store(self, request, response):
+        status = getattr(request, "page_cache_status", None)
+        if status == MISS and self.is_cacheable(response):
+            cache.set(
+                request.page_cache_key, response, page_cache_timeout()
+            )
+        if status is not None:
+            response[PAGE_CACHE_HEADER] = status
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        if view_name not in settings.BLOG_PAGE_CACHE_VIEWS:
+            return None
+        if request.method != "GET" or request.user.is_authenticated:
+            request.page_cache_status = BYPASS
+            return None
+        request.page_cache_key = page_cache_key(request)
+        response = cache.get(request.page_cache_key)
+        if response is None:
+            request.page_cache_status = MISS
+            return None
+        request.page_cache_status = HIT
+        # Закэшированная страница хранит ETag и Last-Modified представления.
+        last_modified = response.get("Last-Modified")
+        return get_conditional_response(
+            request,
+            etag=response.get("ETag"),
+            last_modified=last_modified and parse_http_date_safe(
+                last_modified
+            ),
+            response=response,
+        )
+
+    @staticmethod
+    def is_cacheable(response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+        )
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Направляет чтения GET-запросов к страницам блога на реплики.
+
+    Маршрутизируются представления из модулей BLOG_REPLICA_VIEW_MODULES;
+    сами чтения переключает blog.routers.ReplicaRouter. Промах кэша
+    страниц рендерится с основной базы, чтобы в кэш на
+    BLOG_PAGE_CACHE_TIMEOUT не попала страница из отставшей реплики.
+
+    Запрос, который что-то записал, ставит cookie с моментом записи на
+    BLOG_REPLICA_STICKY_SECONDS: пока она жива, пользователь читает
+    только реплики со снимком после этого момента, а без них — основную
+    базу. Выбранная реплика и её отставание попадают в лог
+    QueryBudgetMiddleware (поля replica и replica_lag_s).
+    """
+
+    def __call__(self, request):
+        if not settings.BLOG_READ_REPLICAS:
+            return self.get_response(request)
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with route() as current:
+            response = self.get_response(request)
+        return self.stick(response, current)
+
+    async def __acall__(self, request):
+        with route() as current:
+            response = await self.get_response(request)
+        return self.stick(response, current)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current = current_route()
+        view = getattr(view_func, "view_class", view_func)
+        if (
+            current is None
+            or request.method not in ("GET", "HEAD")
+            or view.__module__ not in settings.BLOG_REPLICA_VIEW_MODULES
+            or getattr(request, "page_cache_status", None) == MISS
+        ):
+            return None
+        wrote_at = request.COOKIES.get(settings.BLOG_REPLICA_STICKY_COOKIE)
+        if wrote_at is not None:
+            try:
+                wrote_at = float(wrote_at)
+            except ValueError:
+                return None
+        current.replica, request.replica_lag = choose_replica(wrote_at)
+        request.db_replica = current.replica
+
+    @staticmethod
+    def stick(response, current):
+        if current.wrote:
+            response.set_cookie(
+                settings.BLOG_REPLICA_STICKY_COOKIE,
+                repr(time.time()),
+                max_age=settings.BLOG_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class QueryRecorder:
+    """Обёртка execute_wrapper, считающая запросы и время в БД."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        # Под ASGI запросы одной страницы идут из нескольких потоков.
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            with self.lock:
+                self.duration += duration
+                self.count += 1
+                self.statements[sql, repr(params)] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values())
+
+
+class QueryBudgetMiddleware(MiddlewareMixin):
+    """Пишет по строке JSON-лога на запрос: число запросов к БД, их время,
+    повторы одинаковых запросов и время рендеринга шаблона.
+
+    Бюджеты объявляются на классах представлений атрибутами query_budget
+    (число запросов) и db_time_budget (мс); превышение пишется уровнем
+    WARNING. Наблюдается доля запросов BLOG_QUERY_BUDGET_SAMPLE_RATE,
+    остальные проходят без обёрток.
+
+    Под ASGI считаются запросы, выполненные через blog.utils.run_db.
+    """
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if random.random() >= settings.BLOG_QUERY_BUDGET_SAMPLE_RATE:
+            return self.get_response(request)
+        request.query_recorder = recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+        self.log(request, response, recorder, total)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= settings.BLOG_QUERY_BUDGET_SAMPLE_RATE:
+            return await self.get_response(request)
+        request.query_recorder = recorder = QueryRecorder()
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        total = time.perf_counter() - start
+        self.log(request, response, recorder, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, "query_recorder"):
+            request.query_budget_view = getattr(
+                view_func, "view_class", view_func
+            )
+
+    def process_template_response(self, request, response):
+        # Асинхронные представления рендерят шаблон сами и замеряют время.
+        if hasattr(request, "query_recorder") and not response.is_rendered:
+            start = time.perf_counter()
+
+            def render_finished(rendered):
+                request.template_render_time = time.perf_counter() - start
+
+            response.add_post_render_callback(render_finished)
+        return response
+
+    def log(self, request, response, recorder, total):
+        view = getattr(request, "query_budget_view", None)
+        db_time_ms = round(recorder.duration * 1000, 2)
+        over_budget = []
+        query_budget = getattr(view, "query_budget", None)
+        if query_budget is not None and recorder.count > query_budget:
+            over_budget.append("queries")
+        db_time_budget = getattr(view, "db_time_budget", None)
+        if db_time_budget is not None and db_time_ms > db_time_budget:
+            over_budget.append("db_time")
+        replica_lag = getattr(request, "replica_lag", None)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": view and f"{view.__module__}.{view.__qualname__}",
+            "status": response.status_code,
+            "queries": recorder.count,
+            "duplicates": recorder.duplicates,
+            "db_ms": db_time_ms,
+            "template_ms": round(
+                getattr(request, "template_render_time", 0) * 1000, 2
+            ),
+            "total_ms": round(total * 1000, 2),
+            "query_budget": query_budget,
+            "db_time_budget": db_time_budget,
+            "over_budget": over_budget,
+            "replica": getattr(request, "db_replica", None),
+            "replica_lag_s": None if replica_lag is None else round(
+                replica_lag, 3
+            ),
+        }
+        logger.log(
+            logging.WARNING if over_budget else logging.INFO,
+            json.dumps(record, ensure_ascii=False),
+        )
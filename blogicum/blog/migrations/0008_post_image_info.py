@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_info',
+            field=models.JSONField(default=dict, editable=False, help_text='Размеры оригинала и уменьшенные копии по возрастанию ширины: {"width", "height", "variants": [{"name", "width", "height"}]}. Заполняется в фоне после загрузки картинки.', verbose_name='Размеры и копии картинки'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.db import migrations
+
+# Индекс FTS5 хранит только токены: тексты берутся из blog_post
+# (external content), а триггеры держат его в согласии с таблицей
+# при любых изменениях, включая bulk_create и update().
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5(
+        title, text,
+        content='blog_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_insert
+    AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_delete
+    AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_update
+    AFTER UPDATE OF title, text ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO blog_post_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')",
+)
+
+DROP_SQL = (
+    "DROP TRIGGER IF EXISTS blog_post_fts_update",
+    "DROP TRIGGER IF EXISTS blog_post_fts_delete",
+    "DROP TRIGGER IF EXISTS blog_post_fts_insert",
+    "DROP TABLE IF EXISTS blog_post_fts",
+)
+
+
+def _execute(statements):
+    def operation(apps, schema_editor):
+        # На других СУБД поиск работает через icontains, см. blog.search.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(_execute(CREATE_SQL), _execute(DROP_SQL)),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_comment_database_references'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedfile',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Заявка загрузки'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_alter_post_author'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='is_visible',
+            field=models.BooleanField(default=False, editable=False, help_text='Пост и его категория опубликованы, дата публикации наступила или вот-вот наступит.', verbose_name='Показывается в лентах'),
+        ),
+    ]
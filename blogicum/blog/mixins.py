@@ -1,10 +1,27 @@
+from datetime import datetime
+from hashlib import md5
+
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
-from django.http import HttpResponseRedirect
+from django.core.paginator import InvalidPage
+from django.db import DEFAULT_DB_ALIAS, router
+from django.http import Http404, HttpResponseRedirect
 from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 
-from blog.constants import INDEX, PAGINATE, POST_DETAIL_URL
+from blog.constants import (
+    COMMENTS_PAGINATE,
+    CURSOR_PARAM,
+    INDEX,
+    PAGE_PARAM,
+    PAGINATE,
+    POST_DETAIL_URL
+)
 from blog.forms import CommentForm
 from blog.models import Comment, Post
+from blog.pagination import CursorPaginator
+from blog.sqlite import retry_on_lock
 
 
 class PostFieldsMixin:
@@ -29,6 +46,28 @@ class PostEditDispatchMixin:
         return super().dispatch(request, *args, **kwargs)
 
 
+class LockRetryMixin:
+    """Повторяет изменяющие запросы, упавшие на блокировке SQLite.
+
+    Весь dispatch выполняется в одной транзакции, поэтому повтор
+    начинается с чистого листа, а on_commit-задачи неудачной попытки
+    отбрасываются.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        dispatch = super().dispatch
+        if request.method in ("GET", "HEAD", "OPTIONS"):
+            return dispatch(request, *args, **kwargs)
+        return retry_on_lock(
+            lambda: dispatch(request, *args, **kwargs),
+            using=self.get_lock_database(),
+        )
+
+    def get_lock_database(self):
+        """База, в транзакции которой выполняется запрос."""
+        return DEFAULT_DB_ALIAS
+
+
 class CommentMixin:
     model = Comment
     template_name = "blog/comment.html"
@@ -37,16 +76,210 @@ class CommentMixin:
     def form_invalid(self, form):
         return HttpResponseRedirect(self.get_success_url())
 
+    def get_lock_database(self):
+        return router.db_for_write(Comment)
+
     def dispatch(self, request, *args, **kwargs):
         if "/comment/" not in self.request.path:
             comment_to_change = self.get_object()
-            if request.user.id != comment_to_change.author.id:
+            if request.user.id != comment_to_change.author_id:
                 raise PermissionDenied
         return super().dispatch(request, *args, **kwargs)
 
 
-class ListingMixin:
+class PostCommentsMixin:
+    """Доступ к посту и постраничная выдача его комментариев."""
+
+    def get_post_queryset(self):
+        # Автор видит свои посты и до публикации.
+        return (
+            Post.objects.published()
+            | Post.objects.filter(author_id=self.request.user.id)
+        )
+
+    def get_comments_page(self, post, cursor=None):
+        paginator = CursorPaginator(
+            post.comments.with_author(),
+            COMMENTS_PAGINATE,
+            date_field="created_at",
+            descending=False,
+        )
+        try:
+            return paginator.page(cursor)
+        except InvalidPage as error:
+            raise Http404(str(error))
+
+
+# Поля поста, от которых зависит его карточка, с учётом того, что
+# переименование автора и правка комментариев обновляют Post.updated_at.
+POST_VALIDATOR_FIELDS = (
+    "id",
+    "updated_at",
+    "comment_count",
+    "category",
+    "category__updated_at",
+    "location",
+    "location__updated_at",
+)
+
+
+def post_validator_queryset(queryset):
+    return (
+        queryset.select_related(None)
+        .select_related("category", "location")
+        .only(*POST_VALIDATOR_FIELDS)
+    )
+
+
+def post_validator_row(post):
+    category, location = post.category, post.location
+    return (
+        post.pk,
+        post.updated_at,
+        post.comment_count,
+        category and category.updated_at,
+        location and location.updated_at,
+    )
+
+
+# Без этих заголовков ответ 304 невозможен, и валидаторы можно посчитать
+# по уже выбранной странице, не делая узкую выборку.
+CONDITIONAL_HEADERS = ("HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE")
+
+
+def is_conditional(request):
+    return any(name in request.META for name in CONDITIONAL_HEADERS)
+
+
+def viewer_key(user):
+    # Вход меняет last_login и CSRF-токен, который есть в формах страницы.
+    if not user.is_authenticated:
+        return None
+    return (user.pk, user.username, user.last_login)
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 Not Modified на GET с ETag и Last-Modified.
+
+    Для условного запроса валидаторы считаются по get_validator_rows() —
+    узкой выборке того, что выводит страница, — и по читателю, поэтому
+    для 304 не нужны ни полная выборка, ни шаблон. Безусловный запрос
+    304 не получит: страница выбирается сразу, и валидаторы считаются
+    по ней, get_fetched_validator_rows().
+
+    По умолчанию страница — один пост DetailView: get_object() с
+    выборкой из get_queryset(). Ленты переопределяют оба метода.
+    """
+
+    def get_validator_rows(self):
+        post = self.get_object(post_validator_queryset(self.get_queryset()))
+        return [post_validator_row(post)]
+
+    def get_fetched_validator_rows(self):
+        """Те же строки, что у get_validator_rows(), по выбранным данным.
+
+        Строки get_extra_validator_rows() сюда не входят.
+        """
+        return [post_validator_row(self.object)]
+
+    def get_extra_validator_rows(self):
+        """Валидаторы того, что выводится на странице помимо постов."""
+        return []
+
+    def get_validators(self, rows):
+        """Возвращает ETag и Last-Modified (timestamp или None) по строкам."""
+        rows = list(rows)
+        etag = quote_etag(
+            md5(
+                repr((viewer_key(self.request.user), rows)).encode()
+            ).hexdigest()
+        )
+        timestamps = [
+            value for row in rows for value in row
+            if isinstance(value, datetime)
+        ]
+        last_modified = (
+            int(max(timestamps).timestamp()) if timestamps else None
+        )
+        return etag, last_modified
+
+    @staticmethod
+    def set_validators(response, etag, last_modified):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def get(self, request, *args, **kwargs):
+        if not is_conditional(request):
+            response = super().get(request, *args, **kwargs)
+            etag, last_modified = self.get_validators(
+                self.get_fetched_validator_rows()
+                + self.get_extra_validator_rows()
+            )
+            return self.set_validators(response, etag, last_modified)
+        etag, last_modified = self.get_validators(self.get_validator_rows())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+
+class ListingMixin(ConditionalGetMixin):
 
     model = Post
-    ordering = "-pub_date"
+    ordering = ("-pub_date", "-id")
     paginate_by = PAGINATE
+    page_data = None
+
+    def uses_cursor_pagination(self):
+        params = self.request.GET
+        if CURSOR_PARAM in params:
+            return True
+        return settings.BLOG_CURSOR_PAGINATION and PAGE_PARAM not in params
+
+    def paginate_page(self, queryset, page_size):
+        if not self.uses_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(CURSOR_PARAM))
+        except InvalidPage as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def paginate_queryset(self, queryset, page_size):
+        # Страница выбирается один раз: ею пользуются и контекст, и
+        # валидаторы безусловного запроса.
+        if self.page_data is None:
+            paginator, page, posts, is_paginated = self.paginate_page(
+                queryset, page_size
+            )
+            page.object_list = posts = list(posts)
+            self.page_data = paginator, page, posts, is_paginated
+        return self.page_data
+
+    def get_validator_rows(self):
+        return self.get_page_validator_rows() + self.get_extra_validator_rows()
+
+    def get_page_validator_rows(self):
+        queryset = post_validator_queryset(self.get_queryset())
+        paginator, page, posts, _ = self.paginate_page(
+            queryset, self.get_paginate_by(queryset)
+        )
+        return page_validator_rows(paginator, page, posts)
+
+    def get_fetched_validator_rows(self):
+        paginator, page, posts, _ = self.page_data
+        return page_validator_rows(paginator, page, posts)
+
+
+def page_validator_rows(paginator, page, posts):
+    rows = [post_validator_row(post) for post in posts]
+    if getattr(page, "is_cursor", False):
+        rows.append((page.next_cursor, page.previous_cursor))
+    else:
+        rows.append((page.number, paginator.num_pages))
+    return rows
@@ -1,11 +1,22 @@
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.db.models.functions import Coalesce
 from django.urls import reverse
+from django.utils import timezone
 
-from blog.constants import POST_DETAIL_URL, RESTRICTION
+from blog.constants import ID_BATCH_SIZE, POST_DETAIL_URL, RESTRICTION
+from blog.storage import post_image_storage
 
 User = get_user_model()
 
+# Поля поста, от которых зависят его файлы в хранилище.
+STORED_FILE_FIELDS = frozenset({'image', 'image_info'})
+
 
 class PublishedModel(models.Model):
     is_published = models.BooleanField(
@@ -24,7 +35,14 @@ class PublishedModel(models.Model):
         abstract = True
 
 
-class Category(PublishedModel):
+class UpdatedModel(models.Model):
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class Category(PublishedModel, UpdatedModel):
     title = models.CharField('Заголовок', max_length=256)
     description = models.TextField('Описание')
     slug = models.SlugField(
@@ -44,7 +62,7 @@ class Category(PublishedModel):
         return self.title[:RESTRICTION]
 
 
-class Location(PublishedModel):
+class Location(PublishedModel, UpdatedModel):
     name = models.CharField('Название места', max_length=256)
 
     def __str__(self):
@@ -55,7 +73,201 @@ class Location(PublishedModel):
         verbose_name = 'местоположение'
 
 
-class Post(PublishedModel):
+def visibility_cutoff(now=None):
+    """Граница pub_date для публичных лент, округлённая вниз до кванта.
+
+    Внутри одного кванта одинаковые запросы дают одинаковый SQL и могут
+    разделять кэш запросов и страниц.
+    """
+    now = now or timezone.now()
+    quantum = settings.BLOG_VISIBILITY_QUANTUM
+    if quantum <= 0:
+        return now
+    timestamp = now.timestamp()
+    return datetime.fromtimestamp(
+        timestamp - timestamp % quantum, tz=timezone.utc
+    )
+
+
+def visibility_moment(pub_date):
+    """Момент, когда visibility_cutoff() дойдёт до pub_date."""
+    quantum = settings.BLOG_VISIBILITY_QUANTUM
+    if quantum <= 0:
+        return pub_date
+    timestamp = math.ceil(pub_date.timestamp() / quantum) * quantum
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def visibility_horizon(now=None):
+    """Момент, до которого is_visible выставляется заранее.
+
+    Флаг открывается с упреждением, а точный момент показа задаёт
+    visibility_cutoff(), поэтому наступившие посты видны сразу, не
+    дожидаясь очередного прохода publish_due_posts.
+    """
+    return (now or timezone.now()) + timedelta(
+        seconds=settings.BLOG_VISIBILITY_LOOKAHEAD
+    )
+
+
+class PostQuerySet(models.QuerySet):
+
+    def visible(self):
+        return self.filter(is_visible=True)
+
+    def published(self, now=None):
+        return self.visible().filter(pub_date__lte=visibility_cutoff(now))
+
+    def touch(self):
+        """Отмечает посты изменёнными, не вызывая save()."""
+        return self.update(updated_at=timezone.now())
+
+    def refresh_visibility(self, now=None):
+        """Пересчитывает is_visible, изменяя только устаревшие строки."""
+        displayable = models.Q(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=visibility_horizon(now)
+        )
+        shown = self.filter(displayable, is_visible=False).update(
+            is_visible=True
+        )
+        hidden = self.exclude(displayable).filter(is_visible=True).update(
+            is_visible=False
+        )
+        return shown, hidden
+
+    def recount_comments(self, batch_size=ID_BATCH_SIZE):
+        """Пересчитывает comment_count по таблице комментариев.
+
+        Посты отмечаются изменёнными: от updated_at зависят версии
+        карточек и условные GET.
+        """
+        counts = (
+            Comment.objects.order_by()
+            .values("post")
+            .annotate(total=models.Count("pk"))
+        )
+        if not comments_apart():
+            return self.update(
+                comment_count=Coalesce(
+                    models.Subquery(
+                        counts.filter(post=models.OuterRef("pk"))
+                        .values("total")
+                    ),
+                    0,
+                ),
+                updated_at=timezone.now(),
+            )
+        # Подзапрос в другую базу невозможен: счётчики собираются одним
+        # GROUP BY в базе комментариев, и посты с равным числом
+        # комментариев обновляются вместе.
+        totals = dict(counts.values_list("post", "total"))
+        by_total = defaultdict(list)
+        for pk in self.values_list("pk", flat=True).iterator():
+            by_total[totals.get(pk, 0)].append(pk)
+        for total, pks in by_total.items():
+            for start in range(0, len(pks), batch_size):
+                Post.objects.filter(
+                    pk__in=pks[start:start + batch_size]
+                ).update(comment_count=total, updated_at=timezone.now())
+        return sum(map(len, by_total.values()))
+
+
+class StoredFileQuerySet(models.QuerySet):
+
+    def acquire(self, names):
+        """Добавляет по ссылке на каждое вхождение имени в names."""
+        counts = Counter(name for name in names if name)
+        if not counts:
+            return
+        by_count = {}
+        for name, count in counts.items():
+            by_count.setdefault(count, []).append(name)
+        with transaction.atomic():
+            self.bulk_create(
+                [StoredFile(name=name) for name in counts],
+                ignore_conflicts=True
+            )
+            for count, group in by_count.items():
+                self.filter(name__in=group).update(
+                    ref_count=models.F('ref_count') + count,
+                    claimed_at=None,
+                )
+
+    def claim(self, name):
+        """Отмечает, что загрузка только что получила файл name.
+
+        Пока ссылку не добавит acquire(), свежая заявка не даёт discard()
+        удалить файл, даже если прежние ссылки на него уже сняты.
+        """
+        with transaction.atomic():
+            self.bulk_create([StoredFile(name=name)], ignore_conflicts=True)
+            self.filter(name=name).update(claimed_at=timezone.now())
+
+    def release(self, names, storage):
+        """Снимает по ссылке с файлов и удаляет те, что стали не нужны.
+
+        Файлы без записи о ссылках (загруженные до учёта) не удаляются.
+        """
+        names = set(filter(None, names))
+        if not names:
+            return
+        with transaction.atomic():
+            self.filter(name__in=names, ref_count__gt=0).update(
+                ref_count=models.F('ref_count') - 1
+            )
+            garbage = list(
+                self.filter(name__in=names, ref_count=0)
+                .values_list('name', flat=True)
+            )
+        if garbage:
+            transaction.on_commit(
+                lambda: StoredFile.objects.discard(garbage, storage)
+            )
+
+    def discard(self, names, storage):
+        """Удаляет файлы, на которые нет ни ссылок, ни свежих заявок.
+
+        Проверка и удаление идут в одной пишущей транзакции, так что
+        claim() и acquire() ждут её конца. Загрузка, опоздавшая к уже
+        удалённому файлу, заново создаёт его, см.
+        ContentAddressedStorage._publish().
+        """
+        names = set(names)
+        fresh = timezone.now() - timedelta(
+            seconds=settings.BLOG_STORED_FILE_CLAIM_TTL
+        )
+        with transaction.atomic():
+            # Запись первой: в SQLite она держит блокировку до фиксации.
+            self.filter(name__in=names, ref_count=0).exclude(
+                claimed_at__gte=fresh
+            ).delete()
+            alive = set(
+                self.filter(name__in=names).values_list('name', flat=True)
+            )
+            for name in names - alive:
+                storage.delete(name)
+
+
+class StoredFile(models.Model):
+    name = models.CharField('Имя файла', max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField('Число ссылок', default=0)
+    claimed_at = models.DateTimeField(
+        'Заявка загрузки', null=True, blank=True
+    )
+
+    objects = StoredFileQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'файл хранилища'
+        verbose_name_plural = 'Файлы хранилища'
+
+    def __str__(self):
+        return self.name
+
+
+class Post(PublishedModel, UpdatedModel):
     title = models.CharField('Заголовок', max_length=256)
     text = models.TextField('Текст')
     pub_date = models.DateTimeField(
@@ -71,7 +283,22 @@ class Post(PublishedModel):
         verbose_name='Автор публикации',
         related_name='posts'
     )
-    image = models.ImageField(verbose_name='Картинка у публикации', blank=True)
+    image = models.ImageField(
+        verbose_name='Картинка у публикации',
+        blank=True,
+        upload_to='posts/',
+        storage=post_image_storage
+    )
+    image_info = models.JSONField(
+        'Размеры и копии картинки',
+        default=dict,
+        editable=False,
+        help_text=(
+            'Размеры оригинала и уменьшенные копии по возрастанию ширины: '
+            '{"width", "height", "variants": [{"name", "width", "height"}]}. '
+            'Заполняется в фоне после загрузки картинки.'
+        )
+    )
     location = models.ForeignKey(
         Location,
         on_delete=models.SET_NULL,
@@ -85,37 +312,216 @@ class Post(PublishedModel):
         null=True,
         verbose_name='Категория'
     )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
+    is_visible = models.BooleanField(
+        'Показывается в лентах',
+        default=False,
+        editable=False,
+        help_text=(
+            'Пост и его категория опубликованы, дата публикации '
+            'наступила или вот-вот наступит.'
+        )
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta(PublishedModel.Meta):
         verbose_name_plural = 'Публикации'
         verbose_name = 'публикация'
+        indexes = (
+            # Django рендерит is_visible=True как голый столбец, поэтому
+            # SQLite использует для лент частичные индексы, а не составные
+            # индексы с флагом в ключе.
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_visible=True),
+                name='post_visible_feed_idx'
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                condition=models.Q(is_visible=True),
+                name='post_visible_category_idx'
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_feed_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Файлы загруженной строки: при сохранении сигналы сравнивают
+        # с ними новые, не перечитывая пост.
+        if STORED_FILE_FIELDS <= set(field_names):
+            post._stored_files = post.stored_files()
+        return post
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        if fields is None or STORED_FILE_FIELDS & set(fields):
+            self.__dict__.pop('_stored_files', None)
+
+    def save(self, *args, **kwargs):
+        self.is_visible = (
+            self.is_published
+            and self.category is not None
+            and self.category.is_published
+            and self.pub_date <= visibility_horizon()
+        )
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields, 'is_visible', 'updated_at'
+            }
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse(POST_DETAIL_URL, args=(self.pk,))
 
+    @property
+    def image_width(self):
+        return self.image_info.get('width')
+
+    @property
+    def image_height(self):
+        return self.image_info.get('height')
+
+    @property
+    def image_variants(self):
+        return self.image_info.get('variants', [])
+
+    def stored_files(self):
+        """Файлы хранилища, на которые ссылается пост."""
+        if not self.image:
+            return set()
+        return {self.image.name} | {
+            variant['name'] for variant in self.image_variants
+        }
+
+    def image_variant_url(self, width):
+        """URL самой узкой копии не уже width, иначе оригинала."""
+        for variant in self.image_variants:
+            if variant['width'] >= width:
+                return self.image.storage.url(variant['name'])
+        return self.image.url
+
+    @property
+    def image_thumbnail_url(self):
+        return self.image_variant_url(settings.BLOG_IMAGE_THUMBNAIL_WIDTH)
+
+    @property
+    def image_srcset(self):
+        if not self.image_variants:
+            return ''
+        storage = self.image.storage
+        candidates = [
+            f"{storage.url(variant['name'])} {variant['width']}w"
+            for variant in self.image_variants
+        ]
+        if self.image_width:
+            candidates.append(f'{self.image.url} {self.image_width}w')
+        return ', '.join(candidates)
+
+
+def comments_apart():
+    """Лежат ли комментарии в отдельной базе (BLOG_COMMENTS_DATABASE).
+
+    Тогда JOIN и подзапросы между комментариями и остальными таблицами
+    невозможны, и связи разрешаются отдельными запросами.
+    """
+    return settings.BLOG_COMMENTS_DATABASE != DEFAULT_DB_ALIAS
+
+
+def iter_batches(queryset, fields, batch_size=ID_BATCH_SIZE):
+    """Списки строк (pk, *fields) по batch_size штук в порядке pk.
+
+    Каждая порция — отдельный запрос с продолжением после последнего
+    pk, поэтому строки порции можно удалять, не сбивая обход.
+    """
+    last = None
+    while True:
+        page = queryset.order_by("pk")
+        if last is not None:
+            page = page.filter(pk__gt=last)
+        rows = list(page.values_list("pk", *fields)[:batch_size])
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def existing_ids(queryset, ids, batch_size=ID_BATCH_SIZE):
+    """Те из ids, что есть в queryset.
+
+    ids проверяются порциями по batch_size: длинный список в IN
+    упирается в лимит переменных SQLite.
+    """
+    ids = list(ids)
+    found = set()
+    for start in range(0, len(ids), batch_size):
+        found.update(
+            queryset.filter(pk__in=ids[start:start + batch_size])
+            .values_list("pk", flat=True)
+        )
+    return found
+
+
+def commented_post_ids(author):
+    """Посты с комментариями автора для фильтра pk__in."""
+    post_ids = Comment.objects.filter(author=author).values("post_id")
+    if comments_apart():
+        return {row["post_id"] for row in post_ids}
+    return post_ids
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def with_author(self):
+        if comments_apart():
+            return self.prefetch_related("author")
+        return self.select_related("author")
+
 
 class Comment(PublishedModel):
+    # Комментарии могут жить в отдельной базе (см. blog.routers), поэтому
+    # у ссылок нет ограничений в БД, а каскадное удаление заменено
+    # обработчиками в blog.signals.
     author = models.ForeignKey(
         User,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         verbose_name='Автор комментария',
         related_name='comments',
     )
     post = models.ForeignKey(
         Post,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         verbose_name='Комментируемый пост',
         related_name='comments',
     )
     text = models.TextField(verbose_name='Текст комментария')
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарий'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx'
+            ),
+        )
 
     def __str__(self):
         str_text = 'Комментарий автора '
@@ -0,0 +1,119 @@
+import base64
+import binascii
+
+from django.core.paginator import InvalidPage
+from django.utils.dateparse import parse_datetime
+
+FORWARD = "n"
+BACKWARD = "p"
+
+
+def encode_cursor(direction, pub_date, pk):
+    raw = f"{direction}|{pub_date.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        direction, pub_date, pk = raw.decode().split("|")
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidPage("Некорректный курсор страницы.")
+    if direction not in (FORWARD, BACKWARD) or pub_date is None:
+        raise InvalidPage("Некорректный курсор страницы.")
+    return direction, pub_date, pk
+
+
+class CursorPage:
+    """Страница, выбранная по ключу (дата, id) без OFFSET."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по ключу (date_field, id).
+
+    Не выполняет COUNT(*) и не использует OFFSET, поэтому время выборки
+    не зависит от глубины страницы. По умолчанию лента идёт по убыванию
+    pub_date; комментарии листаются по возрастанию created_at.
+    """
+
+    def __init__(
+            self, queryset, per_page, date_field="pub_date", descending=True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.date_field = date_field
+        self.descending = descending
+
+    def _after(self, queryset, value, pk, descending):
+        field = self.date_field
+        if descending:
+            return queryset.filter(**{f"{field}__lte": value}).exclude(
+                **{field: value, "id__gte": pk}
+            ).order_by(f"-{field}", "-id")
+        return queryset.filter(**{f"{field}__gte": value}).exclude(
+            **{field: value, "id__lte": pk}
+        ).order_by(field, "id")
+
+    def _cursor(self, direction, obj):
+        if isinstance(obj, dict):
+            # Строка values(): в ней должны быть date_field и id.
+            return encode_cursor(direction, obj[self.date_field], obj["id"])
+        return encode_cursor(direction, getattr(obj, self.date_field), obj.pk)
+
+    def page(self, cursor=None):
+        queryset = self.queryset
+        if not cursor:
+            direction = FORWARD
+            if self.descending:
+                queryset = queryset.order_by(f"-{self.date_field}", "-id")
+            else:
+                queryset = queryset.order_by(self.date_field, "id")
+        else:
+            direction, value, pk = decode_cursor(cursor)
+            queryset = self._after(
+                queryset, value, pk,
+                self.descending == (direction == FORWARD)
+            )
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if direction == BACKWARD:
+            object_list.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+        next_cursor = previous_cursor = None
+        if object_list and has_next:
+            next_cursor = self._cursor(FORWARD, object_list[-1])
+        if object_list and has_previous:
+            previous_cursor = self._cursor(BACKWARD, object_list[0])
+        return CursorPage(object_list, next_cursor, previous_cursor)
@@ -0,0 +1,115 @@
+"""Реплики SQLite для чтения.
+
+Реплика — копия основной базы в отдельном файле из DATABASES, которую
+команда sync_replicas обновляет через online backup API. Момент снимка
+записывается в файл рядом с репликой: по нему веб-процессы считают
+отставание и решают, можно ли читать с реплики (см. blog.routers).
+"""
+import contextvars
+import os
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_route = contextvars.ContextVar("blog_db_route", default=None)
+
+
+class Route:
+    """Выбор базы для чтений одного запроса.
+
+    Копии контекста в sync_to_async и в потоках run_db ссылаются на тот
+    же объект, поэтому запись из любой из них возвращает остальные
+    чтения запроса на основную базу.
+    """
+
+    def __init__(self, replica=None):
+        self.replica = replica
+        self.wrote = False
+
+
+@contextmanager
+def route(replica=None):
+    token = _route.set(Route(replica))
+    try:
+        yield _route.get()
+    finally:
+        _route.reset(token)
+
+
+def current_route():
+    return _route.get()
+
+
+def database_file(alias):
+    return Path(settings.DATABASES[alias]["NAME"])
+
+
+def stamp_file(path):
+    return path.with_name(f"{path.name}.synced")
+
+
+def snapshot(source, target):
+    """Копирует базу source в target и возвращает момент снимка.
+
+    backup API читает source в одной транзакции, так что копия
+    согласована и при одновременной записи. В target с журналом WAL
+    читатели реплики не блокируются и видят либо старый, либо новый
+    снимок целиком.
+    """
+    synced_at = time.time()
+    timeout = settings.BLOG_SQLITE_PRAGMAS.get("busy_timeout", 5000) / 1000
+    source_db = sqlite3.connect(source, timeout=timeout)
+    target_db = sqlite3.connect(target, timeout=timeout)
+    try:
+        source_db.backup(target_db)
+    finally:
+        source_db.close()
+        target_db.close()
+    stamp, temporary = stamp_file(target), Path(f"{target}.synced.tmp")
+    temporary.write_text(repr(synced_at))
+    os.replace(temporary, stamp)
+    return synced_at
+
+
+def synced_at(path):
+    """Момент последнего снимка или None, если снимка ещё не было."""
+    try:
+        return float(stamp_file(path).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def sync_replica(alias):
+    return snapshot(database_file(DEFAULT_DB_ALIAS), database_file(alias))
+
+
+def replica_lag(alias, now=None):
+    """Отставание реплики в секундах или None для несинхронизированной."""
+    moment = synced_at(database_file(alias))
+    if moment is None:
+        return None
+    return max((now or time.time()) - moment, 0)
+
+
+def choose_replica(wrote_at=None, now=None):
+    """Случайная реплика не старше BLOG_REPLICA_MAX_LAG и её отставание.
+
+    Если пользователь недавно писал (wrote_at), годятся только реплики
+    со снимком после записи. Без подходящих возвращает (None, None), и
+    запрос читает основную базу.
+    """
+    now = now or time.time()
+    fresh = []
+    for alias in settings.BLOG_READ_REPLICAS:
+        lag = replica_lag(alias, now)
+        if lag is None or lag > settings.BLOG_REPLICA_MAX_LAG:
+            continue
+        if wrote_at is not None and now - lag < wrote_at:
+            continue
+        fresh.append((alias, lag))
+    return random.choice(fresh) if fresh else (None, None)
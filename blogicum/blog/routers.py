@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from blog.replicas import current_route
+
+
+class CommentRouter:
+    """Комментарии — в базе BLOG_COMMENTS_DATABASE.
+
+    Остальные модели, к которым обращаются через комментарий (автор,
+    пост), читаются с основной базы, а не с базы объекта-подсказки, как
+    сделал бы Django по умолчанию. В отдельной базе создаются только
+    таблицы комментариев; в основной они остаются пустыми.
+    """
+
+    model_labels = {"blog.comment"}
+
+    def database(self):
+        return settings.BLOG_COMMENTS_DATABASE
+
+    def routes(self, model):
+        # Принимает и модели, и объекты, в том числе ленивый request.user.
+        # В общей базе комментарии маршрутизирует ReplicaRouter.
+        return (
+            self.database() != DEFAULT_DB_ALIAS
+            and model._meta.label_lower in self.model_labels
+        )
+
+    def db_for_read(self, model, **hints):
+        if self.routes(model):
+            return self.database()
+        if self.from_comment(hints):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        if self.routes(model):
+            return self.database()
+        if self.from_comment(hints):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def from_comment(self, hints):
+        instance = hints.get("instance")
+        return (
+            instance is not None
+            and self.database() != DEFAULT_DB_ALIAS
+            and instance._state.db == self.database()
+        )
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ссылки из комментариев не проверяются базой, поэтому связь с
+        # объектом из основной базы или реплики допустима.
+        if self.routes(obj1) or self.routes(obj2):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS or db != self.database():
+            return None
+        return (
+            model_name is not None
+            and f"{app_label}.{model_name}" in self.model_labels
+        )
+
+
+class ReplicaRouter:
+    """Чтения моделей блога в маршрутизированных запросах — с реплики.
+
+    Реплику запросу назначает ReplicaRoutingMiddleware. Сессии и
+    пользователи всегда читаются с основной базы: только что созданных
+    в реплике ещё нет. Любая запись идёт в основную базу и до конца
+    запроса возвращает туда же его чтения.
+    """
+
+    app_labels = {"blog"}
+
+    def databases(self):
+        return {DEFAULT_DB_ALIAS, *settings.BLOG_READ_REPLICAS}
+
+    def db_for_read(self, model, **hints):
+        route = current_route()
+        if (
+            route is None
+            or route.replica is None
+            or route.wrote
+            or model._meta.app_label not in self.app_labels
+        ):
+            return None
+        return route.replica
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get("instance")
+        if (
+            instance is not None
+            and instance._state.db not in (None, *self.databases())
+        ):
+            # Объект из посторонней базы, например при migrate --database:
+            # Django сохранит связанное с ним в ту же базу.
+            return None
+        route = current_route()
+        if route is not None:
+            route.wrote = True
+        # Объект, прочитанный с реплики, сохраняется в основную базу.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = self.databases()
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема попадает в реплику вместе со снимком.
+        if db in settings.BLOG_READ_REPLICAS:
+            return False
+        return None
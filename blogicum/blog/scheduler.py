@@ -0,0 +1,175 @@
+import heapq
+import logging
+import sys
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from blog.cache import (
+    invalidate_page_cache,
+    post_page_scopes,
+    render_post_cards
+)
+from blog.models import Post, visibility_cutoff, visibility_moment
+
+logger = logging.getLogger("blog.scheduler")
+
+
+class PublicationScheduler:
+    """Очередь отложенных публикаций, упорядоченная по моменту показа.
+
+    В очереди лежат пары (момент показа, pk) для постов, которые станут
+    видны в пределах window секунд. Когда момент наступает, у поста
+    пересчитывается is_visible, сбрасываются страницы ленты, категории
+    и автора, а карточка и, если задан warm_host, сами страницы
+    рендерятся заранее, чтобы первый читатель не попал на промах кэша.
+
+    Очередь перечитывается из базы раз в poll секунд, поэтому перенос
+    даты публикации в админке учитывается без сигналов.
+    """
+
+    def __init__(self, window=None, poll=None, warm_host=None, now=None):
+        self.window = timedelta(
+            seconds=window or settings.BLOG_PUBLICATION_WINDOW
+        )
+        self.poll = timedelta(seconds=poll or settings.BLOG_PUBLICATION_POLL)
+        self.warm_host = warm_host or settings.BLOG_PUBLICATION_WARM_HOST
+        self.handler = None
+        self.queue = []
+        self.reloaded_at = None
+        # Посты с pub_date не позже этой границы уже обработаны. При
+        # запуске догоняем всё, что могло попасть в кэш страниц до
+        # публикации, пока воркер не работал.
+        self.published_until = visibility_cutoff(
+            (now or timezone.now())
+            - timedelta(seconds=settings.BLOG_PAGE_CACHE_TIMEOUT)
+        )
+
+    def reload(self, now):
+        rows = Post.objects.filter(
+            is_published=True,
+            category__is_published=True,
+            pub_date__gt=self.published_until,
+            pub_date__lte=now + self.window,
+        ).values_list("pub_date", "pk")
+        self.queue = [
+            (visibility_moment(pub_date), pk) for pub_date, pk in rows
+        ]
+        heapq.heapify(self.queue)
+        self.reloaded_at = now
+
+    def next_due(self):
+        return self.queue[0][0] if self.queue else None
+
+    def seconds_until_next(self, now):
+        """Сколько можно спать до ближайшей публикации или перечитывания."""
+        wakeup = self.reloaded_at + self.poll
+        due = self.next_due()
+        if due is not None:
+            wakeup = min(wakeup, due)
+        return max((wakeup - now).total_seconds(), 0)
+
+    def run_once(self, now=None):
+        """Публикует наступившие посты и возвращает их число."""
+        now = now or timezone.now()
+        if self.reloaded_at is None or now - self.reloaded_at >= self.poll:
+            self.reload(now)
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            due.append(heapq.heappop(self.queue)[1])
+        published = self.publish(due, now) if due else 0
+        self.published_until = max(
+            self.published_until, visibility_cutoff(now)
+        )
+        return published
+
+    def publish(self, pks, now):
+        posts = Post.objects.filter(pk__in=pks)
+        with transaction.atomic():
+            posts.refresh_visibility(now)
+            # Пересчёт идёт по текущим строкам: если дату успели
+            # перенести, сброс страниц окажется лишним, но безвредным.
+            scopes = post_page_scopes(posts.published(now))
+            invalidate_page_cache(*scopes)
+        published = list(
+            posts.published(now).select_related(
+                "author", "category", "location"
+            )
+        )
+        if published:
+            self.warm(published)
+            logger.info(
+                "Опубликовано %d: %s",
+                len(published), ", ".join(str(post.pk) for post in published)
+            )
+        return len(published)
+
+    def warm(self, posts):
+        with translation.override(settings.LANGUAGE_CODE):
+            render_post_cards(posts)
+        if not self.warm_host:
+            return
+        for path in self.warm_paths(posts):
+            status = self.warm_request(path)
+            if status != 200:
+                logger.warning("Не удалось прогреть %s: %d", path, status)
+
+    def warm_request(self, path):
+        """GET анонимного читателя через WSGI-обработчик проекта.
+
+        Запрос проходит все промежуточные слои, поэтому страница
+        попадает в кэш так же, как при обычном посещении. Возвращает
+        код ответа.
+        """
+        if self.handler is None:
+            self.handler = WSGIHandler()
+        host, _, port = self.warm_host.partition(":")
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "SCRIPT_NAME": "",
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": host,
+            "SERVER_PORT": port or "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": self.warm_host,
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": BytesIO(),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": False,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(int(status.split()[0]))
+
+        body = self.handler(environ, start_response)
+        try:
+            # Как WSGI-сервер: тело дочитывается, а close() отправляет
+            # request_finished.
+            for _ in body:
+                pass
+        finally:
+            body.close()
+        return statuses[0]
+
+    def warm_paths(self, posts):
+        """Первые страницы лент, в которых появились посты."""
+        pages = {("blog:index", ())}
+        for post in posts:
+            pages.add(("blog:profile", (post.author.username,)))
+            if post.category_id:
+                pages.add(("blog:category_posts", (post.category.slug,)))
+        return sorted(
+            reverse(view_name, args=args)
+            for view_name, args in pages
+            if view_name in settings.BLOG_PAGE_CACHE_VIEWS
+        )
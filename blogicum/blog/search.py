@@ -0,0 +1,155 @@
+import re
+
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+SEARCH_TABLE = "blog_post_fts"
+SEARCH_TRIGGERS = (
+    "blog_post_fts_insert",
+    "blog_post_fts_delete",
+    "blog_post_fts_update",
+)
+
+SEARCH_MIGRATION = ("blog", "0011_post_search_index")
+
+# Тот же индекс, что создаёт миграция 0011. SQLite удаляет триггеры
+# вместе с таблицей, а Django пересоздаёт blog_post при многих
+# изменениях схемы, поэтому ensure_search_index() запускается после
+# каждого migrate.
+SCHEMA_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        title, text,
+        content='blog_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_insert
+    AFTER INSERT ON blog_post BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_delete
+    AFTER DELETE ON blog_post BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_update
+    AFTER UPDATE OF title, text ON blog_post BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO {SEARCH_TABLE}(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+)
+
+# Заголовок весит больше текста.
+RANK_SQL = f"bm25({SEARCH_TABLE}, 10.0, 1.0)"
+# Маркеры совпадений заменяются на <mark> после экранирования текста.
+MATCH_START, MATCH_END = "\x02", "\x03"
+SNIPPET_SQL = (
+    f"snippet({SEARCH_TABLE}, -1, '{MATCH_START}', '{MATCH_END}', '…', 24)"
+)
+MAX_TERMS = 8
+
+
+def uses_fts(using="default"):
+    return connections[using].vendor == "sqlite"
+
+
+def search_terms(query):
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+def match_expression(terms):
+    """Запрос FTS5: все слова, каждое как префикс.
+
+    Слова берутся в кавычки, поэтому операторы FTS5 из строки
+    поиска не интерпретируются.
+    """
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_posts(queryset, query):
+    """Фильтрует queryset по запросу и сортирует по релевантности.
+
+    У найденных постов есть атрибуты rank и snippet. Пустой запрос
+    ничего не находит.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+    if not uses_fts(queryset.db):
+        condition = Q()
+        for term in terms:
+            condition &= Q(title__icontains=term) | Q(text__icontains=term)
+        return queryset.filter(condition).extra(
+            select={"rank": "0", "snippet": "''"}
+        ).order_by("-pub_date", "-id")
+    return queryset.extra(
+        select={"rank": RANK_SQL, "snippet": SNIPPET_SQL},
+        tables=[SEARCH_TABLE],
+        where=[
+            f"{SEARCH_TABLE}.rowid = blog_post.id",
+            f"{SEARCH_TABLE} MATCH %s",
+        ],
+        params=[match_expression(terms)],
+    ).order_by("rank", "-pub_date")
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MATCH_START, "<mark>")
+        .replace(MATCH_END, "</mark>")
+    )
+
+
+def ensure_search_index(using="default"):
+    """Создаёт недостающие таблицу и триггеры индекса и перестраивает его.
+
+    Возвращает True, если индекс пришлось перестроить.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return False
+    applied = MigrationRecorder(connection).applied_migrations()
+    if SEARCH_MIGRATION not in applied:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            [SEARCH_TABLE, *SEARCH_TRIGGERS],
+        )
+        if len(cursor.fetchall()) == len(SEARCH_TRIGGERS) + 1:
+            return False
+        for statement in SCHEMA_SQL:
+            cursor.execute(statement)
+    rebuild_search_index(using)
+    return True
+
+
+def _search_command(command, using):
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES (%s)",
+            [command],
+        )
+
+
+def rebuild_search_index(using="default"):
+    _search_command("rebuild", using)
+
+
+def optimize_search_index(using="default"):
+    """Сливает сегменты индекса, ускоряя последующие запросы."""
+    _search_command("optimize", using)
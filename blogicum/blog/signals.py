@@ -0,0 +1,177 @@
+from django.db import router, transaction
+from django.db.models import F, Q
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from blog.cache import instance_page_scopes, invalidate_page_cache
+from blog.search import ensure_search_index
+from blog.models import (
+    Category,
+    Comment,
+    Location,
+    Post,
+    STORED_FILE_FIELDS,
+    StoredFile,
+    User,
+    commented_post_ids,
+    comments_apart
+)
+
+PAGE_CACHE_SENDERS = (Post, Comment, Category, Location, User)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw, **kwargs):
+    # У комментария нет своего updated_at, поэтому для условных GET
+    # изменённым считается пост.
+    if raw:
+        return
+    posts = Post.objects.filter(pk=instance.post_id)
+    if created:
+        posts.update(
+            comment_count=F('comment_count') + 1,
+            updated_at=timezone.now()
+        )
+    else:
+        posts.touch()
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    # Срабатывает и при каскадном удалении, и при удалении из админки.
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1,
+        updated_at=timezone.now()
+    )
+
+
+def delete_comments(**filters):
+    comments = Comment.objects.filter(**filters)
+    if not comments_apart():
+        comments.delete()
+        return
+    # Удаление в другой базе не откатится вместе с транзакцией основной,
+    # поэтому выполняется только после её фиксации. Если процесс упадёт
+    # между ними, осиротевшие комментарии удалит
+    # rebuild_comment_counts --purge-orphans.
+    transaction.on_commit(comments.delete)
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_comments(sender, instance, **kwargs):
+    # Замена каскада: у Comment.post нет ограничения в БД.
+    delete_comments(post_id=instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def delete_author_comments(sender, instance, **kwargs):
+    delete_comments(author_id=instance.pk)
+
+
+@receiver(pre_save, sender=User)
+def touch_renamed_author_posts(sender, instance, raw, **kwargs):
+    # Имя автора выводится в карточках и комментариях.
+    if raw or instance._state.adding:
+        return
+    renamed = User.objects.filter(pk=instance.pk).exclude(
+        username=instance.username
+    )
+    if renamed.exists():
+        Post.objects.filter(
+            Q(author=instance) | Q(pk__in=commented_post_ids(instance))
+        ).touch()
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_posts_visibility(sender, instance, raw, **kwargs):
+    if not raw:
+        Post.objects.filter(category=instance).refresh_visibility()
+
+
+@receiver(pre_delete, sender=Category)
+def hide_category_posts(sender, instance, **kwargs):
+    # После удаления категории у постов останется category=NULL.
+    Post.objects.filter(category=instance, is_visible=True).update(
+        is_visible=False
+    )
+
+
+def _keeps_stored_files(update_fields):
+    return (
+        update_fields is not None
+        and not STORED_FILE_FIELDS & update_fields
+    )
+
+
+@receiver(pre_save, sender=Post)
+def remember_stored_files(sender, instance, update_fields, **kwargs):
+    if _keeps_stored_files(update_fields):
+        return
+    if instance._state.adding:
+        instance._stored_files = set()
+    elif not hasattr(instance, '_stored_files'):
+        # Пост не загружен из базы целиком (only(), refresh_from_db или
+        # создан с готовым pk): старые файлы читаются заново.
+        instance._stored_files = set()
+        old = Post.objects.filter(pk=instance.pk).only('image', 'image_info')
+        for post in old:
+            instance._stored_files = post.stored_files()
+
+
+@receiver(post_save, sender=Post)
+def count_stored_files(sender, instance, update_fields, **kwargs):
+    if _keeps_stored_files(update_fields):
+        return
+    old = getattr(instance, '_stored_files', set())
+    new = instance.stored_files()
+    StoredFile.objects.acquire(new - old)
+    StoredFile.objects.release(old - new, instance.image.storage)
+    instance._stored_files = new
+
+
+@receiver(post_delete, sender=Post)
+def release_stored_files(sender, instance, **kwargs):
+    StoredFile.objects.release(
+        instance.stored_files(), instance.image.storage
+    )
+
+
+def _affects_pages(raw, update_fields):
+    # Вход пользователя сохраняет только last_login, страниц это не меняет.
+    return not raw and update_fields != frozenset({'last_login'})
+
+
+def remember_page_scopes(sender, instance, raw, update_fields, **kwargs):
+    # Старые категория, автор, slug или username ещё ссылаются на страницы,
+    # которые после сохранения перестанут совпадать с данными.
+    if _affects_pages(raw, update_fields) and not instance._state.adding:
+        instance._page_scopes = instance_page_scopes(instance)
+
+
+def invalidate_saved_pages(sender, instance, raw, update_fields, **kwargs):
+    if not _affects_pages(raw, update_fields):
+        return
+    scopes = getattr(instance, '_page_scopes', set())
+    invalidate_page_cache(*scopes, *instance_page_scopes(instance))
+
+
+def invalidate_deleted_pages(sender, instance, **kwargs):
+    invalidate_page_cache(*instance_page_scopes(instance))
+
+
+for model in PAGE_CACHE_SENDERS:
+    pre_save.connect(remember_page_scopes, sender=model)
+    post_save.connect(invalidate_saved_pages, sender=model)
+    pre_delete.connect(invalidate_deleted_pages, sender=model)
+
+
+def ensure_search_index_after_migrate(sender, using, **kwargs):
+    # В базе комментариев таблицы постов нет.
+    if router.allow_migrate_model(using, Post):
+        ensure_search_index(using)
@@ -0,0 +1,286 @@
+import gzip
+from hashlib import md5
+from io import StringIO
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count, F, Max
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import RFC3986_SUBDELIMS, http_date, quote_etag
+from django.utils.xmlutils import SimplerXMLGenerator
+from django.views import View
+
+from blog.models import Category, Post, User
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+KEYSET_BATCH = 2_000
+# Подходит под конвертеры int, slug и str.
+URL_MARKER = "1234567890"
+# Символы, которые reverse() оставляет в пути без кодирования.
+URL_SAFE = RFC3986_SUBDELIMS + "/~:@"
+
+
+class SitemapSection:
+    """Раздел карты сайта, нарезанный на куски по диапазонам pk.
+
+    Кусок i содержит объекты с pk из ((i - 1) * size, i * size], поэтому
+    URL в нём не больше size, а границы кусков не сдвигаются, когда
+    объекты появляются или исчезают в других кусках.
+    """
+
+    name = None
+    url_name = None
+    # Объекты раздела; зависящие от времени выборки задаёт get_queryset().
+    queryset = None
+    # Поле для lastmod; без него кусок зависит только от состава.
+    lastmod_field = None
+    # Первое поле — pk, последнее — аргумент url_name.
+    fields = ("pk",)
+
+    def get_queryset(self):
+        if self.queryset is None:
+            raise ImproperlyConfigured(
+                f"{type(self).__name__}: задайте queryset или "
+                "переопределите get_queryset()."
+            )
+        return self.queryset.all()
+
+    def url_builder(self, request):
+        """Функция строка → абсолютный адрес.
+
+        reverse() на каждую из десятков тысяч строк занимал большую
+        часть времени генерации куска, поэтому адрес собирается из
+        шаблона, полученного одним reverse().
+        """
+        path = reverse(self.url_name, args=[URL_MARKER])
+        prefix, _, suffix = path.rpartition(URL_MARKER)
+        prefix = request.build_absolute_uri(prefix)
+
+        def build(row):
+            value = quote(str(row[len(self.fields) - 1]), safe=URL_SAFE)
+            return f"{prefix}{value}{suffix}"
+        return build
+
+    def chunk_size(self):
+        return settings.BLOG_SITEMAP_CHUNK_SIZE
+
+    def chunk_bounds(self, chunk):
+        size = self.chunk_size()
+        return (chunk - 1) * size, chunk * size
+
+    def versions(self, chunk=None):
+        """Для каждого непустого куска: число объектов и lastmod."""
+        queryset = self.get_queryset().order_by()
+        if chunk is not None:
+            start, stop = self.chunk_bounds(chunk)
+            queryset = queryset.filter(pk__gt=start, pk__lte=stop)
+        aggregates = {"count": Count("pk")}
+        if self.lastmod_field:
+            aggregates["lastmod"] = Max(self.lastmod_field)
+        else:
+            aggregates["last_pk"] = Max("pk")
+        rows = (
+            queryset.annotate(chunk=(F("pk") - 1) / self.chunk_size() + 1)
+            .values("chunk")
+            .annotate(**aggregates)
+            .order_by("chunk")
+        )
+        return [
+            (
+                row["chunk"], row["count"],
+                row.get("lastmod"), row.get("last_pk"),
+            )
+            for row in rows
+        ]
+
+    def rows(self, chunk):
+        """Строки куска выборками по ключу, без OFFSET и моделей."""
+        start, stop = self.chunk_bounds(chunk)
+        columns = self.fields
+        if self.lastmod_field:
+            columns += (self.lastmod_field,)
+        queryset = (
+            self.get_queryset()
+            .filter(pk__lte=stop)
+            .order_by("pk")
+            .values_list(*columns)
+        )
+        last = start
+        while True:
+            batch = list(queryset.filter(pk__gt=last)[:KEYSET_BATCH])
+            yield from batch
+            if len(batch) < KEYSET_BATCH:
+                return
+            last = batch[-1][0]
+
+
+class PostSection(SitemapSection):
+    name = "posts"
+    url_name = "blog:post_detail"
+    lastmod_field = "updated_at"
+
+    def get_queryset(self):
+        return Post.objects.published()
+
+
+class CategorySection(SitemapSection):
+    name = "categories"
+    url_name = "blog:category_posts"
+    queryset = Category.objects.filter(is_published=True)
+    lastmod_field = "updated_at"
+    fields = ("pk", "slug")
+
+
+class ProfileSection(SitemapSection):
+    """Профили авторов опубликованных постов.
+
+    У пользователя нет даты изменения, поэтому переименование попадает
+    в карту не позже, чем истечёт BLOG_SITEMAP_CACHE_TIMEOUT.
+    """
+
+    name = "profiles"
+    url_name = "blog:profile"
+    fields = ("pk", "username")
+
+    def get_queryset(self):
+        return User.objects.filter(
+            pk__in=Post.objects.published().values("author_id")
+        )
+
+
+SECTIONS = {
+    section.name: section
+    for section in (PostSection(), CategorySection(), ProfileSection())
+}
+
+
+def _xml(write):
+    buffer = StringIO()
+    handler = SimplerXMLGenerator(buffer, "utf-8")
+    handler.startDocument()
+    write(handler)
+    return gzip.compress(buffer.getvalue().encode("utf-8"))
+
+
+def _lastmod(value):
+    return value.isoformat(timespec="seconds") if value else None
+
+
+def render_chunk(request, section, chunk):
+    build_url = section.url_builder(request)
+
+    def write(handler):
+        handler.startElement("urlset", {"xmlns": SITEMAP_NS})
+        for row in section.rows(chunk):
+            handler.startElement("url", {})
+            handler.addQuickElement("loc", build_url(row))
+            if section.lastmod_field:
+                handler.addQuickElement("lastmod", _lastmod(row[-1]))
+            handler.endElement("url")
+        handler.endElement("urlset")
+    return _xml(write)
+
+
+def render_index(request):
+    def write(handler):
+        handler.startElement("sitemapindex", {"xmlns": SITEMAP_NS})
+        for section in SECTIONS.values():
+            for chunk, _, lastmod, _ in section.versions():
+                handler.startElement("sitemap", {})
+                handler.addQuickElement("loc", request.build_absolute_uri(
+                    reverse("blog:sitemap_chunk", args=[section.name, chunk])
+                ))
+                if lastmod:
+                    handler.addQuickElement("lastmod", _lastmod(lastmod))
+                handler.endElement("sitemap")
+        handler.endElement("sitemapindex")
+    return _xml(write)
+
+
+class SitemapMixin:
+    """Ответ со сжатым XML из кэша.
+
+    Клиентам без поддержки gzip XML распаковывается.
+    """
+
+    query_budget = 2
+    db_time_budget = 100
+
+    @staticmethod
+    def accepts_gzip(request):
+        return "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+
+    def xml_response(self, request, content):
+        if self.accepts_gzip(request):
+            response = HttpResponse(content, content_type="application/xml")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(
+                gzip.decompress(content), content_type="application/xml"
+            )
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+
+class SitemapIndexView(SitemapMixin, View):
+    """Индекс карты сайта.
+
+    Состав кусков считается одним GROUP BY на раздел, поэтому индекс
+    кэшируется на BLOG_SITEMAP_INDEX_TIMEOUT.
+    """
+
+    query_budget = 4
+
+    def get(self, request):
+        key = f"sitemap:index:{request.get_host()}"
+        content = cache.get(key)
+        if content is None:
+            content = render_index(request)
+            cache.set(key, content, settings.BLOG_SITEMAP_INDEX_TIMEOUT)
+        return self.xml_response(request, content)
+
+
+class SitemapChunkView(SitemapMixin, View):
+    """Кусок карты сайта.
+
+    Версия куска — число объектов и их последний lastmod — считается
+    запросом по диапазону pk. Пока она не меняется, кусок берётся из
+    кэша или подтверждается ответом 304.
+    """
+
+    def get(self, request, section, chunk):
+        section = SECTIONS.get(section)
+        if section is None or chunk < 1:
+            raise Http404("Нет такого раздела карты сайта.")
+        versions = section.versions(chunk)
+        if not versions:
+            raise Http404("Кусок карты сайта пуст.")
+        version = repr((request.get_host(), section.chunk_size(), versions))
+        digest = md5(version.encode()).hexdigest()
+        # Сжатое и несжатое тела — разные представления: у них разные
+        # сильные ETag, иначе кэш мог бы отдать одно вместо другого.
+        if self.accepts_gzip(request):
+            etag = quote_etag(f"{digest}-gzip")
+        else:
+            etag = quote_etag(digest)
+        lastmod = versions[0][2]
+        last_modified = int(lastmod.timestamp()) if lastmod else None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            key = f"sitemap:{section.name}:{chunk}:{digest}"
+            content = cache.get(key)
+            if content is None:
+                content = render_chunk(request, section, chunk)
+                cache.set(key, content, settings.BLOG_SITEMAP_CACHE_TIMEOUT)
+            response = self.xml_response(request, content)
+        patch_vary_headers(response, ("Accept-Encoding",))
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
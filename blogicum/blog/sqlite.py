@@ -0,0 +1,75 @@
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+
+logger = logging.getLogger("blog.sqlite")
+
+LOCK_MESSAGES = ("database is locked", "database table is locked")
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Выполняет BLOG_SQLITE_PRAGMAS на каждом новом соединении SQLite.
+
+    Подключается к сигналу connection_created в BlogConfig.ready().
+    Порядок важен: busy_timeout задаётся первым, чтобы переключение
+    journal_mode подождало чужую блокировку, а не упало сразу.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.BLOG_SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def is_lock_error(error):
+    return isinstance(error, OperationalError) and any(
+        message in str(error) for message in LOCK_MESSAGES
+    )
+
+
+def begin_immediate(execute, sql, params, many, context):
+    """Открывает транзакцию SQLite сразу с блокировкой на запись.
+
+    Django начинает транзакцию обычным BEGIN, и она становится пишущей
+    только на первом INSERT. Если к этому моменту другое соединение уже
+    что-то записало, SQLite сразу отвечает SQLITE_BUSY, не дожидаясь
+    busy_timeout. BEGIN IMMEDIATE ждёт блокировку в самом начале.
+    """
+    if sql == "BEGIN":
+        sql = "BEGIN IMMEDIATE"
+    return execute(sql, params, many, context)
+
+
+def retry_on_lock(func, using="default"):
+    """Выполняет func в пишущей транзакции и повторяет её при блокировке.
+
+    Транзакция начинается с BEGIN IMMEDIATE (см. begin_immediate), так
+    что конкурирующие записи ждут друг друга по busy_timeout. Если
+    ожидание не уложилось в таймаут, остаются откат и повтор. Паузы
+    растут экспоненциально
+    от BLOG_SQLITE_LOCK_BACKOFF секунд со случайным разбросом, чтобы
+    столкнувшиеся запросы не повторялись одновременно.
+
+    Внутри внешней транзакции повтор невозможен, и func вызывается один
+    раз. BLOG_SQLITE_LOCK_RETRIES = 0 отключает и повторы, и транзакцию.
+    """
+    connection = connections[using]
+    attempts = settings.BLOG_SQLITE_LOCK_RETRIES + 1
+    if attempts <= 1 or connection.in_atomic_block:
+        return func()
+    for attempt in range(attempts):
+        try:
+            with connection.execute_wrapper(begin_immediate):
+                with transaction.atomic(using=using):
+                    return func()
+        except OperationalError as error:
+            if not is_lock_error(error) or attempt == attempts - 1:
+                raise
+            delay = settings.BLOG_SQLITE_LOCK_BACKOFF * 2 ** attempt
+            logger.warning(
+                "%s, повтор %d через %.3f с", error, attempt + 1, delay
+            )
+            time.sleep(delay * random.uniform(0.5, 1.5))
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, get_storage_class
+
+
+def post_image_storage():
+    return get_storage_class(settings.BLOG_IMAGE_STORAGE)()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, называющее файлы по SHA-256 содержимого.
+
+    Файл сохраняется как <каталог>/ab/cd/abcd…<расширение>: каталог берётся
+    из upload_to, а вложенные шарды не дают одной директории разрастись.
+    Хэш считается по кускам прямо при записи во временный файл, а
+    одинаковое содержимое хранится один раз. Удалять файлы нужно через
+    StoredFile.objects.release(), который ведёт счётчик ссылок.
+    """
+
+    hash_name = "sha256"
+    shard_width = 2
+    shard_depth = 2
+    temp_dir = "tmp"
+
+    def get_available_name(self, name, max_length=None):
+        # Итоговое имя зависит только от содержимого, см. _save().
+        return name
+
+    def hashed_name(self, directory, digest, extension):
+        shards = [
+            digest[i * self.shard_width:(i + 1) * self.shard_width]
+            for i in range(self.shard_depth)
+        ]
+        parts = [directory] if directory else []
+        return "/".join(parts + shards + [digest + extension])
+
+    def is_hashed(self, name):
+        shards = r"[0-9a-f]{%d}/" % self.shard_width * self.shard_depth
+        return re.search(
+            rf"(^|/){shards}[0-9a-f]{{64}}(\.\w+)?$", name
+        ) is not None
+
+    def _save(self, name, content):
+        directory, basename = os.path.split(name)
+        extension = os.path.splitext(basename)[1].lower()
+        temp_dir = self.path(self.temp_dir)
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir, suffix=extension)
+        digest = hashlib.new(self.hash_name)
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            name = self.hashed_name(
+                directory.replace("\\", "/"), digest.hexdigest(), extension
+            )
+            full_path = self.path(name)
+            if self.directory_permissions_mode is not None:
+                old_umask = os.umask(0)
+                try:
+                    os.makedirs(
+                        os.path.dirname(full_path),
+                        self.directory_permissions_mode,
+                        exist_ok=True,
+                    )
+                finally:
+                    os.umask(old_umask)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            self._publish(temp_path, full_path, name)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        return name
+
+    def _publish(self, temp_path, full_path, name):
+        from blog.models import StoredFile
+
+        while True:
+            try:
+                # link() атомарно отказывает, если такое содержимое уже есть.
+                os.link(temp_path, full_path)
+            except FileExistsError:
+                pass
+            except OSError:
+                # Файловая система без жёстких ссылок: перезапись тем же
+                # содержимым безопасна, а временный файл нужен для повтора.
+                spare = f"{temp_path}.copy"
+                shutil.copyfile(temp_path, spare)
+                os.replace(spare, full_path)
+            # Файл могли удалить как ненужный до того, как загрузка его
+            # заявила; после заявки discard() его уже не тронет.
+            StoredFile.objects.claim(name)
+            if os.path.exists(full_path):
+                break
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
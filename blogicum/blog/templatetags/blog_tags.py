@@ -0,0 +1,23 @@
+from django import template
+from django.utils.html import format_html_join
+from django.utils.safestring import mark_safe
+
+from blog.cache import render_post_cards
+from blog.search import highlight as highlight_matches
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    return format_html_join(
+        "\n",
+        '<article class="mb-5">{}</article>',
+        ((mark_safe(card),) for card in render_post_cards(list(posts))),
+    )
+
+
+@register.filter
+def highlight(snippet):
+    """Выделяет совпадения в сниппете поиска тегом <mark>."""
+    return highlight_matches(snippet)
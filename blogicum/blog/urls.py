@@ -1,21 +1,46 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, async_views, feeds, sitemaps, views
 
 app_name: str = "blog"
 
+# Страницы для чтения, у которых есть асинхронные варианты.
+read_views = async_views if settings.BLOG_ASYNC_VIEWS else views
+
 urlpatterns: list = [
-    path("", views.PostListView.as_view(), name="index"),
+    path("", read_views.PostListView.as_view(), name="index"),
+    path("search/", views.PostSearchView.as_view(), name="search"),
+    path(
+        "sitemap.xml",
+        sitemaps.SitemapIndexView.as_view(),
+        name="sitemap"
+    ),
+    path(
+        "sitemap-<slug:section>-<int:chunk>.xml",
+        sitemaps.SitemapChunkView.as_view(),
+        name="sitemap_chunk",
+    ),
+    path(
+        "feeds/<str:feed_format>/",
+        feeds.PostFeedView.as_view(),
+        name="feed"
+    ),
     path(
         "posts/<int:pk>/",
-        views.PostDetailView.as_view(),
+        read_views.PostDetailView.as_view(),
         name="post_detail"
     ),
     path(
         "category/<slug:category_slug>/",
-        views.CategoryListView.as_view(),
+        read_views.CategoryListView.as_view(),
         name="category_posts",
     ),
+    path(
+        "category/<slug:category_slug>/feeds/<str:feed_format>/",
+        feeds.CategoryFeedView.as_view(),
+        name="category_feed",
+    ),
     path(
         "posts/create/",
         views.PostCreateEditView.as_view(),
@@ -28,9 +53,14 @@ urlpatterns: list = [
     ),
     path(
         "profile/<str:username>/",
-        views.UserProfileView.as_view(),
+        read_views.UserProfileView.as_view(),
         name="profile"
     ),
+    path(
+        "profile/<str:username>/feeds/<str:feed_format>/",
+        feeds.AuthorFeedView.as_view(),
+        name="author_feed",
+    ),
     path(
         "edit_profile/",
         views.UserEditProfileView.as_view(),
@@ -41,6 +71,11 @@ urlpatterns: list = [
         views.PostDeleteView.as_view(),
         name="delete_post",
     ),
+    path(
+        "posts/<int:pk>/comments/",
+        views.PostCommentsView.as_view(),
+        name="post_comments",
+    ),
     path(
         "posts/<int:pk>/comment/",
         views.CommentCreateView.as_view(),
@@ -56,4 +91,35 @@ urlpatterns: list = [
         views.CommentDeleteView.as_view(),
         name="delete_comment",
     ),
+    path("api/posts/", api.PostListApiView.as_view(), name="api_posts"),
+    path(
+        "api/posts/<int:pk>/",
+        api.PostApiView.as_view(),
+        name="api_post"
+    ),
+    path(
+        "api/posts/<int:pk>/comments/",
+        api.PostCommentListApiView.as_view(),
+        name="api_post_comments",
+    ),
+    path(
+        "api/categories/",
+        api.CategoryListApiView.as_view(),
+        name="api_categories",
+    ),
+    path(
+        "api/categories/<slug:category_slug>/posts/",
+        api.CategoryPostListApiView.as_view(),
+        name="api_category_posts",
+    ),
+    path(
+        "api/authors/<str:username>/posts/",
+        api.AuthorPostListApiView.as_view(),
+        name="api_author_posts",
+    ),
+    path(
+        "api/locations/",
+        api.LocationListApiView.as_view(),
+        name="api_locations",
+    ),
 ]
@@ -1,3 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import (
+    close_old_connections,
+    connections,
+    router,
+    transaction
+)
+from django.db.models import Max
 from django.shortcuts import get_object_or_404
 from django.views.generic.detail import SingleObjectTemplateResponseMixin
 from django.views.generic.edit import ModelFormMixin, ProcessFormView
@@ -24,3 +37,81 @@ class CreateUpdateView(
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
+
+
+def next_id(model):
+    """Первичный ключ, свободный для вставки с явными id."""
+    return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+
+def bulk_insert(model, objects, batch_size=None):
+    """bulk_create, который сохраняет заданные заранее даты создания.
+
+    bulk_create вызывает pre_save(add=True), и auto_now_add затёр бы
+    created_at. Строки вставляются как в loaddata, без pre_save: даты
+    auto_now и пустые даты auto_now_add заполняются здесь. Первичные
+    ключи объектов должны быть заданы.
+    """
+    using = router.db_for_write(model)
+    fields = model._meta.concrete_fields
+    for obj in objects:
+        for field in fields:
+            if getattr(field, "auto_now", False) or (
+                getattr(field, "auto_now_add", False)
+                and getattr(obj, field.attname) is None
+            ):
+                field.pre_save(obj, add=True)
+    max_batch_size = connections[using].ops.bulk_batch_size(fields, objects)
+    batch_size = min(batch_size or max_batch_size, max(max_batch_size, 1))
+    queryset = model._base_manager.using(using)
+    with transaction.atomic(using=using, savepoint=False):
+        for start in range(0, len(objects), batch_size):
+            queryset._insert(
+                objects[start:start + batch_size], fields=fields, raw=True
+            )
+    for obj in objects:
+        obj._state.adding = False
+        obj._state.db = using
+
+
+_db_executor = None
+
+
+def get_db_executor():
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(
+            max_workers=settings.BLOG_ASYNC_DB_WORKERS,
+            thread_name_prefix="blog-db",
+        )
+    return _db_executor
+
+
+def _run_db_job(func, recorder):
+    with ExitStack() as stack:
+        if recorder is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+        try:
+            return func()
+        finally:
+            # Сигнал request_finished закрывает соединения только в своём
+            # потоке, поэтому потоки пула следят за CONN_MAX_AGE сами.
+            close_old_connections()
+
+
+async def run_db(request, func, *args, **kwargs):
+    """Выполняет синхронную работу с ORM в ограниченном пуле потоков.
+
+    С thread_sensitive=True задачи всех запросов выстраивались бы в
+    очередь к одному потоку; здесь они идут параллельно, а число
+    одновременно открытых соединений ограничено BLOG_ASYNC_DB_WORKERS.
+    Запросы к БД попадают в QueryRecorder запроса, если он есть.
+    """
+    job = sync_to_async(
+        _run_db_job, thread_sensitive=False, executor=get_db_executor()
+    )
+    return await job(
+        partial(func, *args, **kwargs),
+        getattr(request, "query_recorder", None),
+    )
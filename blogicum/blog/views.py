@@ -1,8 +1,6 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
-from django.utils import timezone
 from django.views.generic import (
     CreateView,
     DeleteView,
@@ -12,31 +10,49 @@ from django.views.generic import (
 )
 
 from blog.constants import (
+    CURSOR_PARAM,
+    PAGINATE,
     POST_DETAIL_URL,
-    PROFILE_URL
+    PROFILE_URL,
+    SEARCH_PARAM
 )
 from blog.mixins import (
     CommentMixin,
+    ConditionalGetMixin,
     ListingMixin,
+    LockRetryMixin,
+    PostCommentsMixin,
     PostEditDispatchMixin,
     PostFieldsMixin
 )
 from blog.forms import CommentForm, PostForm, UserEditForm
+from blog.images import schedule_image_variants
 from blog.models import Category, Post, User
+from blog.search import search_posts
 from blog.utils import CreateUpdateView
 
 
 class PostCreateEditView(
     LoginRequiredMixin,
+    LockRetryMixin,
     PostFieldsMixin,
     PostEditDispatchMixin,
     CreateUpdateView
 ):
     form_class = PostForm
+    query_budget = 10
+    db_time_budget = 100
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        image_changed = "image" in form.changed_data
+        if image_changed:
+            # Копии прежней картинки к новой не подходят.
+            form.instance.image_info = {}
+        response = super().form_valid(form)
+        if image_changed and self.object.image:
+            schedule_image_variants(self.object)
+        return response
 
     def get_success_url(self, *args, **kwargs):
         return reverse(PROFILE_URL, args=[self.request.user.username])
@@ -44,11 +60,15 @@ class PostCreateEditView(
 
 class PostDeleteView(
     LoginRequiredMixin,
+    LockRetryMixin,
     PostFieldsMixin,
     PostEditDispatchMixin,
     DeleteView
 ):
 
+    query_budget = 10
+    db_time_budget = 100
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["form"] = PostForm(instance=self.object)
@@ -58,73 +78,107 @@ class PostDeleteView(
 class PostListView(ListingMixin, ListView):
 
     template_name = "blog/index.html"
-    queryset = (
-        Post.objects.select_related("location", "author", "category")
-        .filter(
-            pub_date__lte=timezone.now(),
-            is_published=True,
-            category__is_published=True
-        ).annotate(comment_count=Count("comments"))
-    )
+    query_budget = 6
+    db_time_budget = 50
+
+    def get_queryset(self):
+        return super().get_queryset().published().select_related(
+            "location", "author", "category"
+        )
 
 
 class CategoryListView(ListingMixin, ListView):
 
     template_name = "blog/category.html"
+    query_budget = 8
+    db_time_budget = 50
+
+    def get_category(self):
+        # Категория нужна и валидаторам, и самой странице.
+        if not hasattr(self, "category"):
+            self.category = get_object_or_404(
+                Category, slug=self.kwargs["category_slug"], is_published=True
+            )
+        return self.category
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        category = get_object_or_404(
-            Category, slug=self.kwargs["category_slug"], is_published=True
-        )
         return (
-            queryset.select_related("category", "author", "location")
-            .filter(
-                pub_date__lte=timezone.now(),
-                category=category,
-                is_published=True
-            )
-            .annotate(comment_count=Count("comments"))
+            super().get_queryset()
+            .select_related("category", "author", "location")
+            .filter(category=self.get_category())
+            .published()
         )
 
+    def get_extra_validator_rows(self):
+        return [(self.get_category().updated_at,)]
+
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["category"] = get_object_or_404(
-            Category, slug=self.kwargs["category_slug"], is_published=True
-        )
+        context["category"] = self.category
         return context
 
 
 class UserProfileView(ListingMixin, ListView):
 
     template_name = "blog/profile.html"
+    query_budget = 8
+    db_time_budget = 50
+
+    def get_author(self):
+        if not hasattr(self, "author"):
+            self.author = get_object_or_404(
+                User, username=self.kwargs["username"]
+            )
+        return self.author
 
     def get_queryset(self):
-        author = get_object_or_404(User, username=self.kwargs["username"])
-        queryset = super().get_queryset().filter(author=author).annotate(
-            comment_count=Count('comments')
-        ).select_related("author")
+        author = self.get_author()
+        queryset = super().get_queryset().filter(
+            author=author
+        ).select_related("author", "category", "location")
         if author.id != self.request.user.id:
-            queryset = queryset.filter(
-                is_published=True,
-                category__is_published=True,
-                pub_date__lte=timezone.now()
-            )
+            queryset = queryset.published()
         return queryset
 
+    def get_extra_validator_rows(self):
+        author = self.get_author()
+        return [(author.username, author.get_full_name(), author.is_staff)]
+
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["profile"] = get_object_or_404(
-            User,
-            username=self.kwargs["username"]
+        context["profile"] = self.author
+        return context
+
+
+class PostSearchView(ListView):
+    """Полнотекстовый поиск по опубликованным постам."""
+
+    template_name = "blog/search.html"
+    paginate_by = PAGINATE
+    query_budget = 6
+    db_time_budget = 100
+
+    def get_queryset(self):
+        self.query = self.request.GET.get(SEARCH_PARAM, "").strip()
+        return search_posts(
+            Post.objects.published().select_related(
+                "author", "category", "location"
+            ),
+            self.query
         )
+
+    def get_context_data(self, *, object_list=None, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["query"] = self.query
         return context
 
 
-class UserEditProfileView(LoginRequiredMixin, UpdateView):
+class UserEditProfileView(LoginRequiredMixin, LockRetryMixin, UpdateView):
     model = User
     template_name = "blog/user.html"
     form_class = UserEditForm
+    query_budget = 6
+    db_time_budget = 50
 
     def get_object(self, queryset=None):
         return self.request.user
@@ -135,33 +189,55 @@ class UserEditProfileView(LoginRequiredMixin, UpdateView):
             kwargs={'username': self.request.user.username})
 
 
-class PostDetailView(DetailView):
+class PostDetailView(ConditionalGetMixin, PostCommentsMixin, DetailView):
 
     model = Post
     template_name = "blog/detail.html"
+    query_budget = 8
+    db_time_budget = 50
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm(instance=self.object)
-        context['comments'] = (
-            self.object.comments.all().select_related('author')
-        )
+        context['comments'] = self.get_comments_page(self.object)
         return context
 
+    def get_queryset(self):
+        return self.get_post_queryset()
+
+    def get_object(self, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
+        return get_object_or_404(queryset, id=self.kwargs['pk'])
+
+
+class PostCommentsView(PostCommentsMixin, DetailView):
+    """Следующие страницы комментариев фрагментом HTML."""
+
+    model = Post
+    template_name = "includes/comment_list.html"
+    query_budget = 4
+    db_time_budget = 50
+
     def get_object(self, queryset=None):
         return get_object_or_404(
-            Post,
-            (Q(pub_date__lte=timezone.now()) &
-            Q(is_published=True) &
-            Q(category__is_published=True) &
-            Q(id=self.kwargs['pk'])) |
-            (Q(author=self.request.user) &
-            Q(id=self.kwargs['pk']))
-            )
-        
+            self.get_post_queryset().only("id"), id=self.kwargs["pk"]
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["comments"] = self.get_comments_page(
+            self.object, self.request.GET.get(CURSOR_PARAM)
+        )
+        return context
 
 
-class CommentCreateView(LoginRequiredMixin, CommentMixin, CreateView):
+class CommentCreateView(
+    LoginRequiredMixin, LockRetryMixin, CommentMixin, CreateView
+):
+    query_budget = 8
+    db_time_budget = 100
+
     def form_valid(self, form):
         post = get_object_or_404(
             Post, id=self.kwargs["pk"]
@@ -174,13 +250,23 @@ class CommentCreateView(LoginRequiredMixin, CommentMixin, CreateView):
         return reverse(POST_DETAIL_URL, kwargs=self.kwargs)
 
 
-class CommentUpdateView(LoginRequiredMixin, CommentMixin, UpdateView):
+class CommentUpdateView(
+    LoginRequiredMixin, LockRetryMixin, CommentMixin, UpdateView
+):
+    query_budget = 8
+    db_time_budget = 100
+
     def get_success_url(self):
         post = get_object_or_404(Post, id=self.kwargs["post_id"])
         return reverse(POST_DETAIL_URL, kwargs={"pk": post.pk})
 
 
-class CommentDeleteView(LoginRequiredMixin, CommentMixin, DeleteView):
+class CommentDeleteView(
+    LoginRequiredMixin, LockRetryMixin, CommentMixin, DeleteView
+):
+    query_budget = 8
+    db_time_budget = 100
+
     def get_success_url(self):
         post = get_object_or_404(Post, id=self.kwargs["post_id"])
         return reverse(POST_DETAIL_URL, kwargs={"pk": post.pk})
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+# Под ASGI страницы для чтения обслуживают асинхронные представления.
+os.environ.setdefault('BLOG_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
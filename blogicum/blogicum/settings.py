@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 
@@ -24,10 +25,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.middleware.AnonymousPageCacheMiddleware',
+    'blog.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -58,6 +62,71 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Постоянные соединения: PRAGMA выполняются один раз, а кэш
+        # страниц SQLite переживает запрос.
+        'CONN_MAX_AGE': 60,
+    }
+}
+
+# Реплики для чтения (см. blog.replicas): BLOG_READ_REPLICAS=N в окружении
+# добавляет N копий основной базы, которые обновляет команда
+# sync_replicas. В тестах реплики отражают основную базу.
+BLOG_READ_REPLICAS = [
+    f'replica{number}'
+    for number in range(1, int(os.environ.get('BLOG_READ_REPLICAS', 0)) + 1)
+]
+DATABASES.update({
+    alias: {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / f'db.{alias}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+    for alias in BLOG_READ_REPLICAS
+})
+# Отдельная база для комментариев (см. blog.routers.CommentRouter):
+# BLOG_SPLIT_COMMENTS=1 в окружении выносит их в db.comments.sqlite3,
+# и вставки комментариев не ждут блокировку основной базы.
+BLOG_COMMENTS_DATABASE = (
+    'comments' if os.environ.get('BLOG_SPLIT_COMMENTS') == '1' else 'default'
+)
+if BLOG_COMMENTS_DATABASE != 'default':
+    DATABASES[BLOG_COMMENTS_DATABASE] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / f'db.{BLOG_COMMENTS_DATABASE}.sqlite3',
+    }
+DATABASE_ROUTERS = [
+    'blog.routers.CommentRouter',
+    'blog.routers.ReplicaRouter',
+]
+# Модули представлений, чьи GET-запросы читают с реплик; реплики старше
+# BLOG_REPLICA_MAX_LAG секунд не используются. После записи пользователь
+# BLOG_REPLICA_STICKY_SECONDS секунд читает только снимки новее записи.
+BLOG_REPLICA_VIEW_MODULES = ('blog.views', 'blog.async_views')
+BLOG_REPLICA_MAX_LAG = 30
+BLOG_REPLICA_STICKY_SECONDS = 60
+BLOG_REPLICA_STICKY_COOKIE = 'blog_primary'
+BLOG_REPLICA_SYNC_INTERVAL = 5
+
+# PRAGMA для каждого нового соединения SQLite (см. blog.sqlite). WAL
+# позволяет читать во время записи, synchronous=NORMAL в WAL безопасен
+# при падении процесса, cache_size задан в КиБ (отрицательное число),
+# mmap_size — в байтах.
+BLOG_SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+# Пишущие представления повторяют транзакцию при «database is locked»:
+# число повторов и первая пауза (секунды), дальше она удваивается.
+BLOG_SQLITE_LOCK_RETRIES = 3
+BLOG_SQLITE_LOCK_BACKOFF = 0.05
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
@@ -97,10 +166,92 @@ STATICFILES_DIRS = [
 MEDIA_ROOT = BASE_DIR / 'media/'
 MEDIA_URL = '/media/'
 
+# Картинки публикаций хранятся по хэшу содержимого с дедупликацией.
+BLOG_IMAGE_STORAGE = 'blog.storage.ContentAddressedStorage'
+# Сколько секунд заявка загрузки (StoredFile.claimed_at) защищает файл
+# от удаления, пока на него не добавлена ссылка.
+BLOG_STORED_FILE_CLAIM_TTL = 600
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 POST_COUNT = 5
 
+# Keyset-пагинация лент; ?page=N продолжает работать как запасной вариант.
+BLOG_CURSOR_PAGINATION = False
+
+# Граница pub_date в лентах округляется до кванта (секунды), а флаг
+# Post.is_visible открывается заранее на время упреждения (секунды).
+BLOG_VISIBILITY_QUANTUM = 30
+BLOG_VISIBILITY_LOOKAHEAD = 300
+
+# Воркер run_publication_scheduler: включён ли он (тогда TTL страниц не
+# подстраивается под ближайшую публикацию), на сколько секунд вперёд он
+# читает очередь, как часто перечитывает её и с каким Host прогревает
+# страницы (None — только карточки).
+BLOG_PUBLICATION_SCHEDULER = False
+BLOG_PUBLICATION_WINDOW = 60 * 60
+BLOG_PUBLICATION_POLL = 30
+BLOG_PUBLICATION_WARM_HOST = None
+
+# Время жизни закэшированной карточки поста (секунды).
+BLOG_POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Кэш страниц для анонимных читателей: время жизни (секунды) и имена
+# кэшируемых представлений.
+BLOG_PAGE_CACHE_TIMEOUT = 60 * 5
+BLOG_PAGE_CACHE_VIEWS = (
+    'blog:index',
+    'blog:category_posts',
+    'blog:post_detail',
+    'blog:post_comments',
+)
+
+# RSS- и Atom-ленты: число записей и время жизни закэшированной ленты
+# (секунды).
+BLOG_FEED_SIZE = 50
+BLOG_FEED_CACHE_TIMEOUT = 60 * 60
+
+# Карта сайта: URL в одном куске (не больше 50 000 по протоколу), время
+# жизни индекса и кусков (секунды). Ключ куска включает его версию.
+BLOG_SITEMAP_CHUNK_SIZE = 50_000
+BLOG_SITEMAP_INDEX_TIMEOUT = 60 * 5
+BLOG_SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Уменьшенные копии Post.image: ширины (px), ширина картинки в карточке
+# ленты и число фоновых потоков. Без фона копии строятся прямо в запросе.
+BLOG_IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+BLOG_IMAGE_THUMBNAIL_WIDTH = 640
+BLOG_IMAGE_WORKERS = 2
+BLOG_IMAGE_VARIANTS_IN_BACKGROUND = True
+
+# Асинхронные страницы для чтения (blog.async_views). Их включает
+# blogicum.asgi; работа с ORM идёт в пуле из BLOG_ASYNC_DB_WORKERS потоков.
+BLOG_ASYNC_VIEWS = os.environ.get('BLOG_ASYNC_VIEWS') == '1'
+BLOG_ASYNC_DB_WORKERS = 8
+
+# Доля запросов, для которых QueryBudgetMiddleware собирает статистику.
+BLOG_QUERY_BUDGET_SAMPLE_RATE = 1.0 if DEBUG else 0.01
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'blog.query_budget': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'blog.images': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
 LOGIN_REDIRECT_URL = 'blog:index'
 LOGIN_URL = 'login'
 
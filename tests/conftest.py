@@ -19,6 +19,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -41,6 +42,42 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Откат транзакции теста не шлёт сигналов, поэтому кэш страниц
+    # и карточек очищается явно.
+    cache.clear()
+    yield
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    # Загрузки, копии картинок и временные файлы хранилища не должны
+    # оставаться в blogicum/media.
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    # Тестовая база comments создаётся вместе с остальными и без
+    # BLOG_SPLIT_COMMENTS=1: в неё пишут тесты с фикстурой split_comments.
+    # Реплика replica1 отражает основную базу, как реплики из настроек.
+    from django.conf import settings
+
+    default = settings.DATABASES["default"]
+    settings.DATABASES.setdefault("comments", {
+        **default,
+        "NAME": Path(default["NAME"]).with_name("db.comments.sqlite3"),
+        "TEST": dict(default.get("TEST", {})),
+    })
+    settings.DATABASES.setdefault("replica1", {
+        **default,
+        "NAME": Path(default["NAME"]).with_name("db.replica1.sqlite3"),
+        "TEST": {**default.get("TEST", {}), "MIRROR": "default"},
+    })
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -367,3 +404,13 @@ def cleanup(request):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
                     os.remove(file_path)
+
+    # Хранилище раскладывает файлы по каталогам posts/xx/yy и пишет
+    # через tmp: опустевшие после очистки каталоги тоже удаляются.
+    for root, dirs, files in os.walk(image_dir, topdown=False):
+        if (
+                root != str(image_dir)
+                and not os.listdir(root)
+                and os.path.getmtime(root) >= start_time
+        ):
+            os.rmdir(root)
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts(mixer, user, published_category):
+    now = timezone.now()
+    return [
+        mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            is_published=True, pub_date=now - timedelta(days=day),
+        )
+        for day in range(1, 4)
+    ]
+
+
+def _ids(response):
+    return [item["id"] for item in response.json()["results"]]
+
+
+def test_post_list_pages_by_cursor(client, posts):
+    response = client.get("/api/posts/?limit=2")
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert _ids(response) == [posts[0].id, posts[1].id], (
+        "Убедитесь, что `/api/posts/` отдаёт посты от новых к старым."
+    )
+    assert set(data["results"][0]) >= {
+        "title", "text", "pub_date", "author", "category"
+    }
+    assert data["previous"] is None and data["next"]
+    second = client.get(data["next"])
+    assert _ids(second) == [posts[2].id], (
+        "Убедитесь, что ссылка `next` ведёт на следующую страницу."
+    )
+    assert second.json()["next"] is None
+
+
+def test_sparse_fields_limit_columns(client, posts):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/api/posts/?fields=id,title")
+    assert set(response.json()["results"][0]) == {"id", "title"}, (
+        "Убедитесь, что параметр `fields` ограничивает поля ответа."
+    )
+    sql = next(
+        query["sql"] for query in queries.captured_queries
+        if '"blog_post"."title"' in query["sql"]
+    )
+    assert '"blog_post"."text"' not in sql, (
+        "Убедитесь, что `fields` ограничивает и выбираемые столбцы."
+    )
+    assert client.get("/api/posts/?fields=password").status_code == (
+        HTTPStatus.BAD_REQUEST
+    )
+
+
+def test_visibility_matches_html_views(
+        client, user_client, user, mixer, posts, published_category):
+    hidden = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False,
+    )
+    assert hidden.id not in _ids(client.get("/api/posts/"))
+    assert hidden.id not in _ids(
+        client.get(f"/api/categories/{published_category.slug}/posts/")
+    )
+    assert hidden.id not in _ids(
+        client.get(f"/api/authors/{user.username}/posts/")
+    )
+    assert hidden.id in _ids(
+        user_client.get(f"/api/authors/{user.username}/posts/")
+    ), "Убедитесь, что автор видит в API свои неопубликованные посты."
+    assert client.get(f"/api/posts/{hidden.id}/").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    assert user_client.get(f"/api/posts/{hidden.id}/").json()["id"] == (
+        hidden.id
+    )
+
+
+def test_comments_categories_and_locations(
+        client, mixer, another_user, posts, published_category):
+    comments = mixer.cycle(3).blend(
+        "blog.Comment", post=posts[0], author=another_user
+    )
+    response = client.get(f"/api/posts/{posts[0].id}/comments/?limit=2")
+    assert _ids(response) == [comments[0].id, comments[1].id], (
+        "Убедитесь, что комментарии в API идут от старых к новым."
+    )
+    assert response.json()["results"][0]["author"] == another_user.username
+    assert _ids(client.get(response.json()["next"])) == [comments[2].id]
+
+    mixer.blend("blog.Category", is_published=False)
+    categories = client.get("/api/categories/").json()["results"]
+    assert [category["slug"] for category in categories] == [
+        published_category.slug
+    ]
+    assert client.get("/api/locations/").status_code == HTTPStatus.OK
+
+
+def test_api_is_read_only(user_client, posts):
+    response = user_client.post("/api/posts/")
+    assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
+    assert "detail" in response.json()
+    assert "только для чтения" in response.content.decode(), (
+        "Убедитесь, что ошибки API, как и ответы, не экранируют кириллицу."
+    )
@@ -0,0 +1,102 @@
+from contextlib import contextmanager
+from datetime import timedelta
+from http import HTTPStatus
+from importlib import reload
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, override_settings
+from django.urls import clear_url_caches
+from django.utils import timezone
+
+# Пул run_db открывает свои соединения и не видит незакоммиченных данных.
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@contextmanager
+def async_views():
+    import blog.urls
+    import blogicum.urls
+
+    def load_urls():
+        reload(blog.urls)
+        reload(blogicum.urls)
+        clear_url_caches()
+
+    try:
+        with override_settings(BLOG_ASYNC_VIEWS=True):
+            load_urls()
+            yield
+    finally:
+        load_urls()
+
+
+def _get(client, url, **headers):
+    # AsyncClient в Django 3.2 передаёт extra как имена заголовков.
+    async def get():
+        return await client.get(url, **headers)
+    return async_to_sync(get)()
+
+
+def _urls(post):
+    return [
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+        f"/posts/{post.id}/",
+    ]
+
+
+def test_async_pages_match_sync(
+        client, user, mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post, author=user)
+    expected = {}
+    for url in _urls(post):
+        response = client.get(url)
+        expected[url] = response["ETag"], response.content
+    # Иначе анонимные страницы отдал бы кэш, сохранённый синхронными.
+    cache.clear()
+    async_client = AsyncClient()
+    with async_views():
+        for url in _urls(post):
+            response = _get(async_client, url)
+            assert response.status_code == HTTPStatus.OK, url
+            assert response["ETag"] == expected[url][0], (
+                f"Убедитесь, что асинхронная страница `{url}` отдаёт тот же"
+                " ETag, что и синхронная."
+            )
+            assert post.title in response.content.decode("utf-8")
+            revalidated = _get(
+                async_client, url, **{"If-None-Match": response["ETag"]}
+            )
+            assert revalidated.status_code == HTTPStatus.NOT_MODIFIED, (
+                f"Убедитесь, что асинхронная страница `{url}` отвечает 304."
+            )
+
+
+def test_async_visibility_and_missing_objects(
+        user, mixer, published_category, post_with_published_location):
+    draft = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(days=1),
+    )
+    anonymous, author = AsyncClient(), AsyncClient()
+    author.force_login(user)
+    with async_views():
+        profile = f"/profile/{user.username}/"
+        assert draft.title not in _get(anonymous, profile).content.decode()
+        assert draft.title in _get(author, profile).content.decode(), (
+            "Убедитесь, что автор видит свои отложенные посты и в"
+            " асинхронном профиле."
+        )
+        for url in (
+            f"/posts/{draft.id}/",
+            "/category/no-such-category/",
+            "/profile/no-such-user/",
+        ):
+            assert _get(anonymous, url).status_code == HTTPStatus.NOT_FOUND
+        assert _get(author, f"/posts/{draft.id}/").status_code == (
+            HTTPStatus.OK
+        )
@@ -0,0 +1,54 @@
+import pytest
+
+from benchmarks.concurrency import load_asgi, load_wsgi
+from benchmarks.routes import SCENARIOS, uncovered_url_names
+from benchmarks.runner import compare, percentile, run
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_every_route_has_scenario():
+    assert not uncovered_url_names(), (
+        "Добавьте в `benchmarks/routes.py` сценарии для новых маршрутов."
+    )
+
+
+def test_run_reports_latency_and_queries(
+        mixer, another_user, post_with_published_location):
+    mixer.blend(
+        "blog.Comment", post=post_with_published_location,
+        author=another_user,
+    )
+    report = run(
+        SCENARIOS, "test", iterations=3, warmup=0, alloc_iterations=1
+    )
+    assert set(report["results"]) == {s.name for s in SCENARIOS}
+    for result in report["results"].values():
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["peak_alloc_kib"] is not None
+    assert report["meta"]["posts"] == 1
+
+
+def test_compare_flags_regressions():
+    assert percentile([1, 2, 3, 4], 0.5) == 2
+    baseline = {"results": {"index": {"p95_ms": 10.0, "queries": 4}}}
+    slower = {"results": {"index": {"p95_ms": 12.0, "queries": 5}}}
+    assert len(compare(baseline, slower, threshold=0.1)) == 2
+    assert not compare(baseline, baseline)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrency_load_counts_every_request():
+    from django.core.asgi import get_asgi_application
+    from django.core.wsgi import get_wsgi_application
+
+    for load, app in (
+        (load_wsgi, get_wsgi_application()),
+        (load_asgi, get_asgi_application()),
+    ):
+        result = load(app, "/", "", clients=3, requests=7)
+        assert result["requests"] == 7 and result["errors"] == 0, (
+            f"Убедитесь, что `{load.__name__}` отправляет ровно заданное"
+            " число запросов."
+        )
+        assert result["p50_ms"] <= result["p99_ms"] <= result["max_ms"]
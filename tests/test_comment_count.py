@@ -0,0 +1,44 @@
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _comment_count(post):
+    post.refresh_from_db(fields=["comment_count"])
+    return post.comment_count
+
+
+def test_comment_count_follows_views(
+        user_client, user, post_with_published_location):
+    post = post_with_published_location
+    for text in ("первый", "второй"):
+        user_client.post(f"/posts/{post.id}/comment/", {"text": text})
+    assert _comment_count(post) == 2, (
+        "Убедитесь, что при создании комментария увеличивается"
+        " `Post.comment_count`."
+    )
+    comment = post.comments.first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    assert _comment_count(post) == 1, (
+        "Убедитесь, что при удалении комментария уменьшается"
+        " `Post.comment_count`."
+    )
+
+
+def test_comment_count_follows_cascade(
+        mixer, another_user, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post, author=another_user)
+    mixer.blend("blog.Comment", post=post)
+    assert _comment_count(post) == 4
+    another_user.delete()
+    assert _comment_count(post) == 1
+
+
+def test_rebuild_comment_counts(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    type(post).objects.update(comment_count=0)
+    call_command("rebuild_comment_counts")
+    assert _comment_count(post) == 3
@@ -0,0 +1,196 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+# Комментарии в настоящей отдельной базе: transaction=True, чтобы
+# срабатывали обработчики on_commit из blog.signals.
+split_db = pytest.mark.django_db(
+    transaction=True, databases=["default", "comments"]
+)
+
+
+@pytest.fixture
+def split_comments(settings):
+    # Тестовую базу comments добавляет conftest.
+    settings.BLOG_COMMENTS_DATABASE = "comments"
+
+
+@pytest.fixture
+def shared_comments(settings):
+    settings.BLOG_COMMENTS_DATABASE = "default"
+
+
+def comment_links(alias):
+    from blog.models import Comment
+
+    return list(
+        Comment.objects.using(alias).order_by("pk")
+        .values_list("post_id", "author_id")
+    )
+
+
+@pytest.mark.django_db
+def test_comment_router(
+        settings, shared_comments, post_with_published_location):
+    from django.contrib.auth import get_user_model
+
+    from blog.models import Comment, Post
+    from blog.routers import CommentRouter
+
+    router = CommentRouter()
+    assert router.db_for_read(Comment) is None, (
+        "В общей базе комментарии не должны маршрутизироваться отдельно."
+    )
+    settings.BLOG_COMMENTS_DATABASE = "comments"
+    comment = Comment(post=post_with_published_location)
+    comment._state.db = "comments"
+    assert router.db_for_read(Comment) == "comments"
+    assert router.db_for_write(Comment) == "comments"
+    assert router.db_for_read(Post, instance=comment) == "default", (
+        "Убедитесь, что пост и автор комментария читаются с основной базы."
+    )
+    assert router.db_for_read(get_user_model()) is None
+    assert router.allow_relation(comment, post_with_published_location)
+    assert router.allow_migrate("comments", "blog", "comment") is True
+    assert router.allow_migrate("comments", "blog", "post") is False
+    assert router.allow_migrate("comments", "blog") is False
+    assert router.allow_migrate("default", "blog", "comment") is None
+
+
+@split_db
+def test_comment_created_in_comments_database(
+        split_comments, user, user_client, post_with_published_location):
+    post = post_with_published_location
+    response = user_client.post(
+        f"/posts/{post.id}/comment/", data={"text": "Отдельная база"}
+    )
+    assert response.status_code == 302
+    assert comment_links("comments") == [(post.pk, user.pk)], (
+        "Убедитесь, что комментарий сохраняется в базе комментариев."
+    )
+    assert comment_links("default") == []
+    post.refresh_from_db(fields=["comment_count"])
+    assert post.comment_count == 1
+    content = user_client.get(f"/posts/{post.id}/").content.decode()
+    assert "Отдельная база" in content and user.username in content
+
+
+def check_cleanup(mixer, user, another_user, post, alias):
+    other_post = mixer.blend(
+        "blog.Post", author=user, category=post.category
+    )
+    mixer.cycle(2).blend("blog.Comment", post=post, author=user)
+    mixer.blend("blog.Comment", post=other_post, author=another_user)
+    mixer.blend("blog.Comment", post=other_post, author=user)
+    post.delete()
+    assert (post.pk, user.pk) not in comment_links(alias), (
+        "Убедитесь, что комментарии удаляются вместе с постом."
+    )
+    another_user.delete()
+    assert comment_links(alias) == [(other_post.pk, user.pk)], (
+        "Убедитесь, что комментарии удаляются вместе с автором."
+    )
+
+
+@pytest.mark.django_db
+def test_comments_deleted_with_post_and_author(
+        shared_comments, mixer, user, another_user,
+        post_with_published_location):
+    check_cleanup(
+        mixer, user, another_user, post_with_published_location, "default"
+    )
+
+
+@split_db
+def test_comments_deleted_in_comments_database(
+        split_comments, mixer, user, another_user,
+        post_with_published_location):
+    check_cleanup(
+        mixer, user, another_user, post_with_published_location, "comments"
+    )
+
+
+def check_purge(mixer, user, post):
+    from blog.models import Comment
+
+    mixer.cycle(2).blend("blog.Comment", post=post, author=user)
+    # Ссылки без ограничений в БД: так выглядят комментарии, чьи пост
+    # или автор удалены, а очистка в базе комментариев не прошла.
+    Comment.objects.bulk_create([
+        Comment(post_id=post.pk + 1000, author=user, text="без поста"),
+        Comment(post=post, author_id=user.pk + 1000, text="без автора"),
+    ])
+    type(post).objects.update(comment_count=0)
+    call_command("rebuild_comment_counts", "--purge-orphans")
+    assert Comment.objects.count() == 2
+    post.refresh_from_db(fields=["comment_count"])
+    assert post.comment_count == 2, (
+        "Убедитесь, что счётчики пересчитываются и без подзапроса "
+        "в таблицу комментариев."
+    )
+
+
+@pytest.mark.django_db
+def test_rebuild_comment_counts_purges_orphans(
+        shared_comments, mixer, user, post_with_published_location):
+    check_purge(mixer, user, post_with_published_location)
+
+
+@split_db
+def test_purge_orphans_in_comments_database(
+        split_comments, mixer, user, post_with_published_location):
+    from blog.models import Comment, iter_batches
+
+    check_purge(mixer, user, post_with_published_location)
+    assert len(comment_links("comments")) == 2
+    batches = iter_batches(Comment.objects.all(), ("post",), batch_size=1)
+    assert [len(rows) for rows in batches] == [1, 1], (
+        "Убедитесь, что комментарии обходятся порциями по pk."
+    )
+
+
+@split_db
+def test_api_comment_authors_in_comments_database(
+        split_comments, client, mixer, user, post_with_published_location):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post, author=user)
+    response = client.get(f"/api/posts/{post.pk}/comments/")
+    assert [row["author"] for row in response.json()["results"]] == [
+        user.username
+    ], "Убедитесь, что имена авторов подставляются отдельным запросом."
+
+
+@split_db
+def test_export_from_comments_database(
+        split_comments, mixer, user, another_user,
+        post_with_published_location):
+    from blog.dumps import export_stream
+
+    post = post_with_published_location
+    outsider, commenter = mixer.cycle(2).blend("auth.User")
+    other_post = mixer.blend("blog.Post", author=outsider)
+    comment = mixer.blend("blog.Comment", post=post, author=another_user)
+    other_comment = mixer.blend(
+        "blog.Comment", post=other_post, author=commenter
+    )
+
+    def exported(**bounds):
+        data = b"".join(export_stream("ndjson", **bounds)).decode()
+        records = [json.loads(line) for line in data.splitlines()]
+        return {
+            label: {
+                record["pk"] for record in records
+                if record["model"] == label
+            }
+            for label in ("auth.user", "blog.comment")
+        }
+
+    assert exported(category=post.category.slug) == {
+        "auth.user": {user.pk, another_user.pk},
+        "blog.comment": {comment.pk},
+    }, "Убедитесь, что выгружаются комментарии отобранных постов."
+    assert exported() == {
+        "auth.user": {user.pk, another_user.pk, outsider.pk, commenter.pk},
+        "blog.comment": {comment.pk, other_comment.pk},
+    }
@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.constants import COMMENTS_PAGINATE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def many_comments(mixer, another_user, post_with_published_location):
+    return mixer.cycle(COMMENTS_PAGINATE * 2 + 3).blend(
+        "blog.Comment",
+        post=post_with_published_location,
+        author=another_user,
+    )
+
+
+def _ids(page):
+    return [comment.id for comment in page]
+
+
+def test_detail_inlines_first_comment_page(
+        client, many_comments, post_with_published_location):
+    post = post_with_published_location
+    response = client.get(f"/posts/{post.id}/")
+    page = response.context["comments"]
+    assert _ids(page) == [c.id for c in many_comments[:COMMENTS_PAGINATE]], (
+        "Убедитесь, что на странице поста выводится только первая страница"
+        f" из {COMMENTS_PAGINATE} комментариев, от старых к новым."
+    )
+    content = response.content.decode("utf-8")
+    assert f"/posts/{post.id}/comments/?cursor={page.next_cursor}" in content
+    assert f"Комментарии ({len(many_comments)})" in content, (
+        "Убедитесь, что на странице поста выводится число комментариев."
+    )
+
+
+def test_comment_fragments_cover_all_comments(
+        client, many_comments, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/comments/"
+    seen = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get(url, {"cursor": cursor})
+        assert response.status_code == HTTPStatus.OK
+        page = response.context["comments"]
+        seen += _ids(page)
+        cursor = page.next_cursor
+    assert seen == [comment.id for comment in many_comments], (
+        "Убедитесь, что страницы комментариев обходят все комментарии"
+        " без пропусков и повторов."
+    )
+    assert "<html" not in response.content.decode("utf-8"), (
+        "Убедитесь, что следующие страницы комментариев отдаются"
+        " фрагментом HTML без базового шаблона."
+    )
+
+
+def test_detail_queries_do_not_grow_with_comments(
+        client, mixer, another_user, post_with_published_location):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    with CaptureQueriesContext(connection) as few:
+        client.get(url)
+    mixer.cycle(COMMENTS_PAGINATE * 3).blend(
+        "blog.Comment", post=post, author=another_user
+    )
+    with CaptureQueriesContext(connection) as many:
+        response = client.get(url)
+    assert len(response.context["comments"]) == COMMENTS_PAGINATE
+    assert len(many) == len(few), (
+        "Убедитесь, что число запросов страницы поста не зависит"
+        " от количества комментариев."
+    )
+
+
+def test_comment_fragments_follow_post_visibility(
+        user_client, another_user_client, mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, is_published=False,
+        category=published_category,
+    )
+    url = f"/posts/{post.id}/comments/"
+    assert user_client.get(url).status_code == HTTPStatus.OK
+    assert another_user_client.get(url).status_code == HTTPStatus.NOT_FOUND
+    response = user_client.get(url, {"cursor": "not-a-cursor"})
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,103 @@
+from http import HTTPStatus
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _revalidate(client, url, response):
+    return client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/",
+        "/category/{category}/",
+        "/profile/{author}/",
+        "/posts/{post}/",
+    ],
+)
+def test_unchanged_pages_are_not_modified(
+        user_client, post_with_published_location, url):
+    post = post_with_published_location
+    url = url.format(
+        post=post.id,
+        category=post.category.slug,
+        author=post.author.username,
+    )
+    response = user_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.has_header("ETag") and response.has_header(
+        "Last-Modified"
+    )
+    revalidated = _revalidate(user_client, url, response)
+    assert revalidated.status_code == HTTPStatus.NOT_MODIFIED, (
+        f"Убедитесь, что `{url}` отвечает 304 на If-None-Match"
+        " с актуальным ETag."
+    )
+    assert not revalidated.templates, (
+        "Убедитесь, что для ответа 304 шаблон не рендерится."
+    )
+
+
+def test_changes_invalidate_validators(
+        user_client, another_user, mixer, post_with_published_location):
+    post = post_with_published_location
+    feed = user_client.get("/")
+    detail = user_client.get(f"/posts/{post.id}/")
+    category = user_client.get(f"/category/{post.category.slug}/")
+
+    comment = mixer.blend("blog.Comment", post=post, author=another_user)
+    assert _revalidate(user_client, "/", feed).status_code == HTTPStatus.OK
+    detail = user_client.get(f"/posts/{post.id}/")
+    comment.text = "Исправленный текст"
+    comment.save()
+    assert _revalidate(
+        user_client, f"/posts/{post.id}/", detail
+    ).status_code == HTTPStatus.OK, (
+        "Убедитесь, что правка комментария меняет ETag страницы поста."
+    )
+
+    post.category.description = "Новое описание"
+    post.category.save()
+    assert _revalidate(
+        user_client, f"/category/{post.category.slug}/", category
+    ).status_code == HTTPStatus.OK
+
+
+def test_validators_depend_on_viewer(
+        client, user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    anonymous = client.get(url)
+    assert _revalidate(user_client, url, anonymous).status_code == (
+        HTTPStatus.OK
+    ), (
+        "Убедитесь, что ETag зависит от того, кто смотрит страницу."
+    )
+
+
+def test_page_cache_hit_is_not_modified(client, post_with_published_location):
+    response = client.get("/")
+    assert client.get("/")["X-Page-Cache"] == "HIT"
+    revalidated = _revalidate(client, "/", response)
+    assert revalidated.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_unconditional_listing_selects_page_once(
+        client, post_with_published_location):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/?page=1")
+    assert response.status_code == HTTPStatus.OK and response.has_header(
+        "ETag"
+    )
+    sqls = [query["sql"] for query in queries.captured_queries]
+    counts = [sql for sql in sqls if "COUNT(*)" in sql]
+    page_selects = [sql for sql in sqls if '"blog_post"."comment_count"' in sql]
+    assert len(counts) == 1 and len(page_selects) == 1, (
+        "Убедитесь, что без условных заголовков валидаторы считаются по "
+        "уже выбранной странице, без второй выборки и второго COUNT."
+    )
@@ -0,0 +1,83 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def many_posts(mixer, user, published_category, published_location):
+    now = timezone.now()
+    # Часть постов с одинаковой датой, чтобы проверить разбор по id.
+    pub_dates = (
+        now - timedelta(days=i // 3 + 1) for i in range(N_PER_PAGE * 2 + 5)
+    )
+    return mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        location=published_location,
+        pub_date=pub_dates,
+    )
+
+
+def _walk(client, url, cursor_key):
+    pages = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get(url, {"cursor": cursor})
+        assert response.status_code == HTTPStatus.OK
+        page = response.context["page_obj"]
+        pages.append([post.id for post in page])
+        cursor = getattr(page, cursor_key)
+    return pages
+
+
+@pytest.mark.parametrize("url", ["/", "/category/{slug}/", "/profile/{user}/"])
+def test_cursor_pages_cover_feed(
+        user_client, many_posts, published_category, user, url):
+    url = url.format(slug=published_category.slug, user=user.username)
+    expected = [
+        post.id for post in sorted(
+            many_posts, key=lambda p: (p.pub_date, p.id), reverse=True
+        )
+    ]
+    forward = _walk(user_client, url, "next_cursor")
+    assert [len(page) for page in forward] == [N_PER_PAGE, N_PER_PAGE, 5], (
+        "Убедитесь, что в режиме курсорной пагинации на странице выводится"
+        f" не более {N_PER_PAGE} публикаций."
+    )
+    assert sum(forward, []) == expected, (
+        "Убедитесь, что курсорная пагинация обходит ленту без пропусков"
+        " и повторов в порядке убывания даты публикации."
+    )
+
+    last_page = user_client.get(url, {"cursor": ""})
+    for _ in range(len(forward) - 1):
+        last_page = user_client.get(
+            url, {"cursor": last_page.context["page_obj"].next_cursor}
+        )
+    previous = last_page.context["page_obj"].previous_cursor
+    response = user_client.get(url, {"cursor": previous})
+    assert [post.id for post in response.context["page_obj"]] == forward[-2]
+
+
+def test_cursor_pagination_setting_keeps_page_fallback(
+        client, many_posts):
+    with override_settings(BLOG_CURSOR_PAGINATION=True):
+        response = client.get("/")
+        assert getattr(response.context["page_obj"], "is_cursor", False)
+        assert "?cursor=" in response.content.decode("utf-8")
+        response = client.get("/", {"page": 2})
+        assert response.context["page_obj"].number == 2
+
+
+def test_invalid_cursor_returns_404(client, many_posts):
+    response = client.get("/", {"cursor": "not-a-cursor"})
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,99 @@
+import csv
+import gzip
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.dumps import iter_records
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def blog_data(mixer, user, another_user, published_category):
+    now = timezone.now()
+    recent = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=now - timedelta(days=1),
+    )
+    old = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=now - timedelta(days=100),
+    )
+    other = mixer.blend("blog.Post", author=user)
+    mixer.blend("blog.Comment", post=recent, author=another_user)
+    mixer.blend("blog.Comment", post=other, author=another_user)
+    return recent, old, other
+
+
+def _export(path, **options):
+    call_command(
+        "export_blog_data", str(path), stdout=StringIO(), **options
+    )
+
+
+def test_ndjson_export_filters_posts_and_related_rows(
+        tmp_path, blog_data, published_category, another_user):
+    recent, old, other = blog_data
+    path = tmp_path / "blog.ndjson.gz"
+    since = (timezone.now() - timedelta(days=10)).date().isoformat()
+    _export(
+        path, since=since, category=published_category.slug, gzip=True,
+        chunk_size=1,
+    )
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        records = list(iter_records(file))
+    labels = [record["model"] for record in records]
+    assert labels == [
+        "auth.user", "auth.user", "blog.category", "blog.post",
+        "blog.comment",
+    ], (
+        "Убедитесь, что `export_blog_data` выгружает модели в порядке"
+        " зависимостей и только связанные с отобранными постами строки."
+    )
+    post = records[3]
+    assert post["pk"] == recent.pk
+    assert post["fields"]["category"] == published_category.pk
+    assert another_user.username in {
+        record["fields"]["username"] for record in records[:2]
+    }
+    assert all("password" not in record["fields"] for record in records)
+
+
+def test_csv_export_of_one_model(tmp_path, blog_data):
+    path = tmp_path / "posts.csv"
+    _export(path, format="csv", model=["blog.post"])
+    with open(path, encoding="utf-8", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0][:3] == ["id", "title", "text"]
+    assert sorted(int(row[0]) for row in rows[1:]) == sorted(
+        post.pk for post in blog_data
+    )
+
+
+def test_admin_export_is_streamed_to_superusers(
+        client, django_user_model, user_client, blog_data):
+    assert user_client.get("/admin/blog/post/export/").status_code == (
+        HTTPStatus.FOUND
+    )
+    admin = django_user_model.objects.create_superuser(
+        "admin", "admin@example.com", "password"
+    )
+    client.force_login(admin)
+    response = client.get(
+        "/admin/blog/post/export/", {"model": "blog.post", "format": "csv"}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.streaming, (
+        "Убедитесь, что выгрузка в админке отдаётся потоком."
+    )
+    assert "attachment" in response["Content-Disposition"]
+    content = b"".join(response.streaming_content).decode("utf-8")
+    assert len(list(csv.reader(StringIO(content)))) == len(blog_data) + 1
+    assert client.get(
+        "/admin/blog/post/export/", {"format": "csv"}
+    ).status_code == HTTPStatus.BAD_REQUEST
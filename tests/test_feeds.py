@@ -0,0 +1,141 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _content(response):
+    if response.streaming:
+        return b"".join(response.streaming_content).decode("utf-8")
+    return response.content.decode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "url, content_type",
+    [
+        ("/feeds/atom/", "application/atom+xml"),
+        ("/feeds/rss/", "application/rss+xml"),
+        ("/category/{category}/feeds/rss/", "application/rss+xml"),
+        ("/profile/{author}/feeds/atom/", "application/atom+xml"),
+    ],
+)
+def test_feeds_list_published_posts(
+        client, mixer, post_with_published_location, url, content_type):
+    post = post_with_published_location
+    hidden = mixer.blend(
+        "blog.Post", author=post.author, category=post.category,
+        is_published=False,
+    )
+    url = url.format(
+        category=post.category.slug, author=post.author.username
+    )
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"].startswith(content_type)
+    assert response.streaming, (
+        f"Убедитесь, что лента `{url}` отдаётся потоком."
+    )
+    content = _content(response)
+    assert f"/posts/{post.id}/" in content, (
+        f"Убедитесь, что в ленте `{url}` есть опубликованные посты."
+    )
+    assert f"/posts/{hidden.id}/" not in content, (
+        f"Убедитесь, что в ленту `{url}` не попадают снятые с публикации"
+        " посты."
+    )
+
+
+def test_feed_does_not_load_unused_fields(
+        client, post_with_published_location):
+    with CaptureQueriesContext(connection) as queries:
+        _content(client.get("/feeds/atom/"))
+    selects = [
+        query["sql"] for query in queries.captured_queries
+        if '"blog_post"."title"' in query["sql"]
+    ]
+    assert selects, "Убедитесь, что лента читает посты из базы."
+    assert all('"blog_post"."image"' not in sql for sql in selects), (
+        "Убедитесь, что лента выбирает из базы только выводимые поля."
+    )
+
+
+def test_feed_revalidation_and_cache(
+        client, post_with_published_location):
+    post = post_with_published_location
+    first = client.get("/feeds/rss/")
+    content = _content(first)
+    assert first.has_header("ETag") and first.has_header("Last-Modified")
+    assert client.get(
+        "/feeds/rss/", HTTP_IF_NONE_MATCH=first["ETag"]
+    ).status_code == HTTPStatus.NOT_MODIFIED, (
+        "Убедитесь, что лента отвечает 304 на If-None-Match."
+    )
+    assert client.get(
+        "/feeds/rss/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+    ).status_code == HTTPStatus.NOT_MODIFIED, (
+        "Убедитесь, что лента отвечает 304 на If-Modified-Since."
+    )
+    cached = client.get("/feeds/rss/")
+    assert not cached.streaming and _content(cached) == content, (
+        "Убедитесь, что повторный запрос ленты берёт её из кэша."
+    )
+
+    post.title = "Новый заголовок"
+    post.save()
+    changed = client.get("/feeds/rss/", HTTP_IF_NONE_MATCH=first["ETag"])
+    assert changed.status_code == HTTPStatus.OK
+    assert "Новый заголовок" in _content(changed), (
+        "Убедитесь, что правка поста сбрасывает закэшированную ленту."
+    )
+
+
+def test_unknown_feed_format(client, post_with_published_location):
+    assert client.get("/feeds/json/").status_code == HTTPStatus.NOT_FOUND
+
+
+def test_feed_last_modified_follows_edits_and_unpublishing(
+        client, mixer, post_with_published_location):
+    from datetime import timedelta
+
+    from django.utils import timezone
+    from django.utils.http import parse_http_date
+
+    from blog.models import Post
+
+    now = timezone.now()
+    older = post_with_published_location
+    newest = mixer.blend(
+        "blog.Post", author=older.author, category=older.category,
+        pub_date=now - timedelta(days=2),
+    )
+    Post.objects.filter(pk=older.pk).update(
+        pub_date=now - timedelta(days=3), updated_at=now - timedelta(days=3)
+    )
+    Post.objects.filter(pk=newest.pk).update(
+        updated_at=now - timedelta(days=2)
+    )
+    first = client.get("/feeds/rss/")["Last-Modified"]
+
+    Post.objects.filter(pk=older.pk).update(
+        updated_at=now - timedelta(days=1)
+    )
+    edited = client.get("/feeds/rss/", HTTP_IF_MODIFIED_SINCE=first)
+    assert edited.status_code == HTTPStatus.OK, (
+        "Убедитесь, что правка старого поста меняет Last-Modified ленты."
+    )
+    second = edited["Last-Modified"]
+    assert parse_http_date(second) > parse_http_date(first)
+
+    newest.is_published = False
+    newest.save()
+    unpublished = client.get("/feeds/rss/", HTTP_IF_MODIFIED_SINCE=second)
+    assert unpublished.status_code == HTTPStatus.OK, (
+        "Убедитесь, что после снятия нового поста с публикации "
+        "Last-Modified ленты не уходит назад."
+    )
+    assert parse_http_date(unpublished["Last-Modified"]) > (
+        parse_http_date(second)
+    )
@@ -0,0 +1,52 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Count, F
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _generate(**options):
+    call_command("generate_blog_data", stdout=StringIO(), **options)
+
+
+def test_generated_data_keeps_denormalized_fields(mixer):
+    mixer.blend("blog.Post")
+    _generate(posts=300, batch_size=100, future_share=0.1)
+    assert Post.objects.count() == 301
+    assert not Post.objects.annotate(
+        actual=Count("comments")
+    ).exclude(comment_count=F("actual")).exists(), (
+        "Убедитесь, что `generate_blog_data` заполняет `comment_count`"
+        " числом созданных комментариев."
+    )
+    assert Post.objects.refresh_visibility() == (0, 0), (
+        "Убедитесь, что `generate_blog_data` сразу выставляет `is_visible`"
+        " так же, как `refresh_visibility()`."
+    )
+    assert not Comment.objects.filter(
+        created_at__lt=F("post__created_at")
+    ).exists(), (
+        "Убедитесь, что комментарии создаются не раньше своей публикации."
+    )
+
+
+def test_generated_data_is_reproducible():
+    _generate(posts=50, seed=7)
+    first = list(Post.objects.values_list("title", "comment_count"))
+    Post.objects.all().delete()
+    _generate(posts=50, seed=7)
+    second = list(Post.objects.values_list("title", "comment_count"))
+    assert first == second, (
+        "Убедитесь, что при одинаковом `--seed` генерируются"
+        " одинаковые данные."
+    )
+
+
+@pytest.mark.parametrize("tail", [-1, 0.5, 1])
+def test_comment_tail_without_mean_is_rejected(tail):
+    with pytest.raises(CommandError):
+        _generate(posts=1, comment_tail=tail)
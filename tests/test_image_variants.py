@@ -0,0 +1,98 @@
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog import images
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+
+@pytest.fixture(autouse=True)
+def variant_settings(settings):
+    settings.BLOG_IMAGE_VARIANT_WIDTHS = (40, 80, 400)
+    settings.BLOG_IMAGE_THUMBNAIL_WIDTH = 40
+    settings.BLOG_IMAGE_VARIANTS_IN_BACKGROUND = False
+
+
+def _jpeg(size=(100, 50)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def _create_post(client, published_category):
+    client.post("/posts/create/", {
+        "title": "С картинкой",
+        "text": "Текст",
+        "pub_date": "2020-01-01T00:00",
+        "is_published": True,
+        "category": published_category.id,
+        "image": SimpleUploadedFile(
+            "photo.jpg", _jpeg(), content_type="image/jpeg"
+        ),
+    })
+    return Post.objects.get(title="С картинкой")
+
+
+def test_variants_are_built_on_upload(
+        user_client, client, published_category):
+    post = _create_post(user_client, published_category)
+    assert (post.image_width, post.image_height) == (100, 50)
+    assert [
+        (variant["width"], variant["height"])
+        for variant in post.image_variants
+    ] == [(40, 20), (80, 40)], (
+        "Убедитесь, что для картинки строятся копии всех ширин"
+        " меньше оригинала."
+    )
+    for variant in post.image_variants:
+        with default_storage.open(variant["name"]) as file:
+            assert Image.open(file).width == variant["width"]
+    content = client.get("/").content.decode("utf-8")
+    small = default_storage.url(post.image_variants[0]["name"])
+    assert f'src="{small}"' in content, (
+        "Убедитесь, что в карточке ленты выводится уменьшенная копия."
+    )
+    assert f"{small} 40w" in content and f"{post.image.url} 100w" in content
+    assert 'width="100" height="50"' in content
+
+
+def test_variants_are_built_after_commit(
+        user_client, published_category, monkeypatch,
+        settings, django_capture_on_commit_callbacks):
+    settings.BLOG_IMAGE_VARIANTS_IN_BACKGROUND = True
+    monkeypatch.setattr(images, "get_executor", lambda: SimpleNamespace(
+        submit=lambda function, post_id: images.build_image_variants(post_id)
+    ))
+    with django_capture_on_commit_callbacks() as callbacks:
+        post = _create_post(user_client, published_category)
+    assert post.image_variants == [], (
+        "Убедитесь, что копии картинки не строятся внутри запроса."
+    )
+    for callback in callbacks:
+        callback()
+    post.refresh_from_db()
+    assert len(post.image_variants) == 2
+
+
+def test_build_image_variants_backfills(mixer):
+    name = default_storage.save("backfill.jpg", ContentFile(_jpeg()))
+    post, done, _ = mixer.cycle(3).blend("blog.Post")
+    Post.objects.filter(pk__in=(post.pk, done.pk)).update(image=name)
+    Post.objects.filter(pk=post.pk).update(image_info={})
+    Post.objects.filter(pk=done.pk).update(image_info={"width": 100})
+    call_command("build_image_variants", workers=1, stdout=StringIO())
+    post.refresh_from_db()
+    done.refresh_from_db()
+    assert len(post.image_variants) == 2, (
+        "Убедитесь, что `build_image_variants` строит копии для картинок,"
+        " загруженных раньше."
+    )
+    assert done.image_variants == []
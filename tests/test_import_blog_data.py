@@ -0,0 +1,127 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.dumps import iter_records
+from blog.models import Category, Comment, Post, User
+
+pytestmark = [pytest.mark.django_db]
+
+# Записи идут не по порядку зависимостей, как в выводе dumpdata.
+RECORDS = [
+    {
+        "model": "blog.post", "pk": 1,
+        "fields": {
+            "title": "Первый", "text": "Текст",
+            "pub_date": "2020-01-01T00:00:00Z",
+            "created_at": "2020-01-01T00:00:00Z",
+            "is_published": True, "author": 7, "category": 3,
+            "location": None, "stale_field": 1,
+        },
+    },
+    {
+        "model": "blog.comment", "pk": 5,
+        "fields": {
+            "text": "Комментарий", "post": 1, "author": 8,
+            "created_at": "2020-01-02T00:00:00Z", "is_published": True,
+        },
+    },
+    {
+        "model": "blog.comment", "pk": 6,
+        "fields": {
+            "text": "К посту не из дампа", "post": 99, "author": 8,
+            "created_at": "2020-01-02T00:00:00Z", "is_published": True,
+        },
+    },
+    {
+        "model": "blog.category", "pk": 3,
+        "fields": {
+            "title": "Категория", "description": "Описание",
+            "slug": "imported", "is_published": True,
+            "created_at": "2019-01-01T00:00:00Z",
+        },
+    },
+    {"model": "auth.user", "pk": 7, "fields": {"username": "writer"}},
+    {"model": "auth.user", "pk": 8, "fields": {"username": "reader"}},
+    {"model": "sessions.session", "pk": "x", "fields": {}},
+]
+
+
+def _import(path, **options):
+    out = StringIO()
+    call_command("import_blog_data", str(path), stdout=out, **options)
+    return out.getvalue()
+
+
+def test_iter_records_reads_json_and_ndjson_in_small_chunks():
+    array = json.dumps(RECORDS, ensure_ascii=False, indent=2)
+    ndjson = "\n".join(json.dumps(record) for record in RECORDS)
+    for text in (array, ndjson):
+        assert list(iter_records(StringIO(text), read_size=7)) == RECORDS, (
+            "Убедитесь, что дамп разбирается по объектам при чтении"
+            " файла кусками."
+        )
+
+
+@pytest.mark.parametrize("suffix", [".json", ".ndjson"])
+def test_import_remaps_keys_in_dependency_order(
+        tmp_path, mixer, suffix):
+    mixer.blend("blog.Post")
+    existing = mixer.blend(User, username="reader")
+    path = tmp_path / f"dump{suffix}"
+    if suffix == ".json":
+        path.write_text(json.dumps(RECORDS), encoding="utf-8")
+    else:
+        path.write_text(
+            "\n".join(json.dumps(record) for record in RECORDS),
+            encoding="utf-8",
+        )
+    output = _import(path, batch_size=1)
+    assert "строк/с" in output, (
+        "Убедитесь, что `import_blog_data` сообщает скорость загрузки."
+    )
+    post = Post.objects.get(title="Первый")
+    assert post.author.username == "writer"
+    assert post.category == Category.objects.get(slug="imported")
+    assert post.created_at.year == 2020, (
+        "Убедитесь, что даты создания переносятся из дампа."
+    )
+    assert post.is_visible and post.comment_count == 1, (
+        "Убедитесь, что после загрузки пересчитываются `is_visible`"
+        " и `comment_count`."
+    )
+    comment = Comment.objects.get()
+    assert comment.post == post and comment.author == existing, (
+        "Убедитесь, что ключи комментариев переназначаются на новые"
+        " посты и существующих пользователей."
+    )
+
+
+def test_import_looks_up_ids_in_chunks(
+        tmp_path, monkeypatch, mixer, django_assert_num_queries):
+    from blog.management.commands import import_blog_data
+    from blog.models import existing_ids
+
+    monkeypatch.setattr(import_blog_data, "ID_BATCH_SIZE", 2)
+    mixer.blend(User, username="user1")
+    path = tmp_path / "users.ndjson"
+    path.write_text("\n".join(
+        json.dumps({
+            "model": "auth.user", "pk": number,
+            "fields": {"username": f"user{number}", "password": ""},
+        })
+        for number in range(1, 6)
+    ), encoding="utf-8")
+    _import(path)
+    assert User.objects.filter(username__startswith="user").count() == 5, (
+        "Убедитесь, что пакет дампа сверяется с базой порциями."
+    )
+    posts = mixer.cycle(3).blend(Post)
+    with django_assert_num_queries(3):
+        found = existing_ids(
+            Post.objects.all(), [post.pk for post in posts] + [0, -1],
+            batch_size=2,
+        )
+    assert found == {post.pk for post in posts}
@@ -0,0 +1,126 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.models import Post, StoredFile
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+
+def _jpeg(color="green"):
+    buffer = BytesIO()
+    Image.new("RGB", (30, 30), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def _storage():
+    return Post._meta.get_field("image").storage
+
+
+def _ref_count(name):
+    stored = StoredFile.objects.filter(name=name).first()
+    return stored and stored.ref_count
+
+
+def test_identical_uploads_share_one_file(
+        user_client, published_category, django_capture_on_commit_callbacks):
+    for title in ("Первый", "Второй"):
+        user_client.post("/posts/create/", {
+            "title": title,
+            "text": "Текст",
+            "pub_date": "2020-01-01T00:00",
+            "category": published_category.id,
+            "image": SimpleUploadedFile(
+                f"{title}.jpg", _jpeg(), content_type="image/jpeg"
+            ),
+        })
+    first, second = Post.objects.order_by("id")
+    name = first.image.name
+    assert name == second.image.name, (
+        "Убедитесь, что одинаковые картинки сохраняются в один файл."
+    )
+    assert _storage().is_hashed(name) and name.startswith("posts/")
+    assert _ref_count(name) == 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user_client.post(f"/posts/{first.id}/delete/")
+    assert _storage().exists(name) and _ref_count(name) == 1
+    with django_capture_on_commit_callbacks(execute=True):
+        user_client.post(f"/posts/{second.id}/delete/")
+    assert not _storage().exists(name), (
+        "Убедитесь, что файл удаляется, когда на него не осталось ссылок."
+    )
+
+
+def test_storage_names_files_by_content():
+    storage = _storage()
+    first = storage.save("posts/a.jpg", ContentFile(_jpeg("red")))
+    second = storage.save("posts/b.JPG", ContentFile(_jpeg("red")))
+    other = storage.save("posts/c.jpg", ContentFile(_jpeg("blue")))
+    assert first == second != other
+    directory, shard1, shard2, filename = first.split("/")
+    assert directory == "posts"
+    assert filename.startswith(shard1 + shard2) and filename.endswith(".jpg")
+
+
+def test_migrate_media_storage(mixer):
+    legacy = FileSystemStorage(location=_storage().location)
+    name = legacy.save("legacy_photo.jpg", ContentFile(_jpeg("yellow")))
+    posts = mixer.cycle(2).blend("blog.Post")
+    Post.objects.filter(pk__in=[post.pk for post in posts]).update(
+        image=name, image_info={}
+    )
+    call_command("migrate_media_storage", stdout=StringIO())
+    new_names = set(Post.objects.values_list("image", flat=True))
+    assert len(new_names) == 1
+    new_name = new_names.pop()
+    assert _storage().is_hashed(new_name) and _storage().exists(new_name)
+    assert not legacy.exists(name), (
+        "Убедитесь, что `migrate_media_storage` удаляет перенесённые файлы."
+    )
+    assert _ref_count(new_name) == 2
+
+
+def test_upload_during_discard_keeps_file(django_capture_on_commit_callbacks):
+    storage = _storage()
+    name = storage.save("posts/a.jpg", ContentFile(_jpeg("white")))
+    StoredFile.objects.acquire([name])
+    with django_capture_on_commit_callbacks() as callbacks:
+        StoredFile.objects.release([name], storage)
+    # Такая же картинка загружается, пока удаление ждёт фиксации.
+    assert storage.save("posts/b.jpg", ContentFile(_jpeg("white"))) == name
+    for callback in callbacks:
+        callback()
+    assert storage.exists(name), (
+        "Убедитесь, что файл, заявленный новой загрузкой, не удаляется."
+    )
+    StoredFile.objects.acquire([name])
+    with django_capture_on_commit_callbacks(execute=True):
+        StoredFile.objects.release([name], storage)
+    assert not storage.exists(name) and _ref_count(name) is None
+
+
+def test_post_save_does_not_reread_stored_files(mixer, user):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    name = _storage().save("posts/reuse.jpg", ContentFile(_jpeg("red")))
+    post = Post.objects.get(pk=mixer.blend(Post, author=user, image=name).pk)
+    with CaptureQueriesContext(connection) as queries:
+        post.title = "Новый заголовок"
+        post.save()
+        post.save(update_fields=["title"])
+    assert not [
+        query for query in queries.captured_queries
+        if query["sql"].startswith("SELECT") and "image_info" in query["sql"]
+    ], "Убедитесь, что при сохранении поста старые файлы не перечитываются."
+    assert _ref_count(name) == 1
+
+    post.image = ""
+    post.save()
+    assert _ref_count(name) == 0
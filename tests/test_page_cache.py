@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+HEADER = "X-Page-Cache"
+
+
+def _get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, url
+    return response[HEADER], response.content.decode("utf-8")
+
+
+def test_anonymous_pages_are_cached(
+        client, user_client, post_with_published_location):
+    post = post_with_published_location
+    for url in ("/", f"/category/{post.category.slug}/", f"/posts/{post.id}/"):
+        assert _get(client, url)[0] == "MISS"
+        assert _get(client, url)[0] == "HIT", (
+            f"Убедитесь, что страница `{url}` кэшируется для анонимов."
+        )
+        assert _get(user_client, url)[0] == "BYPASS"
+    assert _get(client, "/?page=1")[0] == "MISS"
+    assert _get(client, "/?cursor=")[0] == "MISS"
+    assert HEADER not in client.get(f"/profile/{post.author.username}/")
+
+
+def test_page_cache_invalidated_by_models(
+        client, mixer, another_user, post_with_published_location):
+    post = post_with_published_location
+    detail_url = f"/posts/{post.id}/"
+    _get(client, "/")
+    _get(client, detail_url)
+
+    post.title = "Изменённый заголовок"
+    post.save()
+    status, content = _get(client, "/")
+    assert status == "MISS" and post.title in content
+
+    comment = mixer.blend("blog.Comment", post=post, author=another_user)
+    status, content = _get(client, detail_url)
+    assert status == "MISS" and f"comment_{comment.id}" in content, (
+        "Убедитесь, что новый комментарий сбрасывает кэш страницы поста."
+    )
+
+    another_user.username = "renamed_commenter"
+    another_user.save()
+    status, content = _get(client, detail_url)
+    assert status == "MISS" and "@renamed_commenter" in content
+
+    post.location.name = "Новое место"
+    post.location.save()
+    status, content = _get(client, detail_url)
+    assert status == "MISS" and "Новое место" in content
+
+    post.category.is_published = False
+    post.category.save()
+    assert client.get(detail_url).status_code == 404
+
+
+def test_related_objects_do_not_list_posts(
+        mixer, django_assert_num_queries, post_with_published_location):
+    from blog.cache import instance_page_scopes
+
+    post = post_with_published_location
+    mixer.cycle(5).blend(
+        "blog.Post", author=post.author, category=post.category,
+        location=post.location,
+    )
+    for instance in (post.category, post.location, post.author):
+        with django_assert_num_queries(0):
+            scopes = instance_page_scopes(instance)
+        assert not any(scope.startswith("post:") for scope in scopes), (
+            "Убедитесь, что правка категории, местоположения или автора "
+            "сбрасывает общие области страниц, а не область каждого поста."
+        )
+
+
+def test_page_cache_expires_when_scheduled_post_is_due(
+        client, mixer, user, published_category):
+    mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(seconds=90),
+    )
+    from blog.cache import page_cache_timeout
+
+    assert page_cache_timeout() <= 90 + 30, (
+        "Убедитесь, что страница не хранится в кэше дольше, чем до"
+        " ближайшей отложенной публикации."
+    )
@@ -0,0 +1,38 @@
+import pytest
+from django.core.cache import cache
+
+pytestmark = [pytest.mark.django_db]
+
+CARD_TEMPLATE = "includes/post_card.html"
+
+
+def _card_renders(response):
+    return [t.name for t in response.templates].count(CARD_TEMPLATE)
+
+
+def test_post_cards_are_cached(
+        user_client, mixer, post_with_published_location, another_user):
+    # Залогиненный клиент минует кэш страниц, поэтому повторный запрос
+    # проверяет именно кэш карточек.
+    post = post_with_published_location
+    cache.clear()
+    response = user_client.get("/")
+    assert _card_renders(response) == 1
+    response = user_client.get("/")
+    assert _card_renders(response) == 0, (
+        "Убедитесь, что повторный показ ленты берёт карточки из кэша."
+    )
+    assert post.title in response.content.decode("utf-8")
+
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    response = user_client.get("/")
+    assert _card_renders(response) == 1
+    assert "Комментарии (1)" in response.content.decode("utf-8"), (
+        "Убедитесь, что карточка обновляется при изменении"
+        " числа комментариев."
+    )
+
+    post.category.title = "Новое название категории"
+    post.category.save()
+    response = user_client.get("/")
+    assert "Новое название категории" in response.content.decode("utf-8")
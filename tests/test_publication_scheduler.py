@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+HEADER = "X-Page-Cache"
+
+
+@pytest.fixture
+def scheduled_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + timedelta(minutes=10),
+    )
+
+
+def _is_visible(post):
+    post.refresh_from_db(fields=["is_visible"])
+    return post.is_visible
+
+
+def test_post_published_at_its_moment(client, scheduled_post):
+    from blog.cache import post_card_key
+    from blog.models import visibility_moment
+    from blog.scheduler import PublicationScheduler
+
+    now = timezone.now()
+    scheduler = PublicationScheduler(now=now)
+    assert scheduler.run_once(now) == 0
+    moment = visibility_moment(scheduled_post.pub_date)
+    assert scheduler.next_due() == moment, (
+        "Убедитесь, что отложенный пост попадает в очередь публикаций."
+    )
+    assert not _is_visible(scheduled_post)
+
+    client.get("/")
+    assert client.get("/")[HEADER] == "HIT"
+    assert scheduler.run_once(moment) == 1
+    assert _is_visible(scheduled_post)
+    assert client.get("/")[HEADER] == "MISS", (
+        "Убедитесь, что в момент публикации страницы лент сбрасываются."
+    )
+    post = type(scheduled_post).objects.select_related(
+        "author", "category", "location"
+    ).get(pk=scheduled_post.pk)
+    assert cache.get(post_card_key(post)) is not None, (
+        "Убедитесь, что карточка опубликованного поста прогревается."
+    )
+    assert scheduler.next_due() is None
+
+
+def test_queue_follows_moved_pub_date(scheduled_post):
+    from blog.models import visibility_moment
+    from blog.scheduler import PublicationScheduler
+
+    now = timezone.now()
+    scheduler = PublicationScheduler(poll=30, now=now)
+    scheduler.run_once(now)
+    moment = visibility_moment(scheduled_post.pub_date)
+    type(scheduled_post).objects.filter(pk=scheduled_post.pk).update(
+        pub_date=scheduled_post.pub_date + timedelta(days=1)
+    )
+    assert scheduler.run_once(moment) == 0, (
+        "Убедитесь, что перенесённая публикация не открывается по старой"
+        " дате."
+    )
+    assert scheduler.next_due() is None
+
+
+def test_catch_up_and_warm_pages(client, settings, scheduled_post):
+    from blog.scheduler import PublicationScheduler
+
+    settings.BLOG_PUBLICATION_WARM_HOST = "localhost"
+    type(scheduled_post).objects.filter(pk=scheduled_post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    assert PublicationScheduler().run_once() == 1, (
+        "Убедитесь, что при запуске воркер догоняет наступившие публикации."
+    )
+    category_url = f"/category/{scheduled_post.category.slug}/"
+    for url in ("/", category_url):
+        assert client.get(url)[HEADER] == "HIT", (
+            f"Убедитесь, что страница `{url}` прогревается после публикации."
+        )
+
+
+def test_page_ttl_not_shortened_with_scheduler(settings, scheduled_post):
+    from blog.cache import page_cache_timeout
+
+    type(scheduled_post).objects.filter(pk=scheduled_post.pk).update(
+        is_visible=True,
+        pub_date=timezone.now() + timedelta(seconds=90),
+    )
+    assert page_cache_timeout() < settings.BLOG_PAGE_CACHE_TIMEOUT
+    settings.BLOG_PUBLICATION_SCHEDULER = True
+    assert page_cache_timeout() == settings.BLOG_PAGE_CACHE_TIMEOUT
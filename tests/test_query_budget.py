@@ -0,0 +1,56 @@
+import json
+import logging
+
+import pytest
+
+from blog.views import PostListView
+
+pytestmark = [pytest.mark.django_db]
+
+LOGGER = "blog.query_budget"
+
+
+def _records(caplog):
+    return [
+        (record.levelno, json.loads(record.getMessage()))
+        for record in caplog.records
+        if record.name == LOGGER
+    ]
+
+
+def test_request_stats_logged(
+        caplog, user_client, post_with_published_location):
+    post = post_with_published_location
+    with caplog.at_level(logging.INFO, logger=LOGGER):
+        user_client.get("/")
+        user_client.get(f"/posts/{post.id}/")
+        user_client.post(f"/posts/{post.id}/comment/", {"text": "текст"})
+    records = _records(caplog)
+    assert [data["view"].rsplit(".", 1)[-1] for _, data in records] == [
+        "PostListView", "PostDetailView", "CommentCreateView"
+    ]
+    for level, data in records:
+        assert level == logging.INFO, (
+            f"Убедитесь, что `{data['view']}` укладывается в бюджет"
+            f" запросов: {data}"
+        )
+        assert data["queries"] > 0
+        assert data["db_ms"] >= 0 and data["total_ms"] >= data["db_ms"]
+    assert records[0][1]["template_ms"] > 0
+
+
+def test_over_budget_is_warning(
+        caplog, monkeypatch, client, post_with_published_location):
+    monkeypatch.setattr(PostListView, "query_budget", 0)
+    with caplog.at_level(logging.INFO, logger=LOGGER):
+        client.get("/")
+    [(level, data)] = _records(caplog)
+    assert level == logging.WARNING
+    assert data["over_budget"] == ["queries"]
+
+
+def test_sampling_skips_requests(settings, caplog, client):
+    settings.BLOG_QUERY_BUDGET_SAMPLE_RATE = 0
+    with caplog.at_level(logging.INFO, logger=LOGGER):
+        client.get("/")
+    assert not _records(caplog)
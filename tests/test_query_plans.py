@@ -0,0 +1,66 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+# Обход индекса (SCAN ... USING INDEX) допустим: лента читает его по порядку
+# и останавливается на LIMIT. Запрещён только перебор самой таблицы.
+FULL_SCAN = re.compile(
+    r"\bSCAN (TABLE )?(blog_post|blog_comment)\b(?! USING)"
+)
+TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+
+def _query_plans(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    plans = []
+    with connection.cursor() as cursor:
+        for query in ctx.captured_queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT") or not re.search(
+                r'"blog_(post|comment)"', sql
+            ):
+                continue
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plan = "\n".join(str(row[-1]) for row in cursor.fetchall())
+            plans.append((sql, plan))
+    return plans
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/",
+        "/?cursor=",
+        "/category/{slug}/",
+        "/profile/{username}/",
+        "/posts/{post_id}/",
+        "/posts/{post_id}/comments/",
+    ],
+)
+@pytest.mark.parametrize("viewer", ["user_client", "another_user_client"])
+def test_views_avoid_full_scans(
+        request, viewer, url, user, published_category,
+        post_with_published_location):
+    client = request.getfixturevalue(viewer)
+    url = url.format(
+        slug=published_category.slug,
+        username=user.username,
+        post_id=post_with_published_location.id,
+    )
+    plans = _query_plans(client, url)
+    assert plans, url
+    for sql, plan in plans:
+        assert not FULL_SCAN.search(plan), (
+            f"Убедитесь, что запросы страницы `{url}` не сканируют таблицы"
+            f" публикаций и комментариев целиком:\n{sql}\n{plan}"
+        )
+        assert TEMP_SORT not in plan, (
+            f"Убедитесь, что запросы страницы `{url}` сортируются"
+            f" по индексу:\n{sql}\n{plan}"
+        )
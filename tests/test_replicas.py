@@ -0,0 +1,109 @@
+import sqlite3
+import time
+
+import pytest
+
+
+def test_snapshot_and_lag(tmp_path):
+    from blog.replicas import snapshot, synced_at
+
+    source, target = tmp_path / "primary.sqlite3", tmp_path / "replica.sqlite3"
+    with sqlite3.connect(source) as db:
+        db.execute("CREATE TABLE post (title TEXT)")
+        db.execute("INSERT INTO post VALUES ('Первый')")
+    db.close()
+    assert synced_at(target) is None
+
+    moment = snapshot(source, target)
+    replica = sqlite3.connect(target)
+    assert replica.execute("SELECT title FROM post").fetchall() == [
+        ("Первый",)
+    ], "Убедитесь, что снимок копирует данные основной базы."
+    replica.close()
+    assert synced_at(target) == moment
+    assert time.time() - moment < 5
+
+
+def test_router_reads_replica_until_write(settings):
+    from django.contrib.auth import get_user_model
+
+    from blog.models import Post
+    from blog.replicas import route
+    from blog.routers import ReplicaRouter
+
+    settings.BLOG_READ_REPLICAS = ["replica1"]
+    router = ReplicaRouter()
+    assert router.db_for_read(Post) is None
+    with route("replica1"):
+        assert router.db_for_read(Post) == "replica1", (
+            "Убедитесь, что модели блога читаются с назначенной реплики."
+        )
+        assert router.db_for_read(get_user_model()) is None, (
+            "Пользователи должны читаться с основной базы."
+        )
+        assert router.db_for_write(Post) == "default"
+        assert router.db_for_read(Post) is None, (
+            "Убедитесь, что после записи запрос читает основную базу."
+        )
+    assert router.allow_migrate("replica1", "blog") is False
+
+
+def test_choose_replica(settings, monkeypatch):
+    from blog import replicas
+
+    settings.BLOG_READ_REPLICAS = ["replica1"]
+    settings.BLOG_REPLICA_MAX_LAG = 10
+    now = time.time()
+    lags = {"replica1": None}
+    monkeypatch.setattr(
+        replicas, "replica_lag", lambda alias, now=None: lags[alias]
+    )
+    assert replicas.choose_replica(now=now) == (None, None), (
+        "Несинхронизированная реплика не должна выбираться."
+    )
+    lags["replica1"] = 11
+    assert replicas.choose_replica(now=now) == (None, None)
+    lags["replica1"] = 2
+    assert replicas.choose_replica(now=now) == ("replica1", 2)
+    assert replicas.choose_replica(now - 1, now) == (None, None), (
+        "Убедитесь, что после записи выбираются только более новые снимки."
+    )
+    assert replicas.choose_replica(now - 3, now) == ("replica1", 2)
+
+
+@pytest.mark.django_db(
+    transaction=True, databases=["default", "comments", "replica1"]
+)
+def test_write_sets_sticky_cookie(
+        settings, monkeypatch, user_client, post_with_published_location):
+    from blog import replicas
+
+    # Реплика replica1 из conftest отражает основную базу. Её снимок
+    # свежий, но на 2 секунды старше любой записи в тесте.
+    settings.BLOG_READ_REPLICAS = ["replica1"]
+    monkeypatch.setattr(replicas, "replica_lag", lambda alias, now=None: 2)
+    post = post_with_published_location
+    assert user_client.get(f"/posts/{post.id}/").wsgi_request.db_replica == (
+        "replica1"
+    )
+    response = user_client.post(
+        f"/posts/{post.id}/comment/", data={"text": "Комментарий"}
+    )
+    assert response.status_code == 302
+    cookie = response.cookies.get(settings.BLOG_REPLICA_STICKY_COOKIE)
+    assert cookie is not None and float(cookie.value) <= time.time(), (
+        "Убедитесь, что после записи пользователь закрепляется за "
+        "основной базой."
+    )
+    response = user_client.get(f"/posts/{post.id}/")
+    assert response.status_code == 200
+    assert response.wsgi_request.db_replica is None, (
+        "Убедитесь, что реплика со снимком до записи не используется, "
+        "пока жива cookie."
+    )
+    del user_client.cookies[settings.BLOG_REPLICA_STICKY_COOKIE]
+    response = user_client.get(f"/posts/{post.id}/")
+    assert response.status_code == 200
+    assert response.wsgi_request.db_replica == "replica1", (
+        "Убедитесь, что без cookie свежая реплика снова используется."
+    )
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(title, text, **kwargs):
+        fields = {
+            "is_published": True,
+            "pub_date": timezone.now() - timedelta(days=1),
+            **kwargs,
+        }
+        return mixer.blend(
+            "blog.Post", title=title, text=text, author=user,
+            category=published_category, **fields
+        )
+    return make
+
+
+def _found(client, query):
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == HTTPStatus.OK
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_search_ranks_and_highlights(client, make_post):
+    in_text = make_post("Заметки", "Сегодня видели <b>медведя</b> в лесу.")
+    in_title = make_post("Медведь в городе", "Новости дня.")
+    assert _found(client, "медвед") == [in_title.id, in_text.id], (
+        "Убедитесь, что поиск находит слова по префиксу и ставит"
+        " совпадения в заголовке выше совпадений в тексте."
+    )
+    content = client.get("/search/", {"q": "медведя"}).content.decode()
+    assert "&lt;b&gt;<mark>медведя</mark>&lt;/b&gt;" in content, (
+        "Убедитесь, что сниппет экранируется, а совпадения выделяются."
+    )
+
+
+def test_search_follows_visibility(client, make_post):
+    make_post("Черновик про сов", "Текст", is_published=False)
+    make_post(
+        "Будущее про сов", "Текст",
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    visible = make_post("Опубликовано про сов", "Текст")
+    assert _found(client, "сов") == [visible.id]
+    assert _found(client, "") == []
+    assert _found(client, '"* OR NEAR(') == []
+
+
+def test_index_follows_changes(client, make_post):
+    post = make_post("Пост", "Про кошек.")
+    post.text = "Про собак."
+    post.save()
+    assert _found(client, "кошек") == []
+    assert _found(client, "собак") == [post.id]
+    Post.objects.filter(pk=post.pk).update(title="Енот")
+    assert _found(client, "енот") == [post.id]
+    post.delete()
+    assert _found(client, "собак") == []
+
+
+def test_rebuild_restores_triggers(client, make_post):
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TRIGGER blog_post_fts_insert")
+    post = make_post("Лисица", "Текст")
+    assert _found(client, "лисица") == []
+    call_command("rebuild_search_index", stdout=StringIO())
+    assert _found(client, "лисица") == [post.id]
+    other = make_post("Вторая лисица", "Текст")
+    assert set(_found(client, "лисица")) == {post.id, other.id}
@@ -0,0 +1,109 @@
+import gzip
+import re
+from http import HTTPStatus
+
+import pytest
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(settings):
+    settings.BLOG_SITEMAP_CHUNK_SIZE = 2
+
+
+def _xml(response):
+    content = response.content
+    if response.get("Content-Encoding") == "gzip":
+        content = gzip.decompress(content)
+    return content.decode("utf-8")
+
+
+def _locations(response):
+    return re.findall(r"<loc>http://testserver([^<]+)</loc>", _xml(response))
+
+
+def test_index_lists_chunks_of_every_section(
+        client, mixer, post_with_published_location):
+    post = post_with_published_location
+    posts = [post] + mixer.cycle(3).blend(
+        "blog.Post", author=post.author, category=post.category,
+        is_published=True, pub_date=post.pub_date,
+    )
+    Post.objects.refresh_visibility()
+    response = client.get("/sitemap.xml", HTTP_ACCEPT_ENCODING="gzip")
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Encoding"] == "gzip", (
+        "Убедитесь, что карта сайта отдаётся сжатой gzip."
+    )
+    chunks = _locations(response)
+    assert "/sitemap-posts-1.xml" in chunks
+    assert "/sitemap-posts-2.xml" in chunks
+    assert "/sitemap-categories-1.xml" in chunks
+    assert "/sitemap-profiles-1.xml" in chunks
+
+    urls = []
+    for chunk in chunks:
+        chunk_urls = _locations(client.get(chunk))
+        assert len(chunk_urls) <= 2, (
+            "Убедитесь, что в куске карты сайта не больше"
+            " BLOG_SITEMAP_CHUNK_SIZE адресов."
+        )
+        urls += chunk_urls
+    for item in posts:
+        assert item.get_absolute_url() in urls
+    assert f"/category/{post.category.slug}/" in urls
+    assert f"/profile/{post.author.username}/" in urls
+
+
+def test_unchanged_chunk_is_not_regenerated(
+        client, post_with_published_location, django_assert_max_num_queries):
+    post = post_with_published_location
+    first = client.get("/sitemap-posts-1.xml")
+    assert first.has_header("ETag") and first.has_header("Last-Modified")
+    assert client.get(
+        "/sitemap-posts-1.xml", HTTP_IF_NONE_MATCH=first["ETag"]
+    ).status_code == HTTPStatus.NOT_MODIFIED
+    with django_assert_max_num_queries(1):
+        cached = client.get("/sitemap-posts-1.xml")
+    assert _xml(cached) == _xml(first), (
+        "Убедитесь, что неизменившийся кусок карты сайта берётся из кэша."
+    )
+
+    post.is_published = False
+    post.save()
+    Post.objects.refresh_visibility()
+    assert client.get("/sitemap-posts-1.xml").status_code == (
+        HTTPStatus.NOT_FOUND
+    ), "Убедитесь, что снятый с публикации пост пропадает из карты сайта."
+
+
+def test_gzip_chunk_has_its_own_etag(client, post_with_published_location):
+    url = "/sitemap-posts-1.xml"
+    plain = client.get(url)
+    gzipped = client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert gzipped["Content-Encoding"] == "gzip"
+    assert gzipped["ETag"] != plain["ETag"], (
+        "Убедитесь, что у сжатого куска карты сайта свой ETag."
+    )
+    for response, encoding in ((plain, ""), (gzipped, "gzip")):
+        assert "Accept-Encoding" in response["Vary"]
+        revalidated = client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"],
+            HTTP_ACCEPT_ENCODING=encoding,
+        )
+        assert revalidated.status_code == HTTPStatus.NOT_MODIFIED
+        assert "Accept-Encoding" in revalidated["Vary"]
+    assert client.get(
+        url, HTTP_IF_NONE_MATCH=plain["ETag"], HTTP_ACCEPT_ENCODING="gzip"
+    ).status_code == HTTPStatus.OK, (
+        "Убедитесь, что ETag несжатого куска не подтверждает сжатый."
+    )
+
+
+def test_unknown_section(client, post_with_published_location):
+    assert client.get("/sitemap-drafts-1.xml").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
@@ -0,0 +1,49 @@
+import pytest
+from django.db import OperationalError, connection
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+def _pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def test_pragmas_applied_to_connection(settings):
+    assert _pragma("busy_timeout") == (
+        settings.BLOG_SQLITE_PRAGMAS["busy_timeout"]
+    ), "Убедитесь, что PRAGMA из BLOG_SQLITE_PRAGMAS задаются соединению."
+    assert _pragma("temp_store") == 2
+
+
+def test_retry_on_lock(settings, mixer):
+    from blog.models import Category
+    from blog.sqlite import retry_on_lock
+
+    settings.BLOG_SQLITE_LOCK_BACKOFF = 0
+    calls = []
+
+    def create():
+        calls.append(connection.in_atomic_block)
+        mixer.blend("blog.Category", slug=f"locked-{len(calls)}")
+        if len(calls) < 3:
+            raise OperationalError("database is locked")
+        return len(calls)
+
+    assert retry_on_lock(create) == 3, (
+        "Убедитесь, что транзакция повторяется при блокировке базы."
+    )
+    assert calls == [True] * 3
+    assert list(Category.objects.values_list("slug", flat=True)) == [
+        "locked-3"
+    ], "Убедитесь, что неудачные попытки откатываются."
+
+    def broken():
+        calls.append(None)
+        raise OperationalError("no such table: blog_missing")
+
+    calls.clear()
+    with pytest.raises(OperationalError):
+        retry_on_lock(broken)
+    assert len(calls) == 1, "Другие ошибки базы не должны повторяться."
@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _is_visible(post):
+    post.refresh_from_db(fields=["is_visible"])
+    return post.is_visible
+
+
+def test_category_publication_updates_posts(
+        post_with_published_location, published_category):
+    post = post_with_published_location
+    assert _is_visible(post)
+    published_category.is_published = False
+    published_category.save()
+    assert not _is_visible(post), (
+        "Убедитесь, что при снятии категории с публикации её посты"
+        " пропадают из лент."
+    )
+    published_category.is_published = True
+    published_category.save()
+    assert _is_visible(post)
+    published_category.delete()
+    assert not _is_visible(post)
+
+
+def test_sweep_opens_due_posts(post_with_published_location):
+    post = post_with_published_location
+    post.pub_date = timezone.now() + timedelta(days=1)
+    post.save()
+    assert not _is_visible(post)
+    type(post).objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    call_command("publish_due_posts")
+    assert _is_visible(post), (
+        "Убедитесь, что команда `publish_due_posts` открывает публикации,"
+        " дата которых наступила."
+    )
+
+
+def test_published_cutoff_is_quantized(settings):
+    from blog.models import Post
+
+    settings.BLOG_VISIBILITY_QUANTUM = 30
+    start = timezone.now().replace(second=0, microsecond=0)
+    first = Post.objects.published(start + timedelta(seconds=1))
+    second = Post.objects.published(start + timedelta(seconds=29))
+    assert str(first.query) == str(second.query), (
+        "Убедитесь, что в пределах кванта запросы лент дают одинаковый SQL."
+    )
+
+
+def test_due_post_shown_before_sweep(post_with_published_location):
+    post = post_with_published_location
+    post.pub_date = timezone.now() + timedelta(seconds=60)
+    post.save()
+    assert _is_visible(post)
+    assert post not in type(post).objects.published()
+    assert post in type(post).objects.published(
+        timezone.now() + timedelta(seconds=120)
+    )